@@ -0,0 +1 @@
+"""Benchmarks CHAP1 (hors application, lancés à la main : python -m benchmarks.<nom>)."""
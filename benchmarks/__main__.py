@@ -0,0 +1,92 @@
+"""Suite de benchmarks capture -> transcription -> stockage.
+
+    python -m benchmarks run [--quick] [--only audio,transcribe,sessions,storage,startup] [--out FICHIER.json]
+    python -m benchmarks compare AVANT.json APRES.json
+
+Les résultats sont écrits en JSON (un fichier par exécution) pour comparer
+deux versions du code sur la même machine.
+"""
+import argparse, json, os, platform, subprocess, sys, time
+from pathlib import Path
+
+SUITES = ('audio', 'transcribe', 'sessions', 'storage', 'startup')
+
+
+def _meta():
+    try:
+        rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except Exception:
+        rev = ''
+    import numpy
+    return {'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'git': rev, 'python': platform.python_version(),
+            'numpy': numpy.__version__, 'platform': platform.platform(), 'cpu_count': os.cpu_count()}
+
+
+def run(args):
+    only = [s for s in (args.only or ','.join(SUITES)).split(',') if s]
+    out = {'meta': _meta()}
+    sizes = (1_000, 10_000) if args.quick else (1_000, 10_000, 100_000)
+    for name in only:
+        print(f'== {name}', file=sys.stderr)
+        t = time.perf_counter()
+        if name == 'audio':
+            from . import audio
+            out['audio'] = audio.run(quick=args.quick)
+        elif name == 'transcribe':
+            from . import transcribe
+            out['transcribe'] = transcribe.run(args.models_dir, seconds=10.0 if args.quick else 30.0, speech=args.speech)
+        elif name == 'sessions':
+            from . import transcribe
+            out['sessions'] = transcribe.run_sessions(args.models_dir, seconds=10.0 if args.quick else 15.0, speech=args.speech)
+        elif name == 'storage':
+            from . import storage
+            out['storage'] = storage.run(sizes=sizes, export=not args.no_export)
+        elif name == 'startup':
+            from . import startup
+            out['startup'] = startup.run(runs=3 if args.quick else 5)
+        else:
+            raise SystemExit(f'suite inconnue : {name}')
+        print(f'   {time.perf_counter() - t:.1f}s', file=sys.stderr)
+    path = Path(args.out or 'bench_results/bench_{}.json'.format(time.strftime('%Y%m%d-%H%M%S')))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(out, indent=2, ensure_ascii=False), encoding='utf-8')
+    print(path)
+
+
+def _flatten(obj, prefix=''):
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            yield from _flatten(v, f'{prefix}.{k}' if prefix else k)
+    elif isinstance(obj, list):
+        for i, v in enumerate(obj):
+            yield from _flatten(v, f'{prefix}[{i}]')
+    elif isinstance(obj, (int, float)) and not isinstance(obj, bool):
+        yield prefix, obj
+
+
+def compare(args):
+    a = dict(_flatten({k: v for k, v in json.loads(Path(args.before).read_text(encoding='utf-8')).items() if k != 'meta'}))
+    b = dict(_flatten({k: v for k, v in json.loads(Path(args.after).read_text(encoding='utf-8')).items() if k != 'meta'}))
+    for key in sorted(set(a) & set(b)):
+        if key.endswith(('_s', '_us', 'rtf', 'cpu_per_audio_s')) and a[key]:
+            print('{:<60} {:>12.4g} {:>12.4g} {:>+8.1%}'.format(key, a[key], b[key], b[key] / a[key] - 1))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m benchmarks', description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    r = sub.add_parser('run')
+    r.add_argument('--only', help='suites séparées par des virgules : ' + ','.join(SUITES))
+    r.add_argument('--quick', action='store_true', help='durées et tailles réduites')
+    r.add_argument('--out')
+    r.add_argument('--models-dir')
+    r.add_argument('--speech', help='fichier de parole réelle pour le RTF (sinon synthétique, VAD désactivé)')
+    r.add_argument('--no-export', action='store_true')
+    c = sub.add_parser('compare')
+    c.add_argument('before'); c.add_argument('after')
+    a = ap.parse_args(argv)
+    run(a) if a.cmd == 'run' else compare(a)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+"""Capture : rééchantillonnage, mixage et rejeu complet de LiveMixer sur faux périphériques."""
+import tempfile, time
+from pathlib import Path
+import numpy as np
+from .fake_sd import FakeSoundDevice, ensure_sounddevice
+from .synth import speech_like, blocks
+from . import resample
+
+ensure_sounddevice()
+from optimisation_pilotage.modules import audio_mix  # noqa: E402
+
+TARGET_SR = 16000
+
+
+def bench_mix(seconds=60.0, block_ms=10.0, vad=True):
+    """Coût CPU de SourceMixer (2 sources, 48 kHz + 44,1 kHz stéréo) + découpage, par seconde d'audio."""
+    mic = speech_like(seconds, 48000, 1, seed=1)
+    sysa = speech_like(seconds, 44100, 2, seed=2)
+    bm = [b[:, 0].copy() for b in blocks(mic, 48000, block_ms)]
+    bs = [b.mean(axis=1).astype(np.float32) for b in blocks(sysa, 44100, block_ms)]
+    clock = [0.0]
+    mixer = audio_mix.SourceMixer(TARGET_SR, clock=lambda: clock[0])   # horloge simulée : pas de trous parasites
+    mixer.start(0.0)
+    mixer.add_source('mic', 48000); mixer.add_source('system', 44100)
+    ring = audio_mix.RingBuffer(30 * TARGET_SR)
+    seg = audio_mix.VadSegmenter(TARGET_SR) if vad else audio_mix.FixedSegmenter(TARGET_SR, 15)
+    chunks = 0
+    t = time.process_time()
+    for k in range(min(len(bm), len(bs))):
+        clock[0] = (k + 1) * block_ms / 1000
+        mixer.push('mic', bm[k], clock[0]); mixer.push('system', bs[k], clock[0])
+        ring.write(mixer.pull())
+        chunks += len(seg.process(ring))
+    cpu = time.process_time() - t
+    return {'seconds': seconds, 'block_ms': block_ms, 'vad': vad, 'chunks': chunks,
+            'cpu_per_audio_s': cpu / seconds, 'drift_corrections': mixer.drift_corrections}
+
+
+def bench_livemixer(seconds=60.0, speed=20.0, vad=True, chunk=15):
+    """Rejoue deux sources dans LiveMixer (threads, callbacks, files) sans périphérique réel."""
+    fake = FakeSoundDevice({0: (speech_like(seconds, 48000, 1, seed=1), 48000),
+                            1: (speech_like(seconds, 44100, 2, seed=2), 44100)}, speed=speed)
+    real_sd = audio_mix.sd
+    audio_mix.sd = fake
+    got = []
+    try:
+        m = audio_mix.LiveMixer(chunk_seconds=chunk, mic_device=0, sys_device=1, vad=vad,
+                                on_chunk=lambda c: got.append((c.offset, c.duration, time.perf_counter())))
+        t_wall = time.perf_counter(); t_cpu = time.process_time()
+        m.start()
+        fake.finished.wait(seconds / speed * 5 + 10)
+        time.sleep(0.2)
+        m.stop()
+        cpu = time.process_time() - t_cpu; wall = time.perf_counter() - t_wall
+        stats = m.stats()
+    finally:
+        audio_mix.sd = real_sd
+    audio_s = sum(d for _, d, _ in got)
+    return {'seconds': seconds, 'speed': speed, 'vad': vad, 'chunks': len(got), 'chunk_audio_s': audio_s,
+            'wall_s': wall, 'cpu_per_audio_s': cpu / seconds, **stats}
+
+
+def bench_archive(seconds=60.0, chunk=15):
+    """Archive de session FLAC indexée vs un WAV par chunk : octets, CPU d'écriture, lecture d'une plage."""
+    x = speech_like(seconds, TARGET_SR, 1, seed=3)[:, 0]
+    with tempfile.TemporaryDirectory() as d:
+        t = time.process_time()
+        a = audio_mix.SessionArchive(Path(d) / 'session.flac', TARGET_SR, max_pending=1 << 16)
+        for part in blocks(x, TARGET_SR, 100): a.write(part)   # blocs de 100 ms, comme le mixer
+        a.close(timeout=60)
+        flac_cpu = time.process_time() - t
+        flac_bytes = a.path.stat().st_size + audio_mix.index_path(a.path).stat().st_size
+        t = time.process_time()
+        w = audio_mix.ChunkArchiver(Path(d) / 'wav')
+        for i, k in enumerate(range(0, len(x), chunk * TARGET_SR)):
+            w.put(audio_mix.AudioChunk(x[k:k + chunk * TARGET_SR], TARGET_SR, seq=i))
+        w.close(timeout=60)
+        wav_cpu = time.process_time() - t
+        wav_bytes = sum(p.stat().st_size for p in (Path(d) / 'wav').iterdir())
+        t0 = seconds / 2
+        t = time.perf_counter(); y = audio_mix.read_range(a.path, t0, t0 + 5); read_ms = (time.perf_counter() - t) * 1e3
+        exact = bool(np.abs(y - x[int(t0 * TARGET_SR):int((t0 + 5) * TARGET_SR)]).max() < 1e-4)
+    return {'seconds': seconds, 'flac_mb_per_h': flac_bytes / seconds * 3600 / 2**20,
+            'wav_mb_per_h': wav_bytes / seconds * 3600 / 2**20, 'ratio': flac_bytes / wav_bytes,
+            'flac_cpu_per_audio_s': flac_cpu / seconds, 'wav_cpu_per_audio_s': wav_cpu / seconds,
+            'read_5s_ms': read_ms, 'read_exact': exact, 'dropped_samples': a.dropped_samples}
+
+
+def run(quick=False):
+    secs = 20.0 if quick else 60.0
+    return {
+        'resample': resample.run(seconds=secs),
+        'mix': [bench_mix(secs, vad=False), bench_mix(secs, vad=True)],
+        'livemixer': bench_livemixer(secs),
+        'archive': bench_archive(secs),
+    }
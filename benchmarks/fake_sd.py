@@ -0,0 +1,73 @@
+"""Faux module sounddevice : rejoue de l'audio synthétique dans LiveMixer sans périphérique.
+
+    fake = FakeSoundDevice({0: (audio, 48000), 1: (audio2, 44100)}, speed=20)
+    audio_mix.sd = fake
+"""
+import sys, threading, time
+
+
+def ensure_sounddevice():
+    """Permet d'importer audio_mix sur une machine sans PortAudio."""
+    try:
+        import sounddevice  # noqa: F401
+    except Exception:
+        sys.modules['sounddevice'] = FakeSoundDevice({})
+
+
+class _Default:
+    device = (0, 1)
+
+
+class FakeSoundDevice:
+    def __init__(self, sources, block_ms=10, speed=20.0):
+        # sources : index -> (audio float32 (N, ch), samplerate)
+        self.sources = sources
+        self.block_ms = block_ms
+        self.speed = speed          # facteur d'accélération par rapport au temps réel
+        self.default = _Default()
+        self.finished = threading.Event()
+        self._streams = []
+
+    def query_devices(self, device=None):
+        devs = [{'name': f'fake{i}', 'max_input_channels': a.shape[1], 'max_output_channels': a.shape[1],
+                 'default_samplerate': sr} for i, (a, sr) in sorted(self.sources.items())]
+        return devs if device is None else devs[device]
+
+    def InputStream(self, samplerate, channels, device, callback, **kw):
+        audio, sr = self.sources[device]
+        if samplerate != sr or channels != audio.shape[1]:
+            raise ValueError('combinaison non supportée')
+        s = _FakeStream(self, audio, sr, callback)
+        self._streams.append(s)
+        return s
+
+
+class _FakeStream:
+    def __init__(self, dev, audio, sr, callback):
+        self.dev = dev; self.audio = audio; self.sr = sr; self.cb = callback
+        self._stop = threading.Event(); self.done = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _run(self):
+        bs = max(1, int(self.sr * self.dev.block_ms / 1000))
+        period = bs / self.sr / self.dev.speed
+        t0 = time.perf_counter()
+        for k, i in enumerate(range(0, self.audio.shape[0], bs)):
+            if self._stop.is_set():
+                break
+            blk = self.audio[i:i + bs]
+            self.cb(blk, blk.shape[0], None, None)
+            delay = t0 + (k + 1) * period - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+        self.done.set()
+        if all(s.done.is_set() for s in self.dev._streams):
+            self.dev.finished.set()
+
+    def stop(self):
+        self._stop.set()
+
+    def close(self):
+        pass
@@ -0,0 +1,73 @@
+"""Coût CPU du rééchantillonnage par seconde d'audio : ancien np.interp par bloc
+vs StreamResampler (polyphase à état).
+
+    python -m benchmarks.resample [--seconds 60] [--block-ms 10]
+"""
+import argparse, time
+import numpy as np
+from .fake_sd import ensure_sounddevice
+
+ensure_sounddevice()
+from optimisation_pilotage.modules.audio_mix import StreamResampler  # noqa: E402
+
+TARGET_SR = 16000
+
+
+def legacy_resample(x, sr_from, sr_to):
+    # copie de l'ancien _resample_mono imbriqué dans LiveMixer._run
+    if sr_from == sr_to:
+        return x
+    N = x.shape[0]
+    if N == 0:
+        return x
+    M = int(round(N * (sr_to / sr_from)))
+    t_old = np.linspace(0.0, 1.0, N, endpoint=False)
+    t_new = np.linspace(0.0, 1.0, M, endpoint=False)
+    y = np.interp(t_new, t_old, x[:, 0]).astype(np.float32)
+    return y[:, None]
+
+
+def _blocks(sr, seconds, block_ms):
+    rng = np.random.default_rng(0)
+    x = (0.1 * rng.standard_normal(int(sr * seconds))).astype(np.float32)
+    bs = max(1, int(sr * block_ms / 1000))
+    return [x[i:i + bs] for i in range(0, x.shape[0], bs)]
+
+
+def _cpu(fn, blocks):
+    t = time.process_time()
+    for b in blocks:
+        fn(b)
+    return time.process_time() - t
+
+
+def run(seconds=60.0, block_ms=10.0, rates=(48000, 44100, 32000)):
+    results = []
+    for sr in rates:
+        blocks = _blocks(sr, seconds, block_ms)
+        blocks2d = [b[:, None] for b in blocks]
+        legacy = _cpu(lambda b: legacy_resample(b, sr, TARGET_SR), blocks2d)
+        rs = StreamResampler(sr, TARGET_SR)
+        stream = _cpu(rs.process, blocks)
+        results.append({
+            'sr_from': sr, 'sr_to': TARGET_SR, 'block_ms': block_ms,
+            'legacy_cpu_per_audio_s': legacy / seconds,
+            'stream_cpu_per_audio_s': stream / seconds,
+            'taps': getattr(rs, 'taps', 0),
+        })
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__)
+    ap.add_argument('--seconds', type=float, default=60.0)
+    ap.add_argument('--block-ms', type=float, default=10.0)
+    a = ap.parse_args(argv)
+    print('{:>8} {:>6} {:>14} {:>14} {:>6}'.format('sr', 'taps', 'interp ms/s', 'stream ms/s', 'ratio'))
+    for r in run(a.seconds, a.block_ms):
+        lg, st = r['legacy_cpu_per_audio_s'] * 1000, r['stream_cpu_per_audio_s'] * 1000
+        print('{:>8} {:>6} {:>14.3f} {:>14.3f} {:>6.2f}'.format(r['sr_from'], r['taps'], lg, st, st / lg if lg else 0))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+"""Démarrage à froid : coût d'import de l'application (processus neuf à chaque mesure)
+et modules lourds chargés avant l'ouverture de la fenêtre.
+
+    python -m benchmarks.startup [--runs 5]
+"""
+import argparse, json, os, statistics, subprocess, sys
+from pathlib import Path
+
+HEAVY = ('numpy', 'sounddevice', 'soundfile', 'faster_whisper', 'ctranslate2', 'av', 'tokenizers',
+         'huggingface_hub', 'openpyxl', 'pyarrow')
+ROOT = Path(__file__).resolve().parent.parent
+
+# exécuté dans un processus neuf ; pas de PortAudio requis (sounddevice n'est plus importé par app)
+_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t
+print(json.dumps({{'s': dt, 'heavy': sorted({{m.split('.')[0] for m in sys.modules}} & set({heavy!r}))}}))
+"""
+
+
+def _probe(module):
+    env = dict(os.environ, PYTHONPATH=str(ROOT) + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    out = subprocess.run([sys.executable, '-c', _PROBE.format(module=module, heavy=HEAVY)],
+                         capture_output=True, text=True, env=env, cwd=str(ROOT))
+    if out.returncode:
+        return {'error': out.stderr.strip().splitlines()[-1] if out.stderr.strip() else 'échec'}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def bench_import(module, runs=5):
+    res = [_probe(module) for _ in range(runs)]
+    ok = [r for r in res if 'error' not in r]
+    if not ok:
+        return {'module': module, 'error': res[0]['error']}
+    return {'module': module, 'import_s': statistics.median(r['s'] for r in ok), 'heavy_modules': ok[0]['heavy']}
+
+
+def run(runs=5):
+    # app : chemin critique de la fenêtre ; whisper_transcribe : chargé ensuite par le thread de démarrage
+    return {'app': bench_import('optimisation_pilotage.app', runs),
+            'whisper_transcribe': bench_import('optimisation_pilotage.modules.whisper_transcribe', runs)}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m benchmarks.startup', description=__doc__)
+    ap.add_argument('--runs', type=int, default=5)
+    a = ap.parse_args(argv)
+    print(json.dumps(run(a.runs), indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
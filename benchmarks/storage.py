@@ -0,0 +1,78 @@
+"""Base SQLite et export (Excel, CSV) à 1k / 10k / 100k lignes, sur une base temporaire."""
+import random, sqlite3, tempfile, time, tracemalloc
+from pathlib import Path
+
+SIZES = (1_000, 10_000, 100_000)
+CALL_SAMPLE = 1_000   # appels unitaires chronométrés (add_meeting / add_todo)
+
+
+def _fill(path, n, content_chars=500):
+    # remplissage en masse (non chronométré) pour atteindre n réunions et n actions
+    rnd = random.Random(n)
+    words = 'budget planning jalon risque livrable recette chantier client fournisseur réunion'.split()
+    con = sqlite3.connect(path)
+    con.executemany('INSERT INTO meetings(date,thematique,projet,title,participants,content,audio_path) VALUES (?,?,?,?,?,?,?)',
+                    (('2024-{:02d}-{:02d}'.format(1 + i % 12, 1 + i % 28), 'them{}'.format(i % 20), 'proj{}'.format(i % 50),
+                      'Réunion {}'.format(i), 'A;B;C', ' '.join(rnd.choice(words) for _ in range(content_chars // 8)), '')
+                     for i in range(n)))
+    con.executemany('INSERT INTO todos(meeting_id,thematique,projet,action,acteur,echeance,status) VALUES (?,?,?,?,?,?,?)',
+                    ((1 + i % n, 'them{}'.format(i % 20), 'proj{}'.format(i % 50), 'Action {}'.format(i),
+                      'acteur{}'.format(i % 7) if i % 5 else '', '2024-12-31' if i % 3 else '', 'A faire') for i in range(n)))
+    con.commit(); con.close()
+
+
+def _timed(fn, *a, **kw):
+    t = time.perf_counter(); fn(*a, **kw); return time.perf_counter() - t
+
+
+def run(sizes=SIZES, export=True):
+    from optimisation_pilotage.modules import db
+    results = []
+    real_path = db.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            for n in sizes:
+                db.DB_PATH = Path(tmp) / f'bench_{n}.db'
+                db.init_db()
+                _fill(db.DB_PATH, n)
+                r = {'rows': n}
+                r['init_db_s'] = _timed(db.init_db)
+                t = time.perf_counter()
+                for i in range(CALL_SAMPLE):
+                    db.add_todo(1, 'them', 'proj', 'Action bench {}'.format(i), 'X', '2024-12-31')
+                r['add_todo_us'] = (time.perf_counter() - t) / CALL_SAMPLE * 1e6
+                rows = [(1, 'them', 'proj', 'Action bulk {}'.format(i), 'X', '2024-12-31') for i in range(CALL_SAMPLE)]
+                r['add_todos_bulk_us'] = _timed(db.add_todos, rows) / CALL_SAMPLE * 1e6
+                t = time.perf_counter()
+                for i in range(CALL_SAMPLE // 10):
+                    db.add_meeting('2024-06-01', 'them', 'proj', 'Bench', '', 'texte ' * 100, '')
+                r['add_meeting_us'] = (time.perf_counter() - t) / (CALL_SAMPLE // 10) * 1e6
+                r['list_meetings_s'] = _timed(db.list_meetings)
+                r['list_meetings_filtered_s'] = _timed(db.list_meetings, {'thematique': 'them7', 'projet': 'proj3'})
+                r['list_todos_s'] = _timed(db.list_todos)
+                first = db.page_meetings(limit=200)
+                r['page_meetings_first_ms'] = _timed(db.page_meetings, limit=200) * 1e3
+                r['page_meetings_next_ms'] = _timed(db.page_meetings, after=(first[-1][1], first[-1][0]), limit=200) * 1e3 if first else 0.0
+                r['page_todos_first_ms'] = _timed(db.page_todos, limit=200) * 1e3
+                if export:
+                    r['export_excel_s'], r['export_excel_peak_mb'] = _bench_export(Path(tmp) / f'export_{n}.xlsx')
+                    r['export_csv_s'], r['export_csv_peak_mb'] = _bench_export(Path(tmp) / f'export_{n}.csv')
+                results.append(r)
+        finally:
+            db.close_all()
+            db.DB_PATH = real_path
+    return results
+
+
+def _bench_export(path):
+    # durée, puis pic d'allocations Python sur une 2e passe (tracemalloc fausserait la durée) :
+    # il doit rester plat quand la base grossit
+    from optimisation_pilotage.modules import export
+    t = time.perf_counter()
+    export.export(path)
+    dt = time.perf_counter() - t
+    tracemalloc.start()
+    export.export(path)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return dt, peak / 2**20
@@ -0,0 +1,31 @@
+"""Audio synthétique reproductible (graine fixe) pour les benchmarks."""
+import numpy as np
+
+
+def speech_like(seconds, sr=16000, channels=1, seed=0):
+    """Bouffées harmoniques modulées séparées de pauses, float32 (N, channels)."""
+    rng = np.random.default_rng(seed)
+    n = int(seconds * sr)
+    t = np.arange(n) / sr
+    f0 = 120 + 60 * np.sin(2 * np.pi * 0.3 * t)
+    phase = 2 * np.pi * np.cumsum(f0) / sr
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    env = np.abs(np.sin(2 * np.pi * 2.5 * t)) ** 0.5
+    # tours de parole de 1 à 4 s séparés de pauses de 0,2 à 1,5 s
+    gate = np.ones(n)
+    pos = 0
+    while pos < n:
+        talk = int(rng.uniform(1.0, 4.0) * sr)
+        pause = int(rng.uniform(0.2, 1.5) * sr)
+        gate[pos + talk:pos + talk + pause] = 0.0
+        pos += talk + pause
+    x = 0.2 * voice * env * gate + 0.002 * rng.standard_normal(n)
+    out = np.empty((n, channels), dtype=np.float32)
+    for c in range(channels):
+        out[:, c] = x * (1.0 - 0.1 * c)
+    return out
+
+
+def blocks(x, sr, block_ms=10):
+    bs = max(1, int(sr * block_ms / 1000))
+    return [x[i:i + bs] for i in range(0, x.shape[0], bs)]
@@ -0,0 +1,72 @@
+"""Facteur temps réel (RTF) de Transcriber par modèle et compute_type."""
+import time
+from pathlib import Path
+import numpy as np
+from .synth import speech_like
+
+COMPUTE_TYPES = ('int8', 'int8_float32', 'float32')
+
+
+def _load_audio(path, seconds):
+    import soundfile as sf
+    x, sr = sf.read(str(path), dtype='float32', always_2d=True)
+    x = x.mean(axis=1)
+    if sr != 16000:
+        from optimisation_pilotage.modules.audio_mix import StreamResampler
+        x = np.array(StreamResampler(sr, 16000).process(x))
+    return x[:int(seconds * 16000)]
+
+
+def run(models_dir=None, sizes=('small', 'medium'), compute_types=COMPUTE_TYPES, seconds=30.0, speech=None):
+    """Sans `speech`, le signal est synthétique et le VAD est désactivé pour forcer un décodage complet."""
+    from optimisation_pilotage.modules import utils, models_manager, whisper_transcribe as wt
+    models_dir = Path(models_dir or utils.MODELS_DIR)
+    audio = _load_audio(speech, seconds) if speech else speech_like(seconds, 16000, 1)[:, 0]
+    dur = audio.shape[0] / 16000
+    results = []
+    for size in sizes:
+        mp = wt.model_path(models_dir, size)
+        if not models_manager.is_installed(mp):
+            results.append({'model': size, 'skipped': 'modèle absent'}); continue
+        for ct in compute_types:
+            reg = wt.ModelRegistry(max_models=1)   # chargement mesuré à part, sans cache partagé
+            t = time.perf_counter()
+            try:
+                tr = wt.Transcriber(models_dir, size, compute_type=ct, models=reg)
+            except Exception as e:
+                results.append({'model': size, 'compute_type': ct, 'skipped': str(e)}); continue
+            load = time.perf_counter() - t
+            t = time.perf_counter()
+            if speech:
+                tr.transcribe_array(audio)
+            else:
+                segs, _ = tr.model.transcribe(audio, beam_size=1, vad_filter=False, language='fr')
+                list(segs)
+            took = time.perf_counter() - t
+            results.append({'model': size, 'compute_type': ct, 'audio_s': dur, 'load_s': load,
+                            'decode_s': took, 'rtf': took / dur})
+    return results
+
+
+def run_sessions(models_dir=None, size='small', sessions=(1, 2, 4), seconds=15.0, speech=None):
+    """Chunks simultanés de `n` salles : décodés un par un puis en un lot (moteur multi-sessions)."""
+    from optimisation_pilotage.modules import utils, models_manager, whisper_transcribe as wt
+    models_dir = Path(models_dir or utils.MODELS_DIR)
+    if not models_manager.is_installed(wt.model_path(models_dir, size)):
+        return [{'model': size, 'skipped': 'modèle absent'}]
+    tr = wt.Transcriber(models_dir, size)
+    audio = _load_audio(speech, seconds * max(sessions)) if speech else speech_like(seconds * max(sessions), 16000, 1)[:, 0]
+    n_s = int(seconds * 16000)
+    tr.transcribe_batch([(audio[:16000], 0.0), (audio[16000:32000], 1.0)])   # chauffe (pipeline batché créé)
+    results = []
+    for n in sessions:
+        items = [(audio[k * n_s:(k + 1) * n_s], 0.0) for k in range(n)]
+        t = time.perf_counter()
+        for a, off in items: tr.transcribe_segments(a, offset=off)
+        seq = time.perf_counter() - t
+        t = time.perf_counter()
+        tr.transcribe_batch(items)
+        batched = time.perf_counter() - t
+        results.append({'model': size, 'sessions': n, 'audio_s': n * seconds, 'sequential_s': seq, 'batched_s': batched,
+                        'rtf': batched / (n * seconds), 'sequential_rtf': seq / (n * seconds)})
+    return results
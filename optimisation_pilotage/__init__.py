@@ -1 +1,4 @@
-from .app import main
+def main():
+    # import différé : les outils en ligne de commande (batch) n'ont pas besoin de Tk ni des périphériques audio
+    from .app import main as _main
+    return _main()
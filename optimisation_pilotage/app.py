@@ -1,25 +1,201 @@
-
+import time
+_T0=time.perf_counter()   # origine du rapport de démarrage
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import threading, time, os, subprocess, sys
+import importlib, json, logging, threading, os, subprocess, sys
 from pathlib import Path
-import sounddevice as sd
-from .modules import db, utils, models_manager, whisper_transcribe as wt, audio_mix, export as export_mod
+from .modules import db, utils, models_manager, journal, transcript, telemetry, autotune, jobs, export as export_mod
+
+class _Lazy:
+    """Module importé au premier accès : numpy, sounddevice, soundfile et faster-whisper ne
+    retardent plus l'ouverture de la fenêtre (chargés par le thread de démarrage)."""
+    def __init__(self, name): self._name=name
+    def __getattr__(self, attr): return getattr(importlib.import_module(self._name, __package__), attr)
+audio_mix=_Lazy('.modules.audio_mix'); wt=_Lazy('.modules.whisper_transcribe'); pipeline=_Lazy('.modules.pipeline'); engine=_Lazy('.modules.engine')
+
+STREAM_STEP=1.5  # pas (s) du mode streaming (= engine.STREAM_STEP, engine n'est importé qu'au premier live)
+EXPORT_FORMATS={'Excel (.xlsx)': ('.xlsx','Excel'), 'CSV (un fichier par feuille)': ('.csv','CSV'), 'Parquet (pyarrow)': ('.parquet','Parquet')}
+# valeurs = pipeline.POLICY_* (littérales : pipeline n'est importé qu'au premier live)
+OVERLOAD_POLICIES={'Fusionner les chunks': 'merge', 'Ignorer les plus anciens': 'drop', 'Basculer sur small': 'downgrade'}
+DEVICES_KEY='audio_devices'   # settings : {clé périphérique: [samplerate, canaux]} qui ont fonctionné
 
 class AppState:
     def __init__(self):
-        self.transcript=''; self.current_meeting_id=None; self.word_count=0; self.chunks=0
-        self.autosave_path = utils.AUTOSAVE_DIR / 'live_autosave.txt'
+        self.segments=transcript.SegmentStore(); self.current_meeting_id=None; self.chunks=0
+    @property
+    def transcript(self): return self.segments.text   # assemblé à la demande
+
+class PagedTree:
+    """Treeview chargé page par page au défilement (pagination par clé côté db).
+
+    `fetch(after=..., limit=..., until=...)` renvoie des lignes dont la 1re colonne est
+    l'id (= iid) ; `key(row)` donne la clé de pagination. `refresh()` relit la fenêtre
+    déjà chargée et n'applique que la différence (ajouts, suppressions, lignes modifiées).
+    """
+    def __init__(self, tree, fetch, key, tag=None, page=200):
+        self.tree=tree; self.fetch=fetch; self.key=key; self.tag=tag or (lambda row: ()); self.page=page
+        self.rows={}; self.last=None; self.exhausted=False
+        sb=ttk.Scrollbar(tree.master, orient='vertical', command=tree.yview); self._sb=sb
+        tree.configure(yscrollcommand=self._on_scroll)
+        sb.pack(side='right', fill='y'); tree.pack(side='left', fill='both', expand=True)
+
+    def _on_scroll(self, first, last):
+        self._sb.set(first, last)
+        if float(last)>=0.9 and not self.exhausted: self.tree.after_idle(self.load_more)
+
+    @staticmethod
+    def _display(row): return tuple('' if v is None else v for v in row)
+
+    def reset(self):
+        self.tree.delete(*self.tree.get_children()); self.rows={}; self.last=None; self.exhausted=False
+        self.load_more()
+
+    def load_more(self):
+        if self.exhausted: return
+        rows=self.fetch(after=self.last, limit=self.page)
+        for row in rows:
+            iid=str(row[0])
+            if iid in self.rows: continue
+            vals=self._display(row); self.rows[iid]=vals
+            self.tree.insert('', 'end', iid=iid, values=vals, tags=self.tag(row))
+        if rows: self.last=self.key(rows[-1])
+        self.exhausted=len(rows)<self.page
+
+    def reveal(self, iid, key):
+        # charge d'un coup les lignes jusqu'à `key` si elle n'est pas encore affichée
+        if not self.tree.exists(iid) and not self.exhausted and self.last is not None and key<self.last:
+            for row in self.fetch(after=self.last, until=key, limit=None):
+                vals=self._display(row); self.rows[str(row[0])]=vals
+                self.tree.insert('', 'end', iid=str(row[0]), values=vals, tags=self.tag(row))
+                self.last=self.key(row)
+        if self.tree.exists(iid): self.tree.selection_set(iid); self.tree.see(iid)
+
+    def refresh(self):
+        if self.last is None: return self.reset()
+        rows=self.fetch(until=None if self.exhausted else self.last, limit=None)
+        wanted=[str(r[0]) for r in rows]; keep=set(wanted)
+        gone=[iid for iid in self.rows if iid not in keep]
+        if gone: self.tree.delete(*gone)
+        for iid in gone: del self.rows[iid]
+        # fusion avec l'ordre affiché (un seul get_children) : invariant = les i premières lignes
+        # sont wanted[:i], suivies des lignes de `shown` pas encore placées ; move seulement si besoin
+        shown=self.tree.get_children(); j=0; moved=set()
+        for i,(iid,row) in enumerate(zip(wanted,rows)):
+            vals=self._display(row)
+            while j<len(shown) and shown[j] in moved: j+=1
+            if iid not in self.rows:
+                self.tree.insert('', i, iid=iid, values=vals, tags=self.tag(row))
+            else:
+                if self.rows[iid]!=vals: self.tree.item(iid, values=vals, tags=self.tag(row))
+                if j<len(shown) and shown[j]==iid: j+=1
+                else: self.tree.move(iid, '', i); moved.add(iid)
+            self.rows[iid]=vals
+        if rows: self.last=self.key(rows[-1])
+
+class UiBus:
+    """Canal de mises à jour vers Tk, utilisable depuis n'importe quel thread.
+
+    Les threads de travail déposent ; le thread Tk vide le canal toutes les 1/fps s.
+    Entre deux trames, les ajouts de texte vers un même widget sont concaténés (un
+    seul insert + see) et les `post` d'une même clé ne gardent que le dernier.
+    """
+    def __init__(self, root, fps=30):
+        self.root=root; self.period=max(1, int(1000/fps))
+        self._lock=threading.Lock(); self._texts={}; self._posts={}; self._first=None
+        self.root.after(self.period, self._drain)
+
+    def append(self, widget, text, index='end', tags=()):
+        """Ajoute `text` à `index` (index ou marque Tk) de `widget`."""
+        with self._lock:
+            if self._first is None and telemetry.enabled: self._first=time.monotonic()
+            parts=self._texts.setdefault((widget, index), [])
+            if parts and parts[-1][1]==tags: parts[-1][0].append(text)
+            else: parts.append(([text], tags))
+
+    def post(self, key, fn, *args):
+        """Appelle fn(*args) à la prochaine trame ; un post plus récent de la même clé le remplace."""
+        with self._lock:
+            self._posts.pop(key, None); self._posts[key]=(fn, args)
+
+    def _drain(self):
+        with self._lock:
+            texts, self._texts = self._texts, {}
+            posts, self._posts = self._posts, {}
+            first, self._first = self._first, None
+        for (widget, index), parts in texts.items():
+            try:
+                for chunks, tags in parts: widget.insert(index, ''.join(chunks), tags)
+                widget.see('end')
+            except Exception as e: utils.log_exc(e)
+        if first is not None: telemetry.observe('text_to_screen_ms', (time.monotonic() - first)*1e3)
+        for fn, args in posts.values():
+            try: fn(*args)
+            except Exception as e: utils.log_exc(e)
+        self.root.after(self.period, self._drain)
+
+class StartupReport:
+    """Jalons du démarrage en ms depuis l'import de app ; une ligne par lancement dans
+    logs/startup.jsonl (les 200 derniers) pour repérer les régressions."""
+    KEEP=200
+    def __init__(self, t0=_T0): self.t0=t0; self.marks={}
+    def mark(self, name): self.marks[name]=round((time.perf_counter()-self.t0)*1e3, 1)
+    def summary(self): return ', '.join('{} {:.0f} ms'.format(k, v) for k,v in self.marks.items())
+    def write(self, path=None):
+        path=Path(path or utils.LOGS_DIR / 'startup.jsonl')
+        for k,v in self.marks.items(): telemetry.observe('startup.'+k+'_ms', v)
+        try:
+            lines=path.read_text(encoding='utf-8').splitlines()[-(self.KEEP-1):] if path.is_file() else []
+            lines.append(json.dumps({'t': time.strftime('%Y-%m-%dT%H:%M:%S'), **self.marks}))
+            path.write_text('\n'.join(lines)+'\n', encoding='utf-8')
+        except OSError as e: utils.log_exc(e)
+        logging.info('Démarrage : %s', self.summary())
 
 class MainWindow:
     def __init__(self, root):
-        self.root=root; db.init_db()
+        self.root=root; self.startup=StartupReport(); self.startup.mark('imports')
+        self.bus=UiBus(root)
+        self.tuning={}   # réglages calibrés de l'hôte : lus par le thread de démarrage (None si jamais calibré)
         self.model_mgr = models_manager.ModelsManager(on_change=None)
         root.title('CHAP1 – Compte-rendus Harmonises et Assistance au Pilotage 1 (v2.4.6)'); root.geometry('1150x780')
         self._build_ui();
-        self.model_mgr.on_change = self._on_model_change
-        self.model_mgr.refresh()
-        self._start_autosave()
+        # le ModelsManager notifie depuis son thread de téléchargement : on passe par le bus
+        self.model_mgr.on_change = lambda: self.bus.post('models', self._on_model_change)
+        self.journal=None
+        self.jobs=jobs.JobScheduler(); self._jobs_job=None
+        self.startup.mark('window')
+        root.after_idle(lambda: root.after(0, self.startup.mark, 'first_paint'))
+        # base, modèles, périphériques et imports lourds hors du thread Tk : la fenêtre s'affiche d'abord
+        threading.Thread(target=self._startup_bg, daemon=True, name='startup').start()
+
+    def _startup_bg(self):
+        st=self.startup
+        try:
+            db.init_db(); tuning=autotune.load(); st.mark('db')
+            self.model_mgr.refresh(); st.mark('models')
+            try:
+                devs=audio_mix.LiveMixer.list_devices(); default=audio_mix.sd.default.device
+            except Exception as e:
+                utils.log_exc(e); devs=[]; default=(None, None)
+            st.mark('devices')
+            self.bus.post('startup', self._startup_ready, tuning, devs, default)
+            for name in ('.modules.pipeline', '.modules.whisper_transcribe', '.modules.engine'): importlib.import_module(name, __package__)
+            st.mark('whisper')   # faster-whisper chargé avant le premier « Démarrer »
+            self.bus.post('preload', self._preload_model)
+        except Exception as e:
+            utils.log_exc(e)
+        self.bus.post('startup_report', self._startup_report)
+
+    def _startup_ready(self, tuning, devs, default):
+        self.tuning=tuning; self._on_model_size(); self._show_tuning()
+        self._fill_devices(devs, default)
+        self._refresh_tables()
+        self.startup.mark('ready')
+        self.root.after(300, self._offer_recovery)
+        # re-transcriptions en attente (processus séparé, priorité basse)
+        self.root.after(3000, lambda: (self.jobs.start(), self._poll_jobs()))
+
+    def _startup_report(self):
+        self.startup.write(); self.var_startup.set('Démarrage : '+self.startup.summary())
 
     def _build_ui(self):
         self.nb=ttk.Notebook(self.root); self.nb.pack(fill='both', expand=True)
@@ -47,11 +223,13 @@ class MainWindow:
         self.var_status=tk.StringVar(value='Prêt.'); ttk.Label(stat, textvariable=self.var_status).pack(side='left')
         self.var_wc=tk.StringVar(value='Mots: 0'); ttk.Label(stat, textvariable=self.var_wc).pack(side='right')
         self.var_chunks=tk.StringVar(value='Chunks: 0'); ttk.Label(stat, textvariable=self.var_chunks).pack(side='right', padx=(0,16))
+        self.var_pipe=tk.StringVar(value=''); ttk.Label(stat, textvariable=self.var_pipe).pack(side='right', padx=(0,16))
 
         self.txt=tk.Text(frm, wrap='word', height=22); self.txt.pack(fill='both', expand=True, pady=(6,0))
+        self.txt.tag_configure('partial', foreground='#888888')
 
-        self._fill_devices(); self._on_model_size()
-        self.cbo_model.bind('<<ComboboxSelected>>', lambda e: self._on_model_size())
+        self._on_model_size()
+        self.cbo_model.bind('<<ComboboxSelected>>', lambda e: (self._on_model_size(), self._preload_model()))
 
     def _build_tab_cr(self):
         frm=ttk.Frame(self.tab_cr); frm.pack(fill='both', expand=True, padx=12, pady=12)
@@ -59,29 +237,51 @@ class MainWindow:
         ttk.Label(filt, text='Filtre Thématique:').pack(side='left'); self.f_them=ttk.Entry(filt, width=20); self.f_them.pack(side='left', padx=6)
         ttk.Label(filt, text='Projet:').pack(side='left'); self.f_proj=ttk.Entry(filt, width=20); self.f_proj.pack(side='left', padx=6)
         ttk.Button(filt, text='Appliquer', command=self._refresh_tables).pack(side='left', padx=12)
+        ttk.Label(filt, text='Recherche plein texte:').pack(side='left', padx=(16,0)); self.f_search=ttk.Entry(filt, width=30); self.f_search.pack(side='left', padx=6)
+        self.f_search.bind('<Return>', lambda e: self._search())
+        ttk.Button(filt, text='Chercher', command=self._search).pack(side='left')
+
+        self.txt_hits=tk.Text(frm, wrap='word', height=5, cursor='arrow'); self.txt_hits.pack(fill='x', pady=(8,0))
+        self.txt_hits.tag_configure('hit', background='#FFF3A0', font=('TkDefaultFont', 9, 'bold')); self.txt_hits.tag_configure('meta', foreground='#555555')
+        self.txt_hits.bind('<Double-Button-1>', self._open_hit); self.txt_hits.configure(state='disabled')
 
         cols_cr=('id','date','thematique','projet','title','participants')
-        self.tree_cr=ttk.Treeview(frm, columns=cols_cr, show='headings', height=8)
+        box=ttk.Frame(frm); box.pack(fill='x', pady=8)
+        self.tree_cr=ttk.Treeview(box, columns=cols_cr, show='headings', height=8)
         for c in cols_cr:
             self.tree_cr.heading(c, text=c.capitalize())
             self.tree_cr.column(c, width=140 if c!='title' else 240)
-        self.tree_cr.pack(fill='x', pady=8)
+        self.paged_cr=PagedTree(self.tree_cr, lambda **kw: db.page_meetings(self._cr_filters, **kw), key=lambda r: (r[1], r[0]))
+        self._cr_filters=None
 
         btns=ttk.Frame(frm); btns.pack(fill='x', pady=4)
         ttk.Button(btns, text='Éditer participants', command=self._edit_participants).pack(side='left', padx=4)
         ttk.Button(btns, text='Éditer CR', command=self._edit_cr).pack(side='left', padx=4)
+        ttk.Button(btns, text='Re-transcrire avec', command=self._retranscribe).pack(side='left', padx=(16,4))
+        self.cbo_job_model=ttk.Combobox(btns, values=['medium','small'], width=8, state='readonly'); self.cbo_job_model.current(0); self.cbo_job_model.pack(side='left')
+        ttk.Button(btns, text='Annuler re-transcription', command=self._cancel_retranscribe).pack(side='left', padx=4)
+        self.var_jobs=tk.StringVar(value=''); ttk.Label(btns, textvariable=self.var_jobs).pack(side='left', padx=12)
 
         cols_td=('id','meeting_id','thematique','projet','action','acteur','echeance','status')
-        self.tree_td=ttk.Treeview(frm, columns=cols_td, show='headings', height=8)
+        box=ttk.Frame(frm); box.pack(fill='both', expand=True)
+        self.tree_td=ttk.Treeview(box, columns=cols_td, show='headings', height=8)
         for c in cols_td:
             self.tree_td.heading(c, text=c.capitalize())
             self.tree_td.column(c, width=120 if c not in ('action',) else 320)
-        self.tree_td.pack(fill='both', expand=True)
-        self._refresh_tables()
+        self.tree_td.tag_configure('warn', background='#FFF0F0')
+        self.paged_td=PagedTree(self.tree_td, db.page_todos, key=lambda r: (r[0],), tag=lambda r: ('warn',) if (not r[6]) or (not r[5]) else ())
 
     def _build_tab_export(self):
         frm=ttk.Frame(self.tab_export); frm.pack(fill='x', padx=12, pady=12)
-        ttk.Button(frm, text='Exporter Excel (CR, ToDo, ToDo_Global)', command=self._do_export).pack(side='left')
+        row=ttk.Frame(frm); row.pack(fill='x', pady=4)
+        ttk.Label(row, text='Format:').pack(side='left'); self.cbo_export=ttk.Combobox(row, values=list(EXPORT_FORMATS), width=24, state='readonly'); self.cbo_export.current(0); self.cbo_export.pack(side='left', padx=6)
+        ttk.Label(row, text='Projet:').pack(side='left', padx=(16,0)); self.ex_proj=ttk.Entry(row, width=20); self.ex_proj.pack(side='left', padx=6)
+        ttk.Label(row, text='Du (AAAA-MM-JJ):').pack(side='left', padx=(16,0)); self.ex_from=ttk.Entry(row, width=12); self.ex_from.pack(side='left', padx=6)
+        ttk.Label(row, text='Au:').pack(side='left'); self.ex_to=ttk.Entry(row, width=12); self.ex_to.pack(side='left', padx=6)
+        row=ttk.Frame(frm); row.pack(fill='x', pady=4)
+        self.btn_export=ttk.Button(row, text='Exporter (CR, ToDo, ToDo_Global)', command=self._do_export); self.btn_export.pack(side='left')
+        self.pb_export=ttk.Progressbar(row, orient='horizontal', mode='determinate', maximum=100); self.pb_export.pack(side='left', fill='x', expand=True, padx=8)
+        self.var_export=tk.StringVar(value=''); ttk.Label(frm, textvariable=self.var_export).pack(anchor='w')
 
     def _build_tab_settings(self):
         frm=ttk.Frame(self.tab_settings); frm.pack(fill='both', expand=True, padx=12, pady=12)
@@ -96,13 +296,54 @@ class MainWindow:
         ttk.Button(row2, text='Télécharger medium', command=lambda: self._download_model('medium')).pack(side='left')
         self.lbl_medium.pack(fill='x', padx=8); self.pb_medium.pack(fill='x', padx=8, pady=(0,6))
 
+        live=ttk.LabelFrame(frm, text='Transcription live'); live.pack(fill='x', pady=8)
+        row=ttk.Frame(live); row.pack(fill='x', padx=8, pady=4)
+        ttk.Label(row, text='En cas de surcharge:').pack(side='left')
+        self.cbo_policy=ttk.Combobox(row, values=list(OVERLOAD_POLICIES), width=26, state='readonly'); self.cbo_policy.current(0); self.cbo_policy.pack(side='left', padx=6)
+        ttk.Label(row, text='Workers:').pack(side='left', padx=(16,0)); self.spn_workers=tk.Spinbox(row, from_=1, to=4, width=4); self.spn_workers.pack(side='left', padx=6)
+        ttk.Label(row, text='File max:').pack(side='left', padx=(16,0)); self.spn_pending=tk.Spinbox(row, from_=1, to=32, width=4); self.spn_pending.delete(0,'end'); self.spn_pending.insert(0,'4'); self.spn_pending.pack(side='left', padx=6)
+        self.var_vad=tk.BooleanVar(value=True); ttk.Checkbutton(row, text='Découper aux pauses (VAD, "Pas" = durée max)', variable=self.var_vad).pack(side='left', padx=(16,0))
+        row2=ttk.Frame(live); row2.pack(fill='x', padx=8, pady=4)
+        self.var_stream=tk.BooleanVar(value=False); ttk.Checkbutton(row2, text='Streaming : texte partiel affiché en continu (pas de {}s, 1 worker)'.format(STREAM_STEP), variable=self.var_stream).pack(side='left')
+        row3=ttk.Frame(live); row3.pack(fill='x', padx=8, pady=4)
+        self.var_adapt=tk.BooleanVar(value=False); ttk.Checkbutton(row3, text='Basculer automatiquement medium ↔ small selon le RTF (les deux modèles requis)', variable=self.var_adapt).pack(side='left')
+        row4=ttk.Frame(live); row4.pack(fill='x', padx=8, pady=4)
+        self.btn_tune=ttk.Button(row4, text='Calibrer cette machine', command=self._calibrate); self.btn_tune.pack(side='left')
+        self.var_tune=tk.StringVar(); ttk.Label(row4, textvariable=self.var_tune).pack(side='left', padx=8)
+        self._show_tuning(); self._on_model_size()
+
         fold=ttk.LabelFrame(frm, text='Dossiers'); fold.pack(fill='x', pady=8)
         ttk.Label(fold, text=f'Données: {utils.DATA_DIR}').pack(anchor='w', padx=8, pady=2)
         ttk.Label(fold, text=f'Exports: {utils.EXPORTS_DIR}').pack(anchor='w', padx=8, pady=2)
         ttk.Label(fold, text=f'Logs: {utils.LOGS_DIR}').pack(anchor='w', padx=8, pady=2)
         ttk.Button(fold, text='Ouvrir logs', command=lambda: self._open_folder(utils.LOGS_DIR)).pack(anchor='w', padx=8, pady=6)
 
-        self._on_model_change()
+        diag=ttk.LabelFrame(frm, text='Diagnostics'); diag.pack(fill='both', expand=True, pady=8)
+        self.var_telemetry=tk.BooleanVar(value=os.getenv('CHAP1_TELEMETRY','') not in ('','0'))
+        ttk.Checkbutton(diag, text='Télémétrie du pipeline (latences, files, RTF, base) → logs/telemetry.jsonl', variable=self.var_telemetry, command=self._toggle_telemetry).pack(anchor='w', padx=8, pady=4)
+        self.txt_diag=tk.Text(diag, height=10, wrap='none', font=('TkFixedFont', 9)); self.txt_diag.pack(fill='both', expand=True, padx=8, pady=(0,6))
+        self.txt_diag.configure(state='disabled'); self._toggle_telemetry()
+        self.var_startup=tk.StringVar(value='Démarrage : en cours…'); ttk.Label(diag, textvariable=self.var_startup).pack(anchor='w', padx=8, pady=(0,6))
+
+    def _toggle_telemetry(self):
+        if getattr(self,'_diag_job',None): self.root.after_cancel(self._diag_job); self._diag_job=None
+        if self.var_telemetry.get():
+            telemetry.enable(); self._poll_diag()
+        else:
+            telemetry.disable()
+
+    def _poll_diag(self):
+        if not telemetry.enabled: return
+        snap=telemetry.snapshot()
+        lines=['{:<24}{:>7}{:>10}{:>10}{:>10}'.format('mesure','n','p50','p95','max')]
+        for k,h in sorted(snap['hist'].items()):
+            lines.append('{:<24}{:>7}{:>10.3g}{:>10.3g}{:>10.3g}'.format(k, h['n'], h['p50'], h['p95'], h['max']))
+        if snap['gauges']:
+            lines.append(''); lines.append('{:<24}{:>10}{:>10}'.format('jauge','dernière','max'))
+            for k,(last,peak) in sorted(snap['gauges'].items()): lines.append('{:<24}{:>10.4g}{:>10.4g}'.format(k, last, peak))
+        for k,v in sorted(snap['counters'].items()): lines.append('{:<24}{:>10}'.format(k, v))
+        self.txt_diag.configure(state='normal'); self.txt_diag.delete('1.0','end'); self.txt_diag.insert('1.0', '\n'.join(lines)); self.txt_diag.configure(state='disabled')
+        self._diag_job=self.root.after(1000, self._poll_diag)
 
     def _open_folder(self, p: Path):
         try:
@@ -112,13 +353,13 @@ class MainWindow:
         except Exception as e:
             messagebox.showerror('Erreur', str(e))
 
-    def _fill_devices(self):
+    def _fill_devices(self, devs, default):
+        # liste énumérée par le thread de démarrage (PortAudio peut prendre plusieurs centaines de ms)
         try:
-            devs=audio_mix.LiveMixer.list_devices()
             names=[f"{i}: {d['name']}" for i,d in enumerate(devs)]
             self.cbo_mic['values']=names; self.cbo_sys['values']=names
             try:
-                in_idx, out_idx = sd.default.device
+                in_idx, out_idx = default
                 if isinstance(in_idx, int) and 0 <= in_idx < len(devs): self.cbo_mic.set(f"{in_idx}: {devs[in_idx]['name']} (Défaut)")
                 if isinstance(out_idx, int) and 0 <= out_idx < len(devs): self.cbo_sys.set(f"{out_idx}: {devs[out_idx]['name']} (Défaut)")
             except Exception:
@@ -127,8 +368,44 @@ class MainWindow:
             self.cbo_mic['values']=[]; self.cbo_sys['values']=[]
 
     def _on_model_size(self):
-        size=self.cbo_model.get()
-        self.spn_chunk.delete(0,'end'); self.spn_chunk.insert(0, '15' if size=='small' else '24')
+        # pas de chunk : calibration de l'hôte si disponible, sinon small 15 s / medium 24 s
+        # (Workers = chunks d'une session en cours à la fois, décodés dans le même lot par le moteur)
+        tune=autotune.settings_for(self.cbo_model.get(), self.tuning)
+        self.spn_chunk.delete(0,'end'); self.spn_chunk.insert(0, str(tune['chunk_seconds']))
+
+    def _model_args(self, size):
+        # réglage du modèle partagé du moteur live (tous les cœurs, 1 worker : les lots remplacent les workers)
+        return dict(size=size, **autotune.engine_settings(size, self.tuning))
+
+    def _preload_model(self, size=None):
+        # charge + échauffe le modèle choisi en fond : "Démarrer" n'attend plus le chargement
+        size=size or self.cbo_model.get(); ms=self.model_mgr.medium if size=='medium' else self.model_mgr.small
+        if not ms.present: return
+        a=self._model_args(size)
+        wt.registry.warmup(utils.MODELS_DIR, size, a['compute_type'], a['cpu_threads'], a['num_workers'])
+
+    def _show_tuning(self):
+        models=(self.tuning or {}).get('models') or {}
+        if not models: self.var_tune.set('Non calibré (réglages par défaut : int8, threads auto).'); return
+        self.var_tune.set(' | '.join('{}: {} {}×{} thr, chunk {}s, RTF {:.2f}'.format(k, m['compute_type'], m['num_workers'], m['cpu_threads'], m['chunk_seconds'], m['rtf'])
+                                     for k,m in sorted(models.items())) + ' ({})'.format(self.tuning['host'].get('when','')))
+
+    def _calibrate(self):
+        if getattr(self,'_live_on',False): messagebox.showinfo('Calibration', 'Arrêtez la session live avant de calibrer.'); return
+        if not (self.model_mgr.small.present or self.model_mgr.medium.present): messagebox.showwarning('Calibration', 'Aucun modèle installé.'); return
+        if not messagebox.askokcancel('Calibration', 'La calibration mesure chaque réglage sur cette machine (plusieurs minutes, CPU à 100 %). Continuer ?'): return
+        self.btn_tune.configure(state='disabled')
+        def run():
+            try:
+                res=autotune.calibrate(utils.MODELS_DIR, progress=lambda t: self.bus.post('tune', self.var_tune.set, 'Calibration : '+t))
+                if res: self.tuning=res
+            except Exception as e:
+                utils.log_exc(e); self.bus.post('tune_err', messagebox.showerror, 'Calibration', str(e))
+            self.bus.post('tune', self._tuning_done)
+        threading.Thread(target=run, daemon=True).start()
+
+    def _tuning_done(self):
+        self.btn_tune.configure(state='normal'); self._show_tuning(); self._on_model_size(); self._preload_model()
 
     def _toggle_live(self):
         if getattr(self,'_live_on',False): self._stop_live()
@@ -143,7 +420,8 @@ class MainWindow:
             self.current_cr_path = utils.DATA_DIR / fname
             ms=self.model_mgr.medium if size=='medium' else self.model_mgr.small
             if not ms.present: messagebox.showwarning('Modèle manquant', 'Modèle {} non installé. Téléchargez-le dans Paramètres.'.format(size)); return
-            self.transcriber=wt.Transcriber(utils.MODELS_DIR, size=size)
+            workers=max(1, int(self.spn_workers.get())); max_pending=max(1, int(self.spn_pending.get()))
+            policy=OVERLOAD_POLICIES.get(self.cbo_policy.get(), pipeline.POLICY_MERGE)
 
             def parse_idx(s):
                 try:
@@ -154,34 +432,127 @@ class MainWindow:
             mic_idx=parse_idx(mic); sys_idx=parse_idx(sysd)
             if mic_idx is None and sys_idx is None:
                 messagebox.showinfo('Périphériques requis', 'Sélectionnez au moins un périphérique (micro ou système).'); return
-
-            self.state=AppState(); self.txt.delete('1.0','end'); self.var_status.set('Enregistrement… (pas {}s)'.format(chunk)); self.btn_toggle.configure(text='Arrêter'); self._live_on=True
-            def on_chunk(path: Path):
-                try:
-                    text=self.transcriber.transcribe_wav(path)
-                    if text:
-                        self.state.transcript += (' ' + text if self.state.transcript else text)
-                        self.state.word_count = len(self.state.transcript.split()); self.state.chunks += 1
-                        self.txt.insert('end', ' ' + text); self.txt.see('end')
-                        self.var_wc.set('Mots: {}'.format(self.state.word_count)); self.var_chunks.set('Chunks: {}'.format(self.state.chunks));
-                except Exception as e:
-                    utils.log_exc(e)
-                finally:
-                    try: path.unlink(missing_ok=True)
-                    except Exception: pass
-            self.mixer=audio_mix.LiveMixer(chunk_seconds=chunk, mic_device=mic_idx, sys_device=sys_idx, on_chunk=on_chunk, out_dir=utils.AUTOSAVE_DIR); self.mixer.start()
+            # capture -> transcription -> stockage : moteur sans interface (modules/engine), ici une salle
+            self.engine=engine.Engine(utils.MODELS_DIR, settings=self._model_args, tuning=self.tuning)
+            self.engine.model(size)   # modèle manquant : erreur avant de toucher à l'interface
+
+            # audio de toute la session en FLAC indexé (réécoute, re-transcription) -> meetings.audio_path
+            self.session_audio=utils.AUDIO_DIR / '{}_{}.flac'.format(Path(fname).stem, time.strftime('%H%M%S'))
+            self.journal=journal.TranscriptJournal(utils.AUTOSAVE_DIR, {'date': d, 'thematique': thematique, 'projet': projet, 'title': title,
+                                                                        'audio_path': str(self.session_audio)})
+            self.jobs.pause()   # la re-transcription de fond libère le CPU pendant le live
+            dev=self._device_cache()
+            self.state=AppState(); self.txt.delete('1.0','end')
+            # bascule medium <-> small pilotée par le RTF (les deux modèles gardés chargés)
+            adapt=bool(self.var_adapt.get() and self.model_mgr.small.present and self.model_mgr.medium.present)
+            if adapt: self._preload_model('small' if size=='medium' else 'medium')
+            stream=bool(self.var_stream.get())
+            # streaming : pas courts, un seul worker (fenêtre glissante, état séquentiel) ; sinon chunks fixes ou VAD
+            self.mixer=audio_mix.LiveMixer(chunk_seconds=STREAM_STEP if stream else chunk, mic_device=mic_idx, sys_device=sys_idx,
+                                           vad=self.var_vad.get() and not stream, session_path=self.session_audio, **dev)
+            # marque 'partial' : début de la zone d'hypothèse (streaming) ; le texte confirmé s'insère
+            # devant elle (gravité droite), l'hypothèse est remplacée derrière
+            self.txt.mark_set('partial', 'end-1c'); self.txt.mark_gravity('partial', 'right')
+            self.session=self.engine.open('live', self.mixer, size=size, sink=self._on_live_text, stream=stream, workers=workers,
+                                          max_pending=max_pending, policy=policy, adapt=adapt, journal=self.journal,
+                                          on_status=lambda ses, msg: self.bus.post('status', self.var_status.set, 'Enregistrement… '+msg))
+            self.state.segments=self.session.segments
+            # état « en cours » seulement une fois la session ouverte
+            self.var_status.set('Enregistrement… (pas {}s)'.format(chunk)); self.btn_toggle.configure(text='Arrêter'); self._live_on=True
+            self._poll_pipeline()
         except Exception as e:
+            try:
+                if getattr(self,'engine',None): self.engine.close()   # arrête aussi la capture de la session ouverte
+                if getattr(self,'mixer',None): self.mixer.stop()
+            except Exception as e2: utils.log_exc(e2)
+            self.engine=self.session=self.mixer=None
+            if self.journal: self.journal.close(); self.journal=None
+            self._live_on=False; self.btn_toggle.configure(text='Démarrer (mix micro + système)'); self.var_status.set('Arrêté.')
+            self.jobs.resume()
             messagebox.showerror('Erreur', str(e)); utils.log_exc(e)
 
+    def _device_cache(self):
+        # (samplerate, canaux) retenus par _open_input aux sessions précédentes : plus d'essais à l'ouverture
+        try: configs=json.loads(db.get_setting(DEVICES_KEY) or '{}')
+        except ValueError: configs={}
+        def save(key, sr, ch):   # thread de capture
+            configs[key]=[sr, ch]; db.set_setting(DEVICES_KEY, json.dumps(configs))
+        return dict(device_configs=configs, on_device_config=save)
+
+    def _on_live_text(self, ses, segs, partial):
+        # thread du pipeline : segments déjà rangés par la session (et journalisés), l'affichage passe par le bus ;
+        # en streaming, texte confirmé ajouté et hypothèse (grisée) remplacée
+        text=' '.join(s.text for s in segs if s.text)
+        if text:
+            self.state.chunks=ses.chunks
+            self.bus.append(self.txt, ' ' + text, 'partial'); self._post_counters()
+        if partial is not None: self.bus.post('partial', self._set_partial, ' ' + partial if partial else '')
+
+    def _set_partial(self, text):
+        start=self.txt.index('partial'); self.txt.delete('partial', 'end-1c')
+        if text: self.txt.insert('end-1c', text, ('partial',)); self.txt.mark_set('partial', start)
+        self.txt.see('end')
+
+    def _post_counters(self):
+        st=self.state
+        self.bus.post('wc', self.var_wc.set, 'Mots: {}'.format(st.segments.word_count))
+        self.bus.post('chunks', self.var_chunks.set, 'Chunks: {}'.format(st.chunks))
+
+    def _poll_pipeline(self):
+        if not getattr(self,'_live_on',False): self.var_pipe.set(''); return
+        st=self.session.stats()
+        txt='File: {} | Retard: {:.1f}s'.format(st['depth'], st['lag'])
+        if st['dropped']: txt+=' | Ignorés: {}'.format(st['dropped'])
+        if st['degraded']: txt+=' | Modèle léger'
+        self.var_pipe.set(txt); self.root.after(500, self._poll_pipeline)
+
     def _stop_live(self):
-        try:
-            if hasattr(self,'mixer') and self.mixer: self.mixer.stop()
-        except Exception as e:
-            utils.log_exc(e)
-        self._live_on=False; self.btn_toggle.configure(text='Démarrer (mix micro + système)'); self.var_status.set('Arrêté.')
+        # fin de capture, vidage de la file (jusqu'à ~20 s en cas de retard) et écriture en base
+        # hors du thread Tk : la fenêtre reste réactive, la fin est signalée par le bus
+        self._live_on=False; self.btn_toggle.configure(text='Arrêt en cours…', state='disabled')
+        self.var_status.set('Arrêt : fin des transcriptions en attente…')
         thematique=self.ent_thematique.get().strip(); projet=self.ent_projet.get().strip()
         title=self.ent_title.get().strip() or 'SansTitre'; d=self.ent_date.get().strip() or utils.today_str()
-        db.add_meeting(d, thematique, projet, title, '', getattr(self.state,'transcript',''), '') ; self._refresh_tables()
+        audio=getattr(self,'session_audio',None)
+        session, eng = getattr(self,'session',None), getattr(self,'engine',None)
+        self.session=self.engine=self.journal=None   # le journal appartient à la session (fermé par Session.save)
+        def run():
+            try:
+                if session: session.stop()   # source arrêtée, chunks en attente terminés
+                if eng: eng.close()
+            except Exception as e:
+                utils.log_exc(e)
+            try:
+                if session: session.save(d, thematique, projet, title, str(audio) if audio and audio.is_file() else '')
+            except Exception as e:
+                utils.log_exc(e)   # journal gardé : session proposée à la restauration au prochain démarrage
+            self.bus.post('live_stopped', self._live_stopped)
+        self._stopping=threading.Thread(target=run, daemon=True, name='stop-live'); self._stopping.start()
+
+    def _live_stopped(self):
+        self.btn_toggle.configure(text='Démarrer (mix micro + système)', state='normal'); self.var_status.set('Arrêté.')
+        self.jobs.resume(); self._poll_jobs()
+        self._refresh_tables()
+
+    def _offer_recovery(self):
+        # journaux restants = sessions live interrompues (plantage, coupure)
+        for ses in journal.pending(utils.AUTOSAVE_DIR):
+            if not ses.segments: journal.discard(ses); continue
+            m=ses.meta
+            ans=messagebox.askyesnocancel('Session interrompue',
+                'Une session live du {} ({}) ne s\'est pas terminée : {} segments, {} mots.\n\n'
+                'Oui : restaurer en CR\nNon : supprimer\nAnnuler : demander au prochain démarrage'.format(
+                    m.get('date','?'), m.get('title','SansTitre'), len(ses.segments), len(ses.text.split())))
+            if ans is None: continue
+            audio=m.get('audio_path') or ''; audio=audio if audio and Path(audio).is_file() else ''
+            if ans:
+                # l'archive FLAC n'a pas été finalisée mais reste lisible grâce à son index
+                mid=db.add_meeting(m.get('date') or utils.today_str(), m.get('thematique',''), m.get('projet',''), m.get('title') or 'SansTitre', '', ses.text, audio)
+                db.add_segments(mid, ses.segments)
+            elif audio:
+                for p in (Path(audio), audio_mix.index_path(audio)): p.unlink(missing_ok=True)
+            journal.discard(ses)
+        self._refresh_tables()
 
     def _save_cr(self):
         if not hasattr(self,'current_cr_path'): self.current_cr_path = utils.DATA_DIR / '{}_CR.txt'.format(utils.today_str())
@@ -205,6 +576,33 @@ class MainWindow:
         try: return int(vals[0])
         except Exception: return None
 
+    def _retranscribe(self):
+        mid=self._get_selected_meeting_id()
+        if not mid: return
+        size=self.cbo_job_model.get(); ms=self.model_mgr.medium if size=='medium' else self.model_mgr.small
+        if not ms.present: messagebox.showwarning('Modèle manquant', 'Modèle {} non installé. Téléchargez-le dans Paramètres.'.format(size)); return
+        if not (db.get_meeting_audio(mid) or '').strip(): messagebox.showinfo('Audio absent', "Cette réunion n'a pas d'enregistrement archivé."); return
+        self.jobs.submit(mid, size); self._poll_jobs()
+
+    def _cancel_retranscribe(self):
+        mid=self._get_selected_meeting_id()
+        if not mid: return
+        for j in db.list_jobs():
+            if j[1]==mid and j[4] in db.JOB_ACTIVE: self.jobs.cancel(j[0])
+        self._poll_jobs()
+
+    def _poll_jobs(self):
+        # état affiché depuis la base (le worker écrit après chaque pas) ; relance tant qu'il reste du travail
+        if self._jobs_job: self.root.after_cancel(self._jobs_job); self._jobs_job=None
+        active=[j for j in db.list_jobs() if j[4] in db.JOB_ACTIVE]
+        if not active: self.var_jobs.set(''); return
+        j=next((j for j in active if j[4]=='running'), active[0])
+        pct=' {:.0f} %'.format(100*j[5]/j[6]) if j[6] else ''
+        self.var_jobs.set('Re-transcription : « {} »{}{}{}'.format(j[2] or j[1], pct, ' (+{} en attente)'.format(len(active)-1) if len(active)>1 else '',
+                                                            ' – en pause (session live)' if self.jobs.paused else ''))
+        if not self.jobs.paused and not self.jobs.running: self.jobs.start()
+        self._jobs_job=self.root.after(2000, self._poll_jobs)
+
     def _edit_participants(self):
         mid=self._get_selected_meeting_id()
         if not mid: return
@@ -234,43 +632,66 @@ class MainWindow:
         ttk.Button(btns, text='Enregistrer', command=save).pack(side='right', padx=8)
         ttk.Button(btns, text='Annuler', command=top.destroy).pack(side='right')
 
+    def _search(self):
+        q=self.f_search.get().strip(); self._hits=[]
+        self.txt_hits.configure(state='normal'); self.txt_hits.delete('1.0','end')
+        if q:
+            try: self._hits=db.search_meetings(q)
+            except Exception as e: utils.log_exc(e)
+            if not self._hits: self.txt_hits.insert('end', 'Aucun résultat.', ('meta',))
+        for mid,d,them,proj,title,snip in self._hits:
+            self.txt_hits.insert('end', '{} – {} ({}/{}) : '.format(d, title or '', them or '', proj or ''), ('meta',))
+            # extrait : les termes trouvés sont entre db.HIT_START et db.HIT_END
+            for i,part in enumerate((snip or '').replace('\n',' ').split(db.HIT_START)):
+                hit,_,rest=part.partition(db.HIT_END) if i else ('',None,part)
+                if hit: self.txt_hits.insert('end', hit, ('hit',))
+                self.txt_hits.insert('end', rest)
+            self.txt_hits.insert('end', '\n')
+        self.txt_hits.configure(state='disabled')
+
+    def _open_hit(self, event):
+        # double-clic sur une ligne de résultat : sélectionne le CR correspondant
+        line=int(self.txt_hits.index('@{},{}'.format(event.x, event.y)).split('.')[0])-1
+        if not getattr(self,'_hits',None) or line>=len(self._hits): return
+        hit=self._hits[line]; self.paged_cr.reveal(str(hit[0]), (hit[1], hit[0]))
+
     def _refresh_tables(self):
-        for tr in (self.tree_cr,self.tree_td):
-            for i in tr.get_children(): tr.delete(i)
         filters={}
         if hasattr(self,'f_them') and self.f_them.get().strip(): filters['thematique']=self.f_them.get().strip()
         if hasattr(self,'f_proj') and self.f_proj.get().strip(): filters['projet']=self.f_proj.get().strip()
-        meetings=db.list_meetings(filters=filters)
-        for row in meetings:
-            self.tree_cr.insert('', 'end', values=row[:6])
-        todos=db.list_todos()
-        for row in todos:
-            tag = 'warn' if (not row[6]) or (not row[5]) else ''
-            iid=self.tree_td.insert('', 'end', values=row, tags=(tag,))
-            if tag: self.tree_td.tag_configure('warn', background='#FFF0F0')
+        # filtres changés : on repart de la 1re page ; sinon diff sur ce qui est déjà affiché
+        if filters!=self._cr_filters: self._cr_filters=filters; self.paged_cr.reset()
+        else: self.paged_cr.refresh()
+        self.paged_td.refresh()
 
     def _do_export(self):
-        path=filedialog.asksaveasfilename(defaultextension='.xlsx', filetypes=[('Excel','*.xlsx')], initialfile='CHAP1_export.xlsx')
+        if getattr(self,'_export_job',None): return
+        ext,label=EXPORT_FORMATS[self.cbo_export.get()]
+        path=filedialog.asksaveasfilename(defaultextension=ext, filetypes=[(label,'*'+ext)], initialfile='CHAP1_export'+ext)
         if not path: return
-        meetings=db.list_meetings(); todos=db.list_todos()
-        try:
-            export_mod.export_excel(Path(path), meetings, todos)
-            messagebox.showinfo('Export', 'Export OK : {}'.format(path))
-        except Exception as e:
-            messagebox.showerror('Export', str(e)); utils.log_exc(e)
-
-    def _start_autosave(self):
-        def loop():
-            while True:
-                try:
-                    txt=self.txt.get('1.0','end').strip()
-                    if txt:
-                        utils.AUTOSAVE_DIR.mkdir(parents=True, exist_ok=True)
-                        self.state.autosave_path.write_text(txt, encoding='utf-8')
-                except Exception as e:
-                    utils.log_exc(e)
-                time.sleep(30)
-        threading.Thread(target=loop, daemon=True).start()
+        filters={'projet': self.ex_proj.get().strip(), 'date_from': self.ex_from.get().strip(), 'date_to': self.ex_to.get().strip()}
+        # écriture en tâche de fond ; le thread ne touche pas à Tk, _poll_export relève l'état
+        job=self._export_job={'done':0, 'total':0, 'files':None, 'error':None}
+        def progress(done, total): job['done']=done; job['total']=total
+        def run():
+            try: job['files']=export_mod.export(Path(path), filters, progress)
+            except Exception as e: job['error']=e; utils.log_exc(e)
+        self.btn_export.configure(state='disabled'); self.var_export.set('Export en cours…'); self.pb_export['value']=0
+        threading.Thread(target=run, daemon=True).start(); self._poll_export()
+
+    def _poll_export(self):
+        job=self._export_job
+        if job['total']: self.pb_export['value']=100*job['done']/job['total']; self.var_export.set('Export en cours… {} / {} lignes'.format(job['done'], job['total']))
+        if job['files'] is None and job['error'] is None: self.root.after(200, self._poll_export); return
+        self._export_job=None; self.btn_export.configure(state='normal')
+        if job['error'] is not None:
+            self.var_export.set('Échec.'); messagebox.showerror('Export', str(job['error'])); return
+        self.pb_export['value']=100; self.var_export.set('Export OK.')
+        messagebox.showinfo('Export', 'Export OK :\n{}'.format('\n'.join(str(p) for p in job['files'])))
 
 def main():
-    root=tk.Tk(); MainWindow(root); root.mainloop()
+    utils.setup()
+    root=tk.Tk(); win=MainWindow(root); root.mainloop()
+    stopping=getattr(win,'_stopping',None)
+    if stopping: stopping.join(30)   # fenêtre fermée pendant un arrêt : le CR est d'abord écrit en base
+    win.jobs.close(); telemetry.disable(); db.close_all()
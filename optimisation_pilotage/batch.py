@@ -0,0 +1,96 @@
+"""Transcription hors ligne d'un dossier d'enregistrements (sans interface).
+
+    python -m optimisation_pilotage.batch DOSSIER [--model small] [--workers 2]
+
+Chaque fichier devient une réunion dans la base (audio_path = chemin du
+fichier) avec ses segments horodatés, comme une session live ; les fichiers déjà présents sont ignorés, on peut donc relancer
+après une interruption.
+"""
+import argparse, datetime, os, sys, time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from .modules import db, utils, models_manager
+
+AUDIO_EXTS = {'.wav', '.flac', '.mp3', '.m4a', '.ogg', '.opus', '.webm', '.mp4', '.aac', '.wma'}
+
+_transcriber = None  # un Transcriber par processus worker
+_init_error = None
+
+def _init_worker(models_dir, size, compute_type, cpu_threads):
+    # une exception ici casserait tout le pool : on la garde pour la signaler par fichier
+    global _transcriber, _init_error
+    try:
+        from .modules.whisper_transcribe import Transcriber
+        _transcriber = Transcriber(Path(models_dir), size, compute_type=compute_type, cpu_threads=cpu_threads)
+    except Exception as e:
+        _init_error = str(e)
+
+def _transcribe(path):
+    t = time.perf_counter()
+    if _init_error:
+        return path, [], 0.0, 0.0, _init_error
+    try:
+        segs, duration = _transcriber.transcribe_file(Path(path))   # Segment : picklable (__slots__)
+        return path, segs, duration, time.perf_counter() - t, None
+    except Exception as e:
+        return path, [], 0.0, time.perf_counter() - t, str(e)
+
+def find_audio(root: Path, recursive=True):
+    it = root.rglob('*') if recursive else root.glob('*')
+    return sorted(p for p in it if p.is_file() and p.suffix.lower() in AUDIO_EXTS)
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog='python -m optimisation_pilotage.batch', description='Transcription hors ligne de réunions enregistrées.')
+    ap.add_argument('folder', type=Path, help='dossier des enregistrements')
+    ap.add_argument('--model', default='small', choices=['small', 'medium'])
+    ap.add_argument('--compute-type', default='int8')
+    ap.add_argument('--workers', type=int, default=0, help='processus (défaut : cœurs / 4)')
+    ap.add_argument('--threads', type=int, default=0, help='threads CPU par processus (défaut : cœurs / workers)')
+    ap.add_argument('--thematique', default='')
+    ap.add_argument('--projet', default='')
+    ap.add_argument('--no-recursive', action='store_true')
+    a = ap.parse_args(argv)
+    utils.setup()
+
+    if not a.folder.is_dir():
+        ap.error(f'Dossier introuvable : {a.folder}')
+    mp = utils.MODELS_DIR / f'faster-whisper-{a.model}'
+    if not models_manager.is_installed(mp):
+        ap.error(f'Modèle {a.model} introuvable ou incomplet dans {utils.MODELS_DIR}. Téléchargez-le depuis l\'application.')
+    db.init_db()
+    done = db.list_audio_paths()
+    files = find_audio(a.folder, recursive=not a.no_recursive)
+    todo = [p for p in files if str(p.resolve()) not in done]
+    print(f'{len(files)} fichier(s), {len(files) - len(todo)} déjà traité(s), {len(todo)} à transcrire.')
+    if not todo:
+        return 0
+
+    cores = os.cpu_count() or 1
+    workers = max(1, min(a.workers or max(1, cores // 4), len(todo)))
+    threads = a.threads or max(1, cores // workers)
+    print(f'{workers} processus x {threads} threads, modèle {a.model} ({a.compute_type}).')
+
+    t0 = time.perf_counter(); audio_s = 0.0; ok = failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(str(utils.MODELS_DIR), a.model, a.compute_type, threads)) as ex:
+        futures = [ex.submit(_transcribe, str(p.resolve())) for p in todo]
+        for i, fut in enumerate(as_completed(futures), 1):
+            path, segs, duration, took, err = fut.result()
+            if err:
+                failed += 1; print(f'[{i}/{len(todo)}] ERREUR {path}: {err}', file=sys.stderr); continue
+            p = Path(path)
+            date = datetime.date.fromtimestamp(p.stat().st_mtime).isoformat()
+            with db.transaction():   # réunion et segments ensemble : une reprise ne laisse pas de CR sans segments
+                mid = db.add_meeting(date, a.thematique, a.projet, p.stem, '', ' '.join(s.text for s in segs), path)
+                db.add_segments(mid, segs)
+            ok += 1; audio_s += duration
+            rtf = took / duration if duration else 0.0
+            print(f'[{i}/{len(todo)}] {p.name}: {duration:.0f}s audio en {took:.0f}s (RTF {rtf:.2f})')
+    wall = time.perf_counter() - t0
+    print(f'Terminé : {ok} ok, {failed} en erreur, {audio_s/60:.1f} min audio en {wall/60:.1f} min.')
+    if audio_s:
+        print(f'Débit : {audio_s/wall:.2f} s audio / s, RTF global {wall/audio_s:.3f}.')
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,11 @@
-import threading, time, numpy as np, sounddevice as sd, soundfile as sf
+import io, json, os, threading, queue, time, numpy as np, sounddevice as sd, soundfile as sf
 from pathlib import Path
 from typing import Optional, Callable
 from collections import deque
+from functools import lru_cache
+from math import gcd
 from .utils import log_exc
+from . import telemetry
 
 def _safe_mean(x, axis=1):
     try:
@@ -10,25 +13,667 @@ def _safe_mean(x, axis=1):
     except Exception:
         return x
 
+class RingBuffer:
+    """Tampon circulaire mono float32 à capacité fixe.
+
+    Chaque échantillon est écrit deux fois (zone miroir) : toute fenêtre de
+    longueur <= capacité est donc une vue contiguë, sans copie ni réallocation.
+    Si l'écriture dépasse la place libre, les échantillons les plus anciens
+    sont écrasés et comptés dans `overruns` / `lost`.
+    """
+    def __init__(self, capacity: int):
+        self.capacity=max(1, int(capacity))
+        self._data=np.zeros(2*self.capacity, dtype=np.float32)
+        self._r=0   # position de lecture (modulo capacité)
+        self._n=0   # échantillons disponibles
+        self.overruns=0  # nombre d'écrasements
+        self.lost=0      # échantillons perdus au total
+
+    def __len__(self):
+        return self._n
+
+    @property
+    def free(self):
+        return self.capacity - self._n
+
+    def write(self, x):
+        x=np.asarray(x, dtype=np.float32).reshape(-1)
+        n=x.shape[0]
+        if n == 0:
+            return
+        cap=self.capacity
+        if n > cap:
+            x=x[-cap:]; self.lost += n-cap; n=cap
+        over=self._n + n - cap
+        if over > 0:
+            self.overruns += 1; self.lost += over
+            self._r=(self._r+over) % cap; self._n -= over
+        w=(self._r+self._n) % cap
+        first=min(n, cap-w)
+        d=self._data
+        d[w:w+first]=x[:first]; d[cap+w:cap+w+first]=x[:first]
+        rest=n-first
+        if rest:
+            d[:rest]=x[first:]; d[cap:cap+rest]=x[first:]
+        self._n += n
+
+    def peek(self, n: int):
+        """Vue (sans copie) sur les n prochains échantillons.
+        Valable jusqu'au prochain write/consume."""
+        n=min(int(n), self._n)
+        return self._data[self._r:self._r+n]
+
+    def consume(self, n: int):
+        n=min(int(n), self._n)
+        self._r=(self._r+n) % self.capacity; self._n -= n
+
+    def clear(self):
+        self._r=0; self._n=0
+
+
+@lru_cache(maxsize=None)
+def _polyphase_kernel(up, down, zero_crossings=12, rolloff=0.92, beta=8.0):
+    """Noyau sinc fenêtré (Kaiser) découpé en `up` phases.
+
+    Retourne (H, half) : H[p, j] pondère l'échantillon n-half+1+j pour une
+    sortie située à n + p/up (en échantillons d'entrée).
+    """
+    scale=min(1.0, up/down) * rolloff   # coupure relative à la Nyquist d'entrée
+    half=int(np.ceil(zero_crossings / scale))
+    frac=np.arange(up)[:, None] / up
+    d=frac + (half - 1) - np.arange(2*half)[None, :]   # distance sortie -> échantillon
+    win=np.i0(beta*np.sqrt(np.clip(1.0 - (d/half)**2, 0.0, 1.0))) / np.i0(beta)
+    H=scale*np.sinc(scale*d)*win
+    H/=H.sum(axis=1, keepdims=True)   # gain unitaire en continu pour chaque phase
+    return H.astype(np.float32), half
+
+
+class StreamResampler:
+    """Rééchantillonneur polyphase à état, pour des blocs mono float32 successifs.
+
+    Le noyau est calculé une fois par couple de fréquences (cache), l'historique
+    nécessaire au filtre est conservé entre les blocs (pas de discontinuité aux
+    bords) et les tampons de travail sont réutilisés d'un appel à l'autre.
+    Latence : `half` échantillons d'entrée.
+
+    Coût par bloc : une vue à pas fixes sur l'historique (sans copie) puis un produit
+    matriciel ; en rapport fractionnaire (44,1k), l'ordre des phases et les avances d'un
+    cycle de `up` sorties sont précalculés, seul le fenêtrage d'entrée reste indexé.
+    Mesures : python -m benchmarks.resample.
+    """
+    def __init__(self, sr_from: int, sr_to: int):
+        g=gcd(int(sr_from), int(sr_to))
+        self.sr_from=int(sr_from); self.sr_to=int(sr_to)
+        self.up=self.sr_to//g; self.down=self.sr_from//g
+        self.passthrough=self.up == self.down
+        if self.passthrough:
+            return
+        self.H, self.half=_polyphase_kernel(self.up, self.down)
+        self.taps=self.H.shape[1]
+        if self.up > 1:
+            m=np.arange(2*self.up, dtype=np.int64)*self.down   # deux cycles : tranches sans copie
+            self._step=m//self.up                  # avance (échantillons d'entrée) de la m-ième sortie
+            self._Hc=self.H[m % self.up]           # phase de la m-ième sortie
+            self._k0=np.empty(self.up, dtype=np.int64)
+            self._k0[m[:self.up] % self.up]=np.arange(self.up)   # phase -> rang dans le cycle
+        self._work=np.zeros(4096 + self.taps, dtype=np.float32)
+        self._n=self.half - 1           # historique (silence initial)
+        self._pos=(self.half - 1)*self.up  # position de la prochaine sortie, en 1/up d'échantillon
+        self._out=np.zeros(1024, dtype=np.float32)
+
+    def reset(self):
+        if not self.passthrough:
+            self._work[:self.half - 1]=0.0; self._n=self.half - 1; self._pos=(self.half - 1)*self.up
+
+    def process(self, x):
+        """Retourne les échantillons disponibles ; vue valable jusqu'au prochain appel."""
+        if self.passthrough:
+            return x
+        x=np.asarray(x, dtype=np.float32).reshape(-1)
+        need=self._n + x.shape[0]
+        if self._work.shape[0] < need:
+            w=np.zeros(2*need, dtype=np.float32); w[:self._n]=self._work[:self._n]; self._work=w
+        self._work[self._n:need]=x; self._n=need
+        up, down, half=self.up, self.down, self.half
+        # nombre de sorties dont tout le support est disponible
+        M=max(0, -(-((need - half)*up - self._pos) // down))
+        if M == 0:
+            return self._out[:0]
+        if self._out.shape[0] < M:
+            self._out=np.zeros(2*M, dtype=np.float32)
+        out=self._out[:M]; w=self._work; item=w.itemsize
+        if up == 1:
+            # décimation entière (48k/32k -> 16k) : une fenêtre tous les `down` échantillons
+            win=np.ndarray((M, self.taps), np.float32, w, (self._pos - (half - 1))*item, (down*item, item))
+            np.dot(win, self.H[0], out=out)
+        else:
+            win=np.ndarray((need - self.taps + 1, self.taps), np.float32, w, 0, (item, item))
+            pos=self._pos
+            for i in range(0, M, up):
+                n=min(M - i, up); k=int(self._k0[pos % up])
+                rows=self._step[k:k + n] + (pos//up - (half - 1) - int(self._step[k]))
+                np.einsum('ij,ij->i', win[rows], self._Hc[k:k + n], out=out[i:i + n])
+                pos+=n*down
+        # on ne garde que l'historique utile à la prochaine sortie
+        nxt=self._pos + M*down
+        keep=nxt//up - (half - 1)
+        self._work[:need - keep]=self._work[keep:need]; self._n=need - keep
+        self._pos=nxt - keep*up
+        return out
+
+
+LEVEL_FRAME_S=0.1   # résolution (s) du relevé de niveau par source
+
+class _MixSource:
+    def __init__(self, name, samplerate, gain, capacity):
+        self.name=name; self.samplerate=samplerate; self.gain=float(gain)
+        self.ring=RingBuffer(capacity)
+        self.resampler=None
+        self.last_arrival=None  # instant (monotonic) de fin du dernier bloc reçu
+        self.debt=0             # échantillons déjà remplacés par du silence au mixage
+        self.lead=0.0           # avance moyenne (EMA) sur les autres sources, en échantillons
+        self.gaps=0
+        self.levels=np.zeros(1024, dtype=np.float32)   # énergie par trame de LEVEL_FRAME_S (après gain)
+
+
+class SourceMixer:
+    """Aligne plusieurs sources mono sur une même horloge murale et les somme.
+
+    - alignement : chaque bloc est daté à son arrivée ; le démarrage et les trous
+      (ex. loopback WASAPI muet) sont comblés par du silence ;
+    - mixage : somme pondérée par source (gain), écrêtée à [-1, 1] ;
+    - dérive : la source dont l'horloge avance accumule de l'avance ; dès que
+      la moyenne dépasse `drift_tol_s`, on lui retire un échantillon par passe ;
+    - niveaux : l'énergie de chaque source est relevée par trame de LEVEL_FRAME_S
+      sur l'axe du flux mixé, pour attribuer un segment à la source dominante.
+
+    `clock` : horloge murale (time.monotonic), injectable pour rejouer à vitesse simulée.
+    """
+    def __init__(self, samplerate=16000, max_lag_s=0.5, gap_s=0.2, drift_tol_s=0.04, buffer_s=10, clock=time.monotonic):
+        self.clock=clock
+        self.samplerate=samplerate
+        self.max_lag=int(max_lag_s*samplerate)
+        self.gap_s=gap_s
+        self.drift_tol=drift_tol_s*samplerate
+        self.buffer=int(buffer_s*samplerate)
+        self.sources={}
+        self.t0=self.clock()
+        self.drift_corrections=0
+        self.position=0   # échantillons déjà mixés (position de session)
+        self._frame=max(1, int(LEVEL_FRAME_S*samplerate))
+        self._out=np.zeros(samplerate, dtype=np.float32)
+        self._tmp=np.zeros(samplerate, dtype=np.float32)
+
+    def start(self, t0=None):
+        """Fixe l'origine des temps (à appeler avant d'ouvrir les flux)."""
+        self.t0=self.clock() if t0 is None else t0
+
+    def add_source(self, name, samplerate, gain=1.0):
+        src=self.sources[name]=_MixSource(name, samplerate, gain, self.buffer)
+        if samplerate != self.samplerate:
+            src.resampler=StreamResampler(samplerate, self.samplerate)
+
+    def set_gain(self, name, gain):
+        self.sources[name].gain=float(gain)
+
+    def _append(self, s, x):
+        if s.debt:
+            k=min(s.debt, x.shape[0]); x=x[k:]; s.debt -= k
+        s.ring.write(x)
+
+    def _append_silence(self, s, n):
+        if n > 0:
+            self._append(s, np.zeros(n, dtype=np.float32))
+
+    def push(self, name, block, arrival=None):
+        """Ajoute un bloc mono 1-D (samplerate de la source) arrivé à `arrival`."""
+        s=self.sources[name]
+        arrival=self.clock() if arrival is None else arrival
+        start=arrival - block.shape[0]/float(s.samplerate)
+        if s.last_arrival is None:
+            # premier bloc : silence depuis l'origine commune
+            self._append_silence(s, int((start-self.t0)*self.samplerate))
+        elif start - s.last_arrival > self.gap_s:
+            s.gaps += 1
+            self._append_silence(s, int((start-s.last_arrival)*self.samplerate))
+        s.last_arrival=arrival
+        if s.resampler is not None:
+            block=s.resampler.process(block)
+        self._append(s, block)
+
+    def pull(self):
+        """Mixe tout ce qui est aligné ; retourne une vue valable jusqu'au prochain appel."""
+        srcs=list(self.sources.values())
+        if not srcs:
+            return self._out[:0]
+        lens=[len(s.ring) for s in srcs]
+        n=min(lens); padded=False
+        if max(lens) - n > self.max_lag:
+            # une source ne livre plus : on complète par du silence
+            n=max(lens) - self.max_lag; padded=True
+        if n <= 0:
+            return self._out[:0]
+        if self._out.shape[0] < n:
+            self._out=np.zeros(n, dtype=np.float32); self._tmp=np.zeros(n, dtype=np.float32)
+        out=self._out[:n]; out.fill(0.0)
+        for s in srcs:
+            k=min(n, len(s.ring))
+            v=s.ring.peek(k)
+            if s.gain == 1.0:
+                out[:k] += v
+            else:
+                tmp=self._tmp[:k]; np.multiply(v, s.gain, out=tmp); out[:k] += tmp
+            if k:
+                self._record_level(s, v, k)
+            s.ring.consume(k)
+            if k < n:
+                s.debt += n-k
+        if len(srcs) > 1 and not padded:
+            self._compensate_drift(srcs)
+        np.clip(out, -1.0, 1.0, out=out)
+        self.position += n
+        return out
+
+    def _record_level(self, s, v, k):
+        first=self.position // self._frame
+        e=np.bincount((self.position + np.arange(k)) // self._frame - first, weights=v*v) * (s.gain*s.gain)
+        end=first + e.shape[0]
+        if end > s.levels.shape[0]:
+            # croissance par doublement ; le tableau précédent reste lisible par les autres threads
+            grown=np.zeros(max(2*s.levels.shape[0], end), dtype=np.float32); grown[:s.levels.shape[0]]=s.levels
+            s.levels=grown
+        s.levels[first:end] += e
+
+    def dominant_source(self, t0, t1):
+        """Nom de la source la plus énergique sur [t0, t1] (s de session), None si silence."""
+        f0=max(0, int(t0/LEVEL_FRAME_S)); f1=max(f0+1, int(np.ceil(t1/LEVEL_FRAME_S)))
+        best=None; best_e=0.0
+        for s in list(self.sources.values()):
+            e=float(s.levels[f0:f1].sum())
+            if e > best_e: best, best_e = s.name, e
+        return best
+
+    def _compensate_drift(self, srcs):
+        now=self.clock()
+        if any(s.last_arrival is None or now - s.last_arrival > self.gap_s for s in srcs):
+            return  # une source est en pause : l'avance des autres n'est pas de la dérive
+        for s in srcs:
+            s.lead=0.99*s.lead + 0.01*len(s.ring)
+            if s.lead > self.drift_tol and len(s.ring):
+                s.ring.consume(1); s.lead -= 1.0
+                self.drift_corrections += 1
+
+
+class AudioChunk:
+    """Morceau de session livré à `on_chunk` : audio mono float32 au samplerate cible.
+
+    `audio` est une copie en lecture seule, partageable entre consommateurs.
+    `offset` est la position du début du morceau dans la session (secondes).
+    """
+    def __init__(self, audio, samplerate, offset=0.0, seq=0):
+        audio.flags.writeable=False
+        self.audio=audio; self.samplerate=samplerate; self.offset=offset; self.seq=seq
+        self.created=time.monotonic()
+
+    @property
+    def duration(self):
+        return self.audio.shape[0] / float(self.samplerate)
+
+
+class FixedSegmenter:
+    """Découpe le flux mixé en chunks de durée fixe."""
+    def __init__(self, samplerate=16000, seconds=15):
+        self.size=int(samplerate*seconds)
+        self.position=0   # position (échantillons de session) de la tête du tampon
+        self._lost=0
+
+    def process(self, ring: RingBuffer):
+        """Retourne [(audio, position)] pour chaque chunk complet (copies)."""
+        self.position += ring.lost - self._lost; self._lost=ring.lost
+        out=[]
+        while len(ring) >= self.size:
+            out.append((ring.peek(self.size).copy(), self.position))
+            ring.consume(self.size); self.position += self.size
+        return out
+
+
+class VadSegmenter:
+    """Découpe le flux mixé aux pauses, d'après un VAD énergie par trames.
+
+    Le niveau de chaque trame est comparé à un plancher de bruit adaptatif.
+    Un chunk est émis dès qu'une pause suit au moins `min_seconds` de signal,
+    ou forcé au point le plus calme quand il atteint `max_seconds`. Le chunk
+    suivant reprend `overlap_seconds` avant la coupure pour ne pas tronquer de
+    mot. Le silence pur n'est jamais émis : hors parole, on ne garde que la
+    marge d'amorce.
+    """
+    def __init__(self, samplerate=16000, min_seconds=4.0, max_seconds=15.0, pause_seconds=0.6,
+                 overlap_seconds=0.3, frame_ms=30, threshold_db=9.0, min_level_db=-55.0,
+                 min_speech_seconds=0.2, floor_rise_db=0.01):
+        self.frame=int(samplerate*frame_ms/1000)
+        fs=self.frame/float(samplerate)
+        self.min_frames=int(min_seconds/fs); self.max_frames=max(self.min_frames+1, int(max_seconds/fs))
+        self.pause_frames=max(1, int(pause_seconds/fs)); self.overlap_frames=int(overlap_seconds/fs)
+        self.min_speech_frames=max(1, int(min_speech_seconds/fs))
+        self.threshold_db=threshold_db; self.min_level_db=min_level_db; self.floor_rise_db=floor_rise_db
+        self.position=0          # position (échantillons de session) de la tête du tampon
+        self.silent_skipped=0    # chunks de silence non émis
+        self._floor=None         # plancher de bruit (dB)
+        self._levels=[]          # niveau (dB) des trames analysées depuis la tête
+        self._speech=[]          # trames classées parole
+        self._lost=0
+
+    def _analyze(self, x):
+        f=self.frame
+        frames=x[:(x.shape[0]//f)*f].reshape(-1, f)
+        levels=10.0*np.log10(np.mean(frames*frames, axis=1) + 1e-10)
+        for db in levels.tolist():
+            if self._floor is None or db < self._floor:
+                self._floor=max(db, -90.0)
+            else:
+                self._floor += self.floor_rise_db
+            self._levels.append(db)
+            self._speech.append(db > max(self._floor + self.threshold_db, self.min_level_db))
+
+    def _drop(self, ring, n):
+        ring.consume(n*self.frame); self.position += n*self.frame
+        del self._levels[:n]; del self._speech[:n]
+
+    def process(self, ring: RingBuffer):
+        """Retourne [(audio, position)] pour chaque chunk prêt (copies)."""
+        lost=ring.lost - self._lost
+        if lost:
+            # débordement : la tête a avancé sans nous
+            self._lost=ring.lost; self.position += lost
+            n=min(len(self._levels), -(-lost//self.frame))
+            del self._levels[:n]; del self._speech[:n]
+        analyzed=len(self._levels)*self.frame
+        if len(ring) - analyzed >= self.frame:
+            self._analyze(ring.peek(len(ring))[analyzed:])
+        out=[]
+        while True:
+            n=len(self._speech)
+            nspeech=sum(self._speech)
+            trailing=0
+            while trailing < n and not self._speech[n-1-trailing]:
+                trailing += 1
+            if nspeech < self.min_speech_frames:
+                if nspeech and n > self.overlap_frames and (n >= self.max_frames or trailing >= self.pause_frames):
+                    # bruit bref isolé (clic) suivi d'une pause : on l'ignore, le chunk repartira
+                    # de l'amorce plutôt que d'emporter tout le silence qui suit
+                    self.silent_skipped += 1
+                    self._drop(ring, n - self.overlap_frames)
+                elif not nspeech and n > self.overlap_frames:
+                    self._drop(ring, n - self.overlap_frames)   # silence : on garde l'amorce
+                return out
+            if n >= self.min_frames and trailing >= self.pause_frames:
+                cut=n - trailing + min(trailing, self.overlap_frames)   # fin de parole + petite traîne
+            elif n >= self.max_frames:
+                lo=max(self.min_frames, n - self.max_frames//4)
+                cut=lo + int(np.argmin(self._levels[lo:n])) + 1           # point le plus calme
+            else:
+                return out
+            out.append((ring.peek(cut*self.frame).copy(), self.position))
+            self._drop(ring, max(1, cut - self.overlap_frames))
+
+
+class ChunkArchiver:
+    """Écrit les chunks en WAV dans un thread dédié, hors du chemin critique.
+
+    File bornée : si le disque ne suit pas, les chunks en trop ne sont pas
+    archivés (compteur `dropped`) plutôt que de bloquer la capture.
+    """
+    def __init__(self, out_dir: Path, max_pending=32):
+        self.out_dir=Path(out_dir)
+        self.prefix=time.strftime('%Y%m%d-%H%M%S')
+        self.dropped=0
+        self._q=queue.Queue(maxsize=max_pending)
+        self._thread=threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def put(self, chunk: AudioChunk):
+        try:
+            self._q.put_nowait(chunk)
+        except queue.Full:
+            self.dropped += 1
+
+    def close(self, timeout=5):
+        self._q.put(None); self._thread.join(timeout=timeout)
+
+    def _run(self):
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        while True:
+            chunk=self._q.get()
+            if chunk is None:
+                return
+            try:
+                path=self.out_dir / f'chunk_{self.prefix}_{chunk.seq:05d}.wav'
+                sf.write(str(path), chunk.audio, chunk.samplerate)
+            except Exception as e:
+                log_exc(e)
+
+
+# --- archive de session --------------------------------------------------------
+# Toute la session mixée (16 kHz mono) dans un seul FLAC : sans perte (re-transcription
+# possible), environ deux fois moins de disque qu'un WAV 16 bits (davantage sur de la
+# parole avec silences), et un seul fichier ouvert en ajout au lieu d'un fichier par chunk. FLAC plutôt
+# qu'Opus : trames à taille fixe indépendantes, donc un décalage d'octet suffit pour
+# reprendre le décodage n'importe où. L'index (<fichier>.idx) associe position en
+# échantillons -> octet de début de trame : une ligne JSON d'en-tête, puis « échantillon octet ».
+INDEX_SUFFIX='.idx'
+
+def index_path(path) -> Path:
+    path=Path(path); return path.with_name(path.name + INDEX_SUFFIX)
+
+class SessionArchive:
+    """Écrit l'audio mixé d'une session en FLAC dans un thread dédié, avec son index.
+
+    File bornée : si le disque ne suit pas, les blocs en trop sont remplacés par du silence
+    (compteur `dropped_samples`) pour que les horodatages restent alignés sur la session.
+    Le silence voyage avec le bloc suivant admis dans la file (éléments (trou, bloc)) :
+    il est écrit à sa place dans l'ordre de la session, après les blocs déjà en attente.
+    """
+    def __init__(self, path: Path, samplerate=16000, index_step_s=1.0, max_pending=256):
+        self.path=Path(path); self.samplerate=samplerate
+        self.index_step=max(1, int(index_step_s*samplerate))
+        self.samples=0; self.dropped_samples=0
+        self._gap=0; self._lock=threading.Lock()   # _gap : échantillons jetés depuis le dernier bloc admis
+        self._q=queue.Queue(maxsize=max_pending)
+        self._thread=threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def duration(self):
+        return self.samples/self.samplerate
+
+    def write(self, x):
+        if not len(x): return
+        with self._lock:
+            try:
+                self._q.put_nowait((self._gap, np.asarray(x, dtype=np.float32))); self._gap=0
+            except queue.Full:
+                self._gap += len(x); self.dropped_samples += len(x)
+
+    def close(self, timeout=5):
+        with self._lock: gap, self._gap = self._gap, 0
+        self._q.put((gap, None)); self._thread.join(timeout=timeout)
+        return self.path
+
+    def _run(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            # objet fichier Python : sa position donne l'octet courant (trames complètes écrites)
+            with open(self.path, 'w+b') as raw, open(index_path(self.path), 'w', encoding='utf-8') as idx, \
+                 sf.SoundFile(raw, 'w', samplerate=self.samplerate, channels=1, format='FLAC', subtype='PCM_16') as f:
+                idx.write(json.dumps({'samplerate': self.samplerate, 'format': 'FLAC'}) + '\n')
+                last_pos=raw.tell(); last_entry=-self.index_step; block=None
+                while True:
+                    gap, x=self._q.get()
+                    if gap: f.write(np.zeros(gap, dtype=np.float32)); self.samples += gap
+                    if x is None: break
+                    f.write(np.clip(x, -1.0, 1.0)); self.samples += len(x)
+                    pos=raw.tell()
+                    if pos != last_pos and self.samples - last_entry >= self.index_step:
+                        # trames de taille fixe : `pos` est le début de la trame qui suit les
+                        # échantillons déjà encodés ; read_range relit le numéro exact dans l'en-tête
+                        block=block or _blocksize(raw)
+                        raw.flush()   # l'index ne doit jamais pointer au-delà des octets sur disque
+                        idx.write(f'{self.samples - self.samples % block} {pos}\n'); idx.flush()
+                        last_entry=self.samples
+                    last_pos=pos
+        except Exception as e:
+            log_exc(e)
+
+def _blocksize(raw):
+    # STREAMINFO (premier bloc de métadonnées) : taille de bloc min sur 2 octets à l'offset 8
+    pos=raw.tell(); raw.seek(8); b=raw.read(2); raw.seek(pos)
+    return int.from_bytes(b, 'big') or 4096
+
+def _flac_header(f):
+    """(octets d'en-tête jusqu'à la première trame, taille de bloc, nb total d'échantillons)."""
+    head=f.read(4)
+    if head != b'fLaC': raise ValueError('Pas un fichier FLAC')
+    blocks=[]
+    while True:
+        h=f.read(4); n=int.from_bytes(h[1:], 'big'); blocks.append(h + f.read(n))
+        if h[0] & 0x80: break
+    si=blocks[0]
+    total=((si[4+13] & 0x0F) << 32) | int.from_bytes(si[4+14:4+18], 'big')
+    return bytearray(head + b''.join(blocks)), int.from_bytes(si[4:6], 'big'), total
+
+def _frame_number(b):
+    # numéro de trame codé « à la UTF-8 » après les 4 premiers octets de l'en-tête de trame
+    c=b[4]; lead=0
+    while lead < 8 and c & (0x80 >> lead): lead += 1
+    v=c & (0x7F >> lead) if lead else c
+    for i in range(1, lead): v=(v << 6) | (b[4+i] & 0x3F)
+    return v
+
+def _read_index(path):
+    try:
+        with open(index_path(path), encoding='utf-8') as f:
+            meta=json.loads(f.readline())
+            return meta, [tuple(map(int, line.split())) for line in f if line.strip()]
+    except (OSError, ValueError):
+        return None, []
+
+def archive_duration(path):
+    """Durée (s) d'une archive de session, y compris non finalisée (jusqu'au dernier point d'index)."""
+    meta, entries=_read_index(path)
+    with open(path, 'rb') as f: _, _, total=_flac_header(f)
+    sr=(meta or {}).get('samplerate') or sf.info(str(path)).samplerate
+    return (total or (entries[-1][0] if entries else 0))/sr
+
+def read_range(path, t0, t1=None):
+    """Décode [t0, t1] s d'une archive de session (float32 mono) sans lire tout le fichier.
+
+    L'index donne l'octet de la trame qui précède t0 et de celle qui suit t1 ; on décode
+    l'en-tête + cette tranche. Sans index utilisable, repli sur un seek libsndfile.
+    """
+    meta, entries=_read_index(path)
+    try:
+        if not meta: raise ValueError('index absent')
+        sr=meta['samplerate']; s0=max(0, int(t0*sr)); s1=None if t1 is None else int(t1*sr)
+        with open(path, 'rb') as f:
+            header, block, total=_flac_header(f)
+            size=os.fstat(f.fileno()).st_size
+            entries=[(s, b) for s, b in entries if b + 16 <= size]
+            b0=len(header); b1=None
+            for s, b in entries:
+                if s <= s0: b0=b
+                elif s1 is not None and s >= s1 + block: b1=b; break
+            if b1 is None and not total and entries and entries[-1][1] > b0:
+                b1=entries[-1][1]   # session en cours (ou interrompue) : jusqu'au dernier point d'index
+            f.seek(b0); data=f.read(None if b1 is None else b1 - b0 + 16)
+        if len(data) < 16 or data[1] & 1: raise ValueError('trame FLAC inattendue')   # bit 0 : taille de bloc variable
+        start=_frame_number(data)*block
+        # fin exacte : numéro de la trame qui suit la tranche, sinon total du fichier
+        end=_frame_number(data[b1 - b0:])*block if b1 is not None else total
+        if b1 is not None: data=data[:b1 - b0]
+        n=max(0, end - start)
+        if not n: return np.zeros(0, dtype=np.float32)
+        # STREAMINFO : nombre d'échantillons de la tranche (36 bits), MD5 inconnu
+        k=8 + 13
+        header[k]=(header[k] & 0xF0) | ((n >> 32) & 0x0F); header[k+1:k+5]=(n & 0xFFFFFFFF).to_bytes(4, 'big')
+        header[k+5:k+21]=bytes(16)
+        # une seule lecture complète : soundfile repositionne après chaque lecture partielle,
+        # ce que libFLAC refuse sur une tranche qui ne commence pas à la trame 0
+        with sf.SoundFile(io.BytesIO(bytes(header) + data)) as g:
+            x=g.read(dtype='float32')
+        return x[s0 - start:None if s1 is None else s1 - start]
+    except Exception as e:
+        log_exc(e)
+    with sf.SoundFile(str(path)) as f:
+        sr=f.samplerate; s0=int(t0*sr); f.seek(min(s0, f.frames))
+        return f.read(-1 if t1 is None else max(0, int(t1*sr) - s0), dtype='float32')
+
 class LiveMixer:
     def __init__(self, samplerate=16000, channels=1, chunk_seconds=15,
-                 mic_device=None, sys_device=None, on_chunk: Optional[Callable[[Path],None]]=None,
-                 out_dir: Optional[Path]=None):
+                 mic_device=None, sys_device=None, on_chunk: Optional[Callable[[AudioChunk],None]]=None,
+                 archive_dir: Optional[Path]=None, session_path: Optional[Path]=None, max_pending_blocks=512,
+                 mic_gain=1.0, sys_gain=1.0, vad=False, min_chunk_seconds=4.0, pause_seconds=0.6,
+                 overlap_seconds=0.3, device_configs=None, on_device_config: Optional[Callable[[str,int,int],None]]=None):
         # samplerate = cible (on rééchantillonne si besoin)
         self.samplerate=samplerate
         self.channels=max(1, channels)   # 1 pour Whisper
         self.mic_device=mic_device
         self.sys_device=sys_device
         self.on_chunk=on_chunk
-        self.out_dir = out_dir or Path.cwd()
-        self.chunk_seconds=chunk_seconds
+        self.archive_dir = archive_dir   # None = pas d'archivage des chunks
+        self.session_path = session_path   # FLAC de toute la session (SessionArchive), None = pas d'archive
+        self.archive = None
+        self.chunk_seconds=chunk_seconds   # durée fixe, ou maximale si vad=True
+        self.vad=vad
+        self.min_chunk_seconds=min(min_chunk_seconds, chunk_seconds)
+        self.pause_seconds=pause_seconds
+        self.overlap_seconds=overlap_seconds
+        self.max_pending_blocks=max(1, int(max_pending_blocks))
+        self.mic_gain=mic_gain
+        self.sys_gain=sys_gain
+        # (samplerate, canaux) qui ont fonctionné par périphérique (clé device_key), essayés en premier ;
+        # on_device_config(clé, sr, canaux) est appelé quand une nouvelle combinaison est retenue
+        self.device_configs=dict(device_configs or {})
+        self.on_device_config=on_device_config
         self._stop=threading.Event()
+        self._data_evt=threading.Event()  # signalé par les callbacks sounddevice
         self._thread=None
+        self._ring=None
+        self._mixer=None
+        self._segmenter=None
+        # compteurs
+        self.dropped_blocks=0    # blocs jetés car la file du callback était pleine
+        self.input_overflows=0   # débordements signalés par le driver
+
+    @property
+    def overruns(self):
+        return self._ring.overruns if self._ring is not None else 0
+
+    def stats(self):
+        return {
+            'overruns': self.overruns,
+            'lost_samples': self._ring.lost if self._ring is not None else 0,
+            'dropped_blocks': self.dropped_blocks,
+            'input_overflows': self.input_overflows,
+            'buffered_samples': len(self._ring) if self._ring is not None else 0,
+            'drift_corrections': self._mixer.drift_corrections if self._mixer is not None else 0,
+            'gaps': sum(s.gaps for s in self._mixer.sources.values()) if self._mixer is not None else 0,
+            'silent_skipped': getattr(self._segmenter, 'silent_skipped', 0),
+            'archive_dropped': self.archive.dropped_samples if self.archive is not None else 0,
+        }
+
+    def source_at(self, t0, t1):
+        """Source dominante ('mic' / 'system') sur [t0, t1] (s de session), None si inconnue."""
+        return self._mixer.dominant_source(t0, t1) if self._mixer is not None else None
 
     @staticmethod
     def list_devices():
         return sd.query_devices()
 
+    @staticmethod
+    def device_key(info, loopback=False):
+        # le nom (et l'API hôte) survit aux changements d'index entre deux démarrages
+        return '{}|{}|{}'.format(info.get('name'), info.get('hostapi'), 'loopback' if loopback else 'input')
+
     def _open_input(self, device, loopback=False):
         """Ouvre un InputStream robuste: essaie plusieurs (samplerate, channels).
            Retourne (stream, queue, stream_samplerate, stream_channels) ou (None, None, None, None) si échec.
@@ -56,6 +701,13 @@ class LiveMixer:
         for sr in [default_sr, 48000, 44100, 32000, 16000]:
             if sr and sr not in sr_candidates:
                 sr_candidates.append(sr)
+        # combinaison mémorisée d'une session précédente : essayée seule en premier
+        key = self.device_key(info, loopback)
+        cached = self.device_configs.get(key)
+        combos = [tuple(cached)] if cached else []
+        for sr in sr_candidates:
+            for ch in chan_candidates:
+                if (sr, ch) not in combos: combos.append((sr, ch))
 
         # Param WASAPI loopback si dispo
         extra = None
@@ -65,51 +717,62 @@ class LiveMixer:
         except Exception:
             extra = None
 
-        q = deque()
+        # file bornée : si la boucle prend du retard on jette les blocs les plus anciens
+        q = deque(maxlen=self.max_pending_blocks)
         def cb(indata, frames, time_info, status):
             try:
+                if status and getattr(status, 'input_overflow', False):
+                    self.input_overflows += 1
                 arr = indata.copy()
                 # downmix en mono pour la suite
                 if arr.ndim == 1:
                     arr = arr[:, None]
                 if self.channels == 1 and arr.shape[1] > 1:
                     arr = _safe_mean(arr, axis=1)
-                q.append(arr.astype(np.float32, copy=False))
+                if len(q) == q.maxlen:
+                    self.dropped_blocks += 1
+                # bloc mono 1-D + instant d'arrivée (pour l'alignement des sources)
+                q.append((arr[:, 0].astype(np.float32, copy=False), time.monotonic()))
+                self._data_evt.set()
             except Exception as e:
                 log_exc(e)
 
-        for sr in sr_candidates:
-            for ch in chan_candidates:
-                if not isinstance(ch, int) or ch <= 0:
-                    continue
-                try:
-                    s = sd.InputStream(
-                        samplerate=sr,
-                        channels=ch,
-                        device=device,
-                        callback=cb,
-                        dtype='float32',
-                        blocksize=0,
-                        latency='low',
-                        extra_settings=extra
-                    )
-                    s.start()
-                    return s, q, sr, ch
-                except Exception as e:
-                    # on essaie la prochaine combinaison
-                    continue
+        for sr, ch in combos:
+            if not isinstance(ch, int) or ch <= 0:
+                continue
+            try:
+                s = sd.InputStream(
+                    samplerate=sr,
+                    channels=ch,
+                    device=device,
+                    callback=cb,
+                    dtype='float32',
+                    blocksize=0,
+                    latency='low',
+                    extra_settings=extra
+                )
+                s.start()
+            except Exception as e:
+                # on essaie la prochaine combinaison
+                continue
+            if cached is None or tuple(cached) != (sr, ch):
+                self.device_configs[key] = (sr, ch)
+                if self.on_device_config:
+                    try: self.on_device_config(key, sr, ch)
+                    except Exception as e: log_exc(e)
+            return s, q, sr, ch
 
         return None, None, None, None
 
     def start(self):
-        self._stop.clear()
+        self._stop.clear(); self._data_evt.clear()
         self._thread = threading.Thread(target=self._run, daemon=True)
         self._thread.start()
 
     def stop(self):
-        self._stop.set()
+        self._stop.set(); self._data_evt.set()
         if self._thread:
-            self._thread.join(timeout=2)
+            self._thread.join(timeout=2 if self.session_path is None else 10)   # laisse l'archive se finaliser
 
     def _run(self):
         mic_stream=sys_stream=None
@@ -117,6 +780,8 @@ class LiveMixer:
         mic_sr=mic_ch=None
         sys_sr=sys_ch=None
 
+        target_sr = self.samplerate or 16000
+        mixer = self._mixer = SourceMixer(target_sr)
         try:
             if self.mic_device is not None:
                 mic_stream, mic_q, mic_sr, mic_ch = self._open_input(self.mic_device, loopback=False)
@@ -129,68 +794,63 @@ class LiveMixer:
         if mic_stream is None and sys_stream is None:
             return
 
-        # on choisit un samplerate de référence (priorité système, sinon micro)
-        ref_sr = sys_sr or mic_sr or 16000
-        target_sr = self.samplerate or 16000
         chunk_samples = int(target_sr * self.chunk_seconds)
-        buf = np.zeros((0, 1), dtype=np.float32)  # on travaille déjà en mono pour la pile
-
-        def _resample_mono(x, sr_from, sr_to):
-            if sr_from == sr_to:
-                return x
-            # x est (N, 1)
-            N = x.shape[0]
-            if N == 0:
-                return x
-            M = int(round(N * (sr_to / sr_from)))
-            t_old = np.linspace(0.0, 1.0, N, endpoint=False)
-            t_new = np.linspace(0.0, 1.0, M, endpoint=False)
-            y = np.interp(t_new, t_old, x[:, 0]).astype(np.float32)
-            return y[:, None]
+        # capacité fixe : un chunk + 10 s de marge si le consommateur traîne
+        ring = self._ring = RingBuffer(chunk_samples + 10*target_sr)
+        if self.vad:
+            seg = VadSegmenter(target_sr, min_seconds=self.min_chunk_seconds, max_seconds=self.chunk_seconds,
+                               pause_seconds=self.pause_seconds, overlap_seconds=self.overlap_seconds)
+        else:
+            seg = FixedSegmenter(target_sr, self.chunk_seconds)
+        self._segmenter = seg
 
+        sources = []
+        if mic_q is not None:
+            mixer.add_source('mic', mic_sr, self.mic_gain); sources.append(('mic', mic_q))
+        if sys_q is not None:
+            mixer.add_source('system', sys_sr, self.sys_gain); sources.append(('system', sys_q))
+        archiver = ChunkArchiver(self.archive_dir) if self.archive_dir else None
+        archive = self.archive = SessionArchive(self.session_path, target_sr) if self.session_path else None
+        seq = 0
         try:
             while not self._stop.is_set():
-                time.sleep(0.03)
-                parts = []
+                # réveil dès qu'un callback a poussé un bloc (timeout de sécurité)
+                self._data_evt.wait(0.5)
+                self._data_evt.clear()
 
-                # on dépile quelques blocs si dispo (pour lisser)
-                for _ in range(3):
-                    try:
-                        if mic_q and mic_q:
-                            parts.append((mic_q.popleft(), mic_sr))
-                    except Exception:
-                        break
-                for _ in range(3):
-                    try:
-                        if sys_q and sys_q:
-                            parts.append((sys_q.popleft(), sys_sr))
-                    except Exception:
-                        break
-
-                # mix + resample vers target_sr
-                if parts:
-                    mono_chunks = []
-                    for arr, sr in parts:
-                        if arr is None or arr.size == 0:
-                            continue
-                        # arr est déjà mono (voir cb)
-                        if sr and sr != target_sr:
-                            arr = _resample_mono(arr, sr, target_sr)
-                        mono_chunks.append(arr)
-
-                    if mono_chunks:
-                        mix = np.vstack(mono_chunks)
-                        buf = np.vstack([buf, mix])
-
-                # dès qu'on atteint chunk_samples, on écrit
-                while buf.shape[0] >= chunk_samples:
-                    chunk = buf[:chunk_samples]
-                    buf = buf[chunk_samples:]
-                    path = self.out_dir / f'chunk_{int(time.time())}.wav'
+                # on vide tout ce qui est en attente, puis on mixe ce qui est aligné
+                for name, q in sources:
+                    while q:
+                        try:
+                            arr, arrival = q.popleft()
+                        except IndexError:
+                            break
+                        if arr.size:
+                            mixer.push(name, arr, arrival)
+                mixed = mixer.pull()
+                if archive:
+                    archive.write(mixed)
+                ring.write(mixed)
+                if telemetry.enabled:
+                    for name, q in sources: telemetry.gauge('capture.queue.'+name, len(q))
+                    telemetry.gauge('capture.ring_s', len(ring)/target_sr)
+                    telemetry.gauge('capture.dropped_blocks', self.dropped_blocks)
+                    telemetry.gauge('capture.input_overflows', self.input_overflows)
+                    telemetry.gauge('capture.lost_samples', ring.lost)
+                    if archive: telemetry.gauge('capture.archive_dropped', archive.dropped_samples)
+
+                # chunks prêts (durée fixe ou coupure VAD), livrés en mémoire
+                for audio, pos in seg.process(ring):
+                    chunk = AudioChunk(audio, target_sr, offset=pos/target_sr, seq=seq)
+                    seq += 1
+                    if telemetry.enabled:
+                        # fin du chunk sur l'horloge murale du mixer -> livraison
+                        telemetry.observe('capture_to_chunk_ms', (chunk.created - mixer.t0 - chunk.offset - chunk.duration)*1e3)
+                    if archiver:
+                        archiver.put(chunk)
                     try:
-                        sf.write(str(path), chunk, target_sr)
                         if self.on_chunk:
-                            self.on_chunk(path)
+                            self.on_chunk(chunk)
                     except Exception as e:
                         log_exc(e)
         except Exception as e:
@@ -201,3 +861,7 @@ class LiveMixer:
                 if sys_stream: sys_stream.stop(); sys_stream.close()
             except Exception as e:
                 log_exc(e)
+            if archiver:
+                archiver.close()
+            if archive:
+                archive.close()
@@ -0,0 +1,161 @@
+import json, os, threading, time
+from . import db
+from .models_manager import is_installed
+from .utils import log_exc
+
+# Calibration de l'hôte : pour chaque modèle installé, on mesure le facteur temps réel
+# (RTF = durée de décodage / durée audio) de chaque compute_type (par défaut sur la
+# répartition du moteur live : tous les cœurs x 1 worker, cf. engine_settings ; les
+# répartitions de thread_layouts() sur demande), puis de quelques durées de chunk, et on garde le meilleur
+# réglage dans la table settings (clé SETTING_KEY, JSON). numpy et faster-whisper ne sont
+# importés que pour mesurer : load() / settings_for() servent dès l'ouverture de la fenêtre.
+SETTING_KEY = 'autotune'
+COMPUTE_TYPES = ('int8', 'int8_float32', 'float32')
+CHUNK_SECONDS = (8, 15, 24)
+RTF_TARGET = 0.6          # marge : au-delà, le live prend du retard dès que la machine est sollicitée
+DEFAULT_CHUNK = {'small': 15, 'medium': 24}
+
+def thread_layouts(cores=None):
+    """Répartitions (cpu_threads, num_workers) à essayer pour `cores` cœurs."""
+    cores = max(1, cores or os.cpu_count() or 1)
+    out = [(cores, 1)]
+    if cores >= 4: out.append((cores // 2, 2))
+    if cores >= 8: out.append((cores // 4, 4))
+    return out
+
+def _synthetic(seconds, sr=16000):
+    import numpy as np
+    # voix harmonique modulée (pas de silence : le VAD est coupé pendant la mesure)
+    t = np.arange(int(seconds * sr)) / sr
+    phase = 2 * np.pi * np.cumsum(120 + 60 * np.sin(2 * np.pi * 0.3 * t)) / sr
+    x = sum(np.sin(k * phase) / k for k in range(1, 8)) * np.abs(np.sin(2 * np.pi * 2.5 * t)) ** 0.5
+    return (0.2 * x).astype(np.float32)
+
+def sample_audio(seconds=24.0):
+    """Extrait d'un enregistrement de la base s'il y en a un de lisible, sinon signal synthétique."""
+    import numpy as np
+    from . import whisper_transcribe as wt
+    try:
+        from faster_whisper import decode_audio
+        for path in sorted(db.list_audio_paths()):
+            try: x = decode_audio(path, sampling_rate=wt.SAMPLE_RATE)
+            except Exception: continue
+            n = int(seconds * wt.SAMPLE_RATE)
+            if x.shape[0] >= n:
+                k = (x.shape[0] - n) // 2
+                return x[k:k + n].astype(np.float32)
+    except Exception as e:
+        log_exc(e)
+    return _synthetic(seconds)
+
+def _measure(model, audio, workers):
+    """RTF effectif : `workers` décodages concurrents du même extrait (comme le pipeline live)."""
+    from .whisper_transcribe import SAMPLE_RATE
+    def one():
+        segs, _ = model.transcribe(audio, beam_size=1, vad_filter=False, language='fr')
+        list(segs)
+    threads = [threading.Thread(target=one) for _ in range(workers)]
+    t = time.perf_counter()
+    for th in threads: th.start()
+    for th in threads: th.join()
+    return (time.perf_counter() - t) / (workers * audio.shape[0] / SAMPLE_RATE)
+
+def calibrate(models_dir, sizes=('small', 'medium'), compute_types=COMPUTE_TYPES, audio=None,
+              progress=None, cancel=None, layouts=None):
+    """Mesure les réglages sur cet hôte ; retourne (et enregistre) {taille: réglage}.
+
+    `progress(texte)` est appelé à chaque mesure ; `cancel` (Event) interrompt proprement.
+    `layouts` : répartitions (cpu_threads, num_workers) essayées, par défaut celle du moteur.
+    """
+    import numpy as np
+    from . import whisper_transcribe as wt
+    audio = sample_audio(max(CHUNK_SECONDS)) if audio is None else np.asarray(audio, dtype=np.float32)
+    layouts = layouts or [(os.cpu_count() or 1, 1)]
+    result = {'host': {'cores': os.cpu_count(), 'when': time.strftime('%Y-%m-%d %H:%M')}, 'models': {}}
+    for size in sizes:
+        if not is_installed(wt.model_path(models_dir, size)): continue
+        best = None
+        for ct in compute_types:
+            for threads, workers in layouts:
+                if cancel is not None and cancel.is_set(): return None
+                progress and progress(f'{size} {ct} {threads} threads x {workers}…')
+                reg = wt.ModelRegistry(max_models=1)   # hors cache partagé : chaque réglage chargé à neuf
+                try:
+                    model = reg.get(models_dir, size, ct, threads, workers)
+                    _measure(model, audio[:wt.SAMPLE_RATE * 2], 1)   # chauffe
+                    rtf = _measure(model, audio[:int(15 * wt.SAMPLE_RATE)], workers)
+                except Exception as e:   # compute_type non supporté par le CPU, etc.
+                    log_exc(e); continue
+                finally:
+                    reg.clear()
+                if best is None or rtf < best['rtf']:
+                    best = {'compute_type': ct, 'cpu_threads': threads, 'num_workers': workers, 'rtf': rtf}
+        if best is None: continue
+        # durée de chunk : la plus courte qui tient la cible (latence), sinon la plus longue (débit)
+        reg = wt.ModelRegistry(max_models=1)
+        try:
+            model = reg.get(models_dir, size, best['compute_type'], best['cpu_threads'], best['num_workers'])
+            best['chunk_seconds'] = max(CHUNK_SECONDS)
+            for sec in sorted(CHUNK_SECONDS):
+                if cancel is not None and cancel.is_set(): return None
+                progress and progress(f'{size} chunk {sec}s…')
+                rtf = _measure(model, audio[:int(sec * wt.SAMPLE_RATE)], best['num_workers'])
+                best[f'rtf_{sec}s'] = rtf
+                if rtf <= RTF_TARGET: best['chunk_seconds'] = sec; break
+        finally:
+            reg.clear()
+        result['models'][size] = best
+    db.set_setting(SETTING_KEY, json.dumps(result))
+    return result
+
+def load():
+    """Dernière calibration enregistrée ({'host':…, 'models': {taille: réglage}}) ou None."""
+    raw = db.get_setting(SETTING_KEY)
+    try: return json.loads(raw) if raw else None
+    except ValueError: return None
+
+def settings_for(size, tuned=None):
+    """Réglage retenu pour `size` (valeurs par défaut du dépôt si pas de calibration)."""
+    tuned = tuned if tuned is not None else load()
+    s = {'compute_type': 'int8', 'cpu_threads': 0, 'num_workers': 1, 'chunk_seconds': DEFAULT_CHUNK.get(size, 15)}
+    s.update(((tuned or {}).get('models') or {}).get(size) or {})
+    return s
+
+def engine_settings(size, tuned=None):
+    """Arguments du Transcriber partagé par le moteur : un seul thread d'inférence (les lots
+    remplacent les workers), donc tous les cœurs pour un worker ; compute_type calibré."""
+    return {'compute_type': settings_for(size, tuned)['compute_type'], 'cpu_threads': os.cpu_count() or 1, 'num_workers': 1}
+
+class RtfGovernor:
+    """Bascule medium <-> small pendant une session selon le RTF mesuré (moyenne exponentielle).
+
+    Sur medium, au-delà de `high` on descend en small ; sur small, on remonte quand le RTF
+    estimé de medium (RTF small x `ratio`) repasse sous `low`. L'écart high/low et le
+    délai de `cooldown` chunks après chaque bascule évitent les allers-retours.
+    """
+    def __init__(self, size, high=0.9, low=0.6, alpha=0.3, cooldown=3, ratio=2.5):
+        self.size = size; self.high = high; self.low = low; self.alpha = alpha
+        self.cooldown = cooldown; self.ratio = ratio
+        self.ema = None; self._since = 0; self.switches = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_tuning(cls, size, tuned=None, **kw):
+        models = ((tuned if tuned is not None else load()) or {}).get('models') or {}
+        if 'small' in models and 'medium' in models and models['small']['rtf'] > 0:
+            kw.setdefault('ratio', models['medium']['rtf'] / models['small']['rtf'])
+        return cls(size, **kw)
+
+    def update(self, rtf):
+        """Ajoute la mesure d'un chunk ; retourne la taille à utiliser désormais."""
+        with self._lock:
+            self.ema = rtf if self.ema is None else self.alpha * rtf + (1 - self.alpha) * self.ema
+            self._since += 1
+            if self._since < self.cooldown: return self.size
+            if self.size == 'medium' and self.ema > self.high: new = 'small'
+            elif self.size == 'small' and self.ema * self.ratio < self.low: new = 'medium'
+            else: return self.size
+            # la mesure courante ne vaut plus pour l'autre modèle : on repart de l'estimation
+            self.ema = self.ema / self.ratio if new == 'small' else self.ema * self.ratio
+            self.size = new; self._since = 0; self.switches += 1
+            return new
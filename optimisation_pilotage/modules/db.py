@@ -1,35 +1,309 @@
-import sqlite3
+import bisect, sqlite3, threading, weakref
+from contextlib import contextmanager
 from .utils import DB_PATH
-def get_conn(): DB_PATH.parent.mkdir(parents=True, exist_ok=True); return sqlite3.connect(DB_PATH)
-def init_db():
-    con=get_conn(); cur=con.cursor()
+from . import telemetry
+
+# Une connexion persistante par thread (sqlite3 interdit le partage entre threads) :
+# plus de connect/close à chaque appel, et le cache de requêtes préparées de sqlite3
+# (cached_statements) sert enfin. WAL : les lectures de l'UI ne bloquent plus les
+# écritures du pipeline live, et inversement. check_same_thread=False : chaque connexion
+# reste utilisée par son seul thread, mais close_all() (thread principal) doit pouvoir la
+# fermer ; celle d'un thread terminé est fermée avec son thread-local (_Owner).
+_local=threading.local()
+_all_conns=[]; _all_lock=threading.Lock(); _generation=0
+
+def _connect(path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con=sqlite3.connect(path, timeout=10, isolation_level=None, cached_statements=256, check_same_thread=False)
+    con.execute('PRAGMA journal_mode=WAL')
+    con.execute('PRAGMA synchronous=NORMAL')    # durable au checkpoint, suffisant en WAL
+    con.execute('PRAGMA cache_size=-16000')     # ~16 Mo
+    con.execute('PRAGMA temp_store=MEMORY')
+    with _all_lock: _all_conns.append(con)
+    return con
+
+class _Owner:
+    __slots__=('__weakref__',)
+
+def get_conn():
+    """Connexion du thread courant (autocommit ; regrouper les écritures avec `transaction()`)."""
+    con=getattr(_local,'con',None)
+    if con is None or _local.path!=DB_PATH or _local.gen!=_generation:
+        if con is not None: _close(con)
+        con=_local.con=_connect(DB_PATH); _local.path=DB_PATH; _local.gen=_generation; _local.depth=0
+        _local.owner=_Owner(); weakref.finalize(_local.owner, _close, con)   # fin du thread -> fermeture
+    return con
+
+def _close(con):
+    with _all_lock:
+        if con in _all_conns: _all_conns.remove(con)
+    try: con.close()
+    except Exception: pass
+
+def close_all():
+    """Ferme toutes les connexions (fin d'application, changement de base)."""
+    global _generation
+    with _all_lock: conns=list(_all_conns); _all_conns.clear(); _generation+=1
+    for con in conns:
+        try: con.close()
+        except Exception: pass
+
+@contextmanager
+def transaction():
+    """Transaction (BEGIN IMMEDIATE) ; les appels imbriqués rejoignent la transaction englobante."""
+    con=get_conn(); depth=_local.depth
+    if depth==0: con.execute('BEGIN IMMEDIATE')
+    _local.depth=depth+1
+    try:
+        yield con
+    except BaseException:
+        _local.depth=depth
+        if depth==0: con.execute('ROLLBACK')
+        raise
+    _local.depth=depth
+    if depth==0: con.execute('COMMIT')
+
+# Migrations : index i = passage de la version i à i+1 (PRAGMA user_version).
+def _migrate_v1(cur):
     cur.execute("CREATE TABLE IF NOT EXISTS meetings (id INTEGER PRIMARY KEY AUTOINCREMENT, date TEXT NOT NULL);")
     cur.execute("CREATE TABLE IF NOT EXISTS todos (id INTEGER PRIMARY KEY AUTOINCREMENT);")
     cur.execute("CREATE TABLE IF NOT EXISTS settings (key TEXT PRIMARY KEY, value TEXT);")
-    con.commit()
-    # Ensure required columns exist
+    # Ensure required columns exist (bases créées avant le versionnage)
     def ensure_cols(table, cols):
         cur.execute(f'PRAGMA table_info({table})'); existing=[r[1] for r in cur.fetchall()]
         for col,typ in cols:
             if col not in existing: cur.execute(f'ALTER TABLE {table} ADD COLUMN {col} {typ}')
     ensure_cols('meetings', [('thematique','TEXT'),('projet','TEXT'),('participants','TEXT'),('title','TEXT'),('content','TEXT'),('audio_path','TEXT')])
     ensure_cols('todos', [('meeting_id','INTEGER'),('thematique','TEXT'),('projet','TEXT'),('action','TEXT'),('acteur','TEXT'),('echeance','TEXT'),('status','TEXT')])
-    con.commit(); con.close()
+def _migrate_v2(cur):
+    # index B-tree : tri de la liste des CR, jointure des actions
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_meetings_date_id ON meetings(date DESC, id DESC)')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_todos_meeting ON todos(meeting_id)')
+    # plein texte (FTS5, contenu externe = table meetings) tenu à jour par triggers
+    cur.execute("CREATE VIRTUAL TABLE IF NOT EXISTS meetings_fts USING fts5(title, participants, content, content='meetings', content_rowid='id', tokenize='unicode61 remove_diacritics 2')")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS meetings_fts_ai AFTER INSERT ON meetings BEGIN
+        INSERT INTO meetings_fts(rowid,title,participants,content) VALUES (new.id,new.title,new.participants,new.content); END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS meetings_fts_ad AFTER DELETE ON meetings BEGIN
+        INSERT INTO meetings_fts(meetings_fts,rowid,title,participants,content) VALUES ('delete',old.id,old.title,old.participants,old.content); END""")
+    cur.execute("""CREATE TRIGGER IF NOT EXISTS meetings_fts_au AFTER UPDATE OF title,participants,content ON meetings BEGIN
+        INSERT INTO meetings_fts(meetings_fts,rowid,title,participants,content) VALUES ('delete',old.id,old.title,old.participants,old.content);
+        INSERT INTO meetings_fts(rowid,title,participants,content) VALUES (new.id,new.title,new.participants,new.content); END""")
+    cur.execute("INSERT INTO meetings_fts(meetings_fts) VALUES ('rebuild')")   # indexe l'existant
+def _migrate_v3(cur):
+    # transcription segmentée : bornes en secondes depuis le début de la réunion
+    cur.execute('''CREATE TABLE IF NOT EXISTS segments (id INTEGER PRIMARY KEY, meeting_id INTEGER NOT NULL,
+        start REAL NOT NULL, end REAL NOT NULL, source TEXT, text TEXT NOT NULL, confidence REAL)''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_segments_meeting ON segments(meeting_id, start)')
+def _migrate_v4(cur):
+    # re-transcriptions en tâche de fond (modules/jobs.py) : une ligne par job, segments
+    # produits pas à pas dans job_segments (reprise après arrêt), recopiés à la fin
+    cur.execute('''CREATE TABLE IF NOT EXISTS jobs (id INTEGER PRIMARY KEY, meeting_id INTEGER NOT NULL, model TEXT NOT NULL,
+        status TEXT NOT NULL DEFAULT 'pending', done_s REAL NOT NULL DEFAULT 0, total_s REAL, error TEXT,
+        created TEXT NOT NULL DEFAULT (datetime('now','localtime')), updated TEXT)''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status, id)')
+    cur.execute('''CREATE TABLE IF NOT EXISTS job_segments (job_id INTEGER NOT NULL, start REAL NOT NULL, end REAL NOT NULL,
+        text TEXT NOT NULL, confidence REAL)''')
+    cur.execute('CREATE INDEX IF NOT EXISTS idx_job_segments_job ON job_segments(job_id, start)')
+def _migrate_v5(cur):
+    # les filtres thématique/projet cherchent une sous-chaîne ('%v%') : ces index NOCASE
+    # (créés par d'anciennes versions de _migrate_v2) ne servaient jamais et alourdissaient les écritures
+    cur.execute('DROP INDEX IF EXISTS idx_meetings_thematique')
+    cur.execute('DROP INDEX IF EXISTS idx_meetings_projet')
+MIGRATIONS=[_migrate_v1, _migrate_v2, _migrate_v3, _migrate_v4, _migrate_v5]
+
+@telemetry.timed_fn('db.init_db')
+def init_db():
+    con=get_conn(); version=con.execute('PRAGMA user_version').fetchone()[0]
+    if version>=len(MIGRATIONS): return
+    with transaction() as con:
+        cur=con.cursor()
+        for migrate in MIGRATIONS[version:]: migrate(cur)
+        cur.execute(f'PRAGMA user_version={len(MIGRATIONS)}')
+@telemetry.timed_fn('db.add_meeting')
 def add_meeting(date, thematique, projet, title, participants, content, audio_path):
-    con=get_conn(); cur=con.cursor()
-    cur.execute('INSERT INTO meetings(date,thematique,projet,title,participants,content,audio_path) VALUES (?,?,?,?,?,?,?)',(date,thematique,projet,title,participants,content,audio_path)); con.commit(); mid=cur.lastrowid; con.close(); return mid
+    cur=get_conn().execute('INSERT INTO meetings(date,thematique,projet,title,participants,content,audio_path) VALUES (?,?,?,?,?,?,?)',(date,thematique,projet,title,participants,content,audio_path)); return cur.lastrowid
+@telemetry.timed_fn('db.update_meeting')
 def update_meeting(mid, **kwargs):
     if not kwargs: return
-    con=get_conn(); cur=con.cursor(); q=','.join([f'{k}=?' for k in kwargs]); cur.execute(f'UPDATE meetings SET {q} WHERE id=?', (*kwargs.values(),mid)); con.commit(); con.close()
+    q=','.join([f'{k}=?' for k in kwargs]); get_conn().execute(f'UPDATE meetings SET {q} WHERE id=?', (*kwargs.values(),mid))
+@telemetry.timed_fn('db.get_meeting')
 def get_meeting(mid):
-    con=get_conn(); cur=con.cursor(); cur.execute('SELECT id,date,thematique,projet,title,participants,content FROM meetings WHERE id=?',(mid,)); row=cur.fetchone(); con.close(); return row
+    return get_conn().execute('SELECT id,date,thematique,projet,title,participants,content FROM meetings WHERE id=?',(mid,)).fetchone()
+def get_meeting_audio(mid):
+    row=get_conn().execute('SELECT audio_path FROM meetings WHERE id=?',(mid,)).fetchone()
+    return row[0] if row else None
+_DATE_OPS={'date_from': '>=', 'date_to': '<='}   # bornes incluses, dates ISO (AAAA-MM-JJ)
+def _filter_sql(filters, alias=''):
+    # sous-chaîne insensible à la casse ('%v%' : parcours de table, aucun index possible) ; % _ et \ saisis sont pris littéralement (Mon_projet)
+    conds=[]; params=[]
+    for k,v in (filters or {}).items():
+        if not v: continue
+        if k in _DATE_OPS: conds.append(f'{alias}date{_DATE_OPS[k]}?'); params.append(v)
+        else:
+            conds.append(f"{alias}{k} LIKE ? ESCAPE '\\'")
+            params.append('%'+v.replace('\\','\\\\').replace('%','\\%').replace('_','\\_')+'%')
+    return (' WHERE ' + ' AND '.join(conds) if conds else ''), params
+@telemetry.timed_fn('db.list_meetings')
 def list_meetings(filters=None):
-    con=get_conn(); cur=con.cursor(); q='SELECT id,date,thematique,projet,title,participants,content FROM meetings'; params=[]
-    if filters: 
-        clauses=[f'{k} LIKE ?' for k in filters]; params=[f'%{v}%' for v in filters.values()]; 
-        if clauses: q += ' WHERE ' + ' AND '.join(clauses)
-    q += ' ORDER BY date DESC, id DESC'; cur.execute(q, params); rows=cur.fetchall(); con.close(); return rows
+    where,params=_filter_sql(filters)
+    q='SELECT id,date,thematique,projet,title,participants,content FROM meetings'+where+' ORDER BY date DESC, id DESC'; return get_conn().execute(q, params).fetchall()
+# Pagination par clé (keyset) : colonnes de liste seulement (pas de `content`), page suivante
+# = lignes strictement après la clé (date, id) de la dernière ligne affichée ; `until` relit
+# toute la fenêtre déjà chargée (rafraîchissement incrémental). Servi par idx_meetings_date_id.
+@telemetry.timed_fn('db.page_meetings')
+def page_meetings(filters=None, after=None, limit=200, until=None):
+    where,params=_filter_sql(filters); conds=[where[7:]] if where else []
+    if after: conds.append('(date,id)<(?,?)'); params+=list(after)
+    if until: conds.append('(date,id)>=(?,?)'); params+=list(until)
+    q='SELECT id,date,thematique,projet,title,participants FROM meetings'+(' WHERE '+' AND '.join(conds) if conds else '')+' ORDER BY date DESC, id DESC'
+    if limit: q+=' LIMIT ?'; params.append(limit)
+    return get_conn().execute(q, params).fetchall()
+@telemetry.timed_fn('db.page_todos')
+def page_todos(after=None, limit=200, until=None):
+    conds=[]; params=[]
+    if after: conds.append('id<?'); params.append(after[0])
+    if until: conds.append('id>=?'); params.append(until[0])
+    q='SELECT id,meeting_id,thematique,projet,action,acteur,echeance,status FROM todos'+(' WHERE '+' AND '.join(conds) if conds else '')+' ORDER BY id DESC'
+    if limit: q+=' LIMIT ?'; params.append(limit)
+    return get_conn().execute(q, params).fetchall()
+HIT_START, HIT_END = '\x02', '\x03'   # balises des termes trouvés dans les extraits
+def _fts_query(text):
+    # chaque mot devient une chaîne FTS (pas d'injection de syntaxe) ; le dernier en préfixe
+    words=[w.replace('"','""') for w in text.split()]
+    return ' '.join(f'"{w}"' for w in words[:-1]) + (f' "{words[-1]}"*' if words else '')
+@telemetry.timed_fn('db.search_meetings')
+def search_meetings(text, limit=50):
+    """Recherche plein texte (titre, participants, transcription), classée par pertinence (bm25).
+    Retourne (id, date, thematique, projet, title, extrait) ; les termes trouvés sont entre HIT_START/HIT_END."""
+    q=_fts_query(text)
+    if not q.strip(): return []
+    return get_conn().execute(f"""SELECT m.id,m.date,m.thematique,m.projet,m.title,snippet(meetings_fts,-1,'{HIT_START}','{HIT_END}','…',16)
+        FROM meetings_fts JOIN meetings m ON m.id=meetings_fts.rowid WHERE meetings_fts MATCH ?
+        ORDER BY bm25(meetings_fts,5.0,2.0,1.0) LIMIT ?""", (q, limit)).fetchall()
+@telemetry.timed_fn('db.add_todo')
 def add_todo(meeting_id, thematique, projet, action, acteur, echeance, status='A faire'):
-    con=get_conn(); cur=con.cursor(); cur.execute('INSERT INTO todos(meeting_id,thematique,projet,action,acteur,echeance,status) VALUES (?,?,?,?,?,?,?)',(meeting_id,thematique,projet,action,acteur,echeance,status)); con.commit(); con.close()
+    get_conn().execute('INSERT INTO todos(meeting_id,thematique,projet,action,acteur,echeance,status) VALUES (?,?,?,?,?,?,?)',(meeting_id,thematique,projet,action,acteur,echeance,status))
+@telemetry.timed_fn('db.add_todos')
+def add_todos(rows):
+    """Insertion groupée : rows = [(meeting_id, thematique, projet, action, acteur, echeance[, status])]."""
+    rows=[tuple(r) if len(r)==7 else (*r,'A faire') for r in rows]
+    with transaction() as con:
+        con.executemany('INSERT INTO todos(meeting_id,thematique,projet,action,acteur,echeance,status) VALUES (?,?,?,?,?,?,?)', rows)
+@telemetry.timed_fn('db.list_todos')
 def list_todos():
-    con=get_conn(); cur=con.cursor(); cur.execute('SELECT id,meeting_id,thematique,projet,action,acteur,echeance,status FROM todos ORDER BY id DESC'); rows=cur.fetchall(); con.close(); return rows
+    return get_conn().execute('SELECT id,meeting_id,thematique,projet,action,acteur,echeance,status FROM todos ORDER BY id DESC').fetchall()
+# Export en flux : curseurs lus par lots (fetchmany), rien n'est matérialisé en entier.
+# Les filtres (thematique, projet, date_from, date_to) portent sur la réunion ; pour les
+# actions, date et filtres viennent de la réunion liée (jointure SQL).
+def _iter(q, params, batch):
+    cur=get_conn().execute(q, params)
+    while True:
+        rows=cur.fetchmany(batch)
+        if not rows: return
+        yield rows
+def _todos_from(filters):
+    where,params=_filter_sql(filters, 'm.')
+    return ' FROM todos t LEFT JOIN meetings m ON m.id=t.meeting_id'+where, params
+def iter_meetings(filters=None, batch=500):
+    """Lots de (id, date, thematique, projet, title, participants, content)."""
+    where,params=_filter_sql(filters)
+    return _iter('SELECT id,date,thematique,projet,title,participants,content FROM meetings'+where+' ORDER BY date DESC, id DESC', params, batch)
+def iter_todos(filters=None, batch=500):
+    """Lots de (id, meeting_id, thematique, projet, action, acteur, echeance, status)."""
+    frm,params=_todos_from(filters)
+    return _iter('SELECT t.id,t.meeting_id,t.thematique,t.projet,t.action,t.acteur,t.echeance,t.status'+frm+' ORDER BY t.id DESC', params, batch)
+def iter_todos_global(filters=None, batch=500):
+    """Lots de (date réunion, thematique, projet, action, acteur, echeance, status, meeting_id)."""
+    frm,params=_todos_from(filters)
+    return _iter('SELECT m.date,t.thematique,t.projet,t.action,t.acteur,t.echeance,t.status,t.meeting_id'+frm+' ORDER BY t.id DESC', params, batch)
+@telemetry.timed_fn('db.count_export')
+def count_export(filters=None):
+    """(nb réunions, nb actions) correspondant aux filtres, pour la progression."""
+    where,params=_filter_sql(filters); frm,tparams=_todos_from(filters); con=get_conn()
+    return con.execute('SELECT count(*) FROM meetings'+where, params).fetchone()[0], con.execute('SELECT count(*)'+frm, tparams).fetchone()[0]
+@telemetry.timed_fn('db.add_segments')
+def add_segments(meeting_id, segments):
+    """Insertion groupée de Segment (start, end, source, text, confidence) d'une réunion."""
+    with transaction() as con:
+        con.executemany('INSERT INTO segments(meeting_id,start,end,source,text,confidence) VALUES (?,?,?,?,?,?)',
+                        ((meeting_id, s.start, s.end, s.source, s.text, s.confidence) for s in segments))
+@telemetry.timed_fn('db.list_segments')
+def list_segments(meeting_id, t0=None, t1=None):
+    """(start, end, source, text, confidence) d'une réunion, éventuellement limités à [t0, t1] s."""
+    q='SELECT start,end,source,text,confidence FROM segments WHERE meeting_id=?'; params=[meeting_id]
+    if t1 is not None: q+=' AND start<?'; params.append(t1)
+    if t0 is not None: q+=' AND end>?'; params.append(t0)
+    return get_conn().execute(q+' ORDER BY start', params).fetchall()
+def get_setting(key, default=None):
+    row=get_conn().execute('SELECT value FROM settings WHERE key=?', (key,)).fetchone()
+    return row[0] if row else default
+def set_setting(key, value):
+    get_conn().execute('INSERT INTO settings(key,value) VALUES (?,?) ON CONFLICT(key) DO UPDATE SET value=excluded.value', (key, value))
+# Jobs : pending -> running -> done | error | cancelled. Un job 'running' à l'ouverture est
+# un job interrompu (arrêt, pause, plantage) : il repart de done_s.
+JOB_ACTIVE=('pending','running')
+@telemetry.timed_fn('db.add_job')
+def add_job(meeting_id, model):
+    """Met en file une re-transcription ; réutilise le job actif de la même réunion s'il existe."""
+    with transaction() as con:
+        row=con.execute("SELECT id FROM jobs WHERE meeting_id=? AND status IN ('pending','running')", (meeting_id,)).fetchone()
+        if row:
+            con.execute("UPDATE jobs SET model=?, updated=datetime('now','localtime') WHERE id=? AND status='pending'", (model, row[0]))
+            return row[0]
+        return con.execute('INSERT INTO jobs(meeting_id,model) VALUES (?,?)', (meeting_id, model)).lastrowid
+def next_job():
+    """(id, meeting_id, model, done_s, audio_path) du prochain job (interrompus d'abord), ou None."""
+    return get_conn().execute("""SELECT j.id,j.meeting_id,j.model,j.done_s,m.audio_path FROM jobs j LEFT JOIN meetings m ON m.id=j.meeting_id
+        WHERE j.status IN ('pending','running') ORDER BY j.status='running' DESC, j.id LIMIT 1""").fetchone()
+def list_jobs(limit=50):
+    """(id, meeting_id, titre, model, status, done_s, total_s, error, updated), plus récents d'abord."""
+    return get_conn().execute('''SELECT j.id,j.meeting_id,m.title,j.model,j.status,j.done_s,j.total_s,j.error,j.updated
+        FROM jobs j LEFT JOIN meetings m ON m.id=j.meeting_id ORDER BY j.id DESC LIMIT ?''', (limit,)).fetchall()
+def count_jobs():
+    return get_conn().execute("SELECT count(*) FROM jobs WHERE status IN ('pending','running')").fetchone()[0]
+def job_status(job_id):
+    row=get_conn().execute('SELECT status FROM jobs WHERE id=?', (job_id,)).fetchone()
+    return row[0] if row else None
+def start_job(job_id, total_s):
+    """Passe le job en cours ; False s'il a été annulé entre-temps."""
+    return get_conn().execute("""UPDATE jobs SET status='running', total_s=?, error=NULL, updated=datetime('now','localtime')
+        WHERE id=? AND status IN ('pending','running')""", (total_s, job_id)).rowcount > 0
+def update_job(job_id, **kwargs):
+    q=','.join([f'{k}=?' for k in kwargs])
+    get_conn().execute(f"UPDATE jobs SET {q}, updated=datetime('now','localtime') WHERE id=?", (*kwargs.values(), job_id))
+def cancel_job(job_id):
+    with transaction() as con:
+        con.execute("UPDATE jobs SET status='cancelled', updated=datetime('now','localtime') WHERE id=? AND status IN ('pending','running')", (job_id,))
+        con.execute('DELETE FROM job_segments WHERE job_id=?', (job_id,))
+@telemetry.timed_fn('db.add_job_step')
+def add_job_step(job_id, segments, done_s):
+    """Un pas de job : ses segments et la nouvelle position, dans la même transaction."""
+    with transaction() as con:
+        if job_status(job_id)!='running': return False   # annulé pendant le pas
+        con.executemany('INSERT INTO job_segments(job_id,start,end,text,confidence) VALUES (?,?,?,?,?)',
+                        ((job_id, s.start, s.end, s.text, s.confidence) for s in segments))
+        con.execute("UPDATE jobs SET done_s=?, updated=datetime('now','localtime') WHERE id=?", (done_s, job_id))
+    return True
+@telemetry.timed_fn('db.finish_job')
+def finish_job(job_id):
+    """Remplace d'un bloc la transcription de la réunion (content + segments) par celle du job."""
+    with transaction() as con:
+        st,mid=con.execute('SELECT status,meeting_id FROM jobs WHERE id=?', (job_id,)).fetchone()
+        if st!='running': return False   # annulé entre-temps
+        segs=con.execute('SELECT start,end,text,confidence FROM job_segments WHERE job_id=? ORDER BY start', (job_id,)).fetchall()
+        # source (micro / système) : reprise du segment live qui recouvre le plus le nouveau
+        old=con.execute('SELECT start,end,source FROM segments WHERE meeting_id=? AND source IS NOT NULL ORDER BY start', (mid,)).fetchall()
+        starts=[o[0] for o in old]
+        def source(a, b):
+            near=old[max(0, bisect.bisect_right(starts, a) - 1):bisect.bisect_left(starts, b)]
+            best=max(near, key=lambda o: min(b, o[1]) - max(a, o[0]), default=None)
+            return best[2] if best and min(b, best[1]) > max(a, best[0]) else None
+        con.execute('DELETE FROM segments WHERE meeting_id=?', (mid,))
+        con.executemany('INSERT INTO segments(meeting_id,start,end,source,text,confidence) VALUES (?,?,?,?,?,?)',
+                        ((mid, a, b, source(a, b), t, c) for a, b, t, c in segs))
+        con.execute('UPDATE meetings SET content=? WHERE id=?', (' '.join(t for _, _, t, _ in segs), mid))
+        con.execute("UPDATE jobs SET status='done', updated=datetime('now','localtime') WHERE id=?", (job_id,))
+        con.execute('DELETE FROM job_segments WHERE job_id=?', (job_id,))
+    return True
+def list_audio_paths():
+    return {r[0] for r in get_conn().execute("SELECT audio_path FROM meetings WHERE audio_path IS NOT NULL AND audio_path<>''")}
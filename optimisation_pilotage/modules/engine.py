@@ -0,0 +1,320 @@
+import threading, time
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Optional, Callable
+import numpy as np
+from . import autotune, db, pipeline, telemetry, utils, whisper_transcribe as wt
+from .audio_mix import AudioChunk
+from .models_manager import is_installed
+from .transcript import SegmentStore
+from .utils import log_exc
+
+# Moteur de capture sans interface : autant de sessions (une par salle) que voulu, chacune
+# avec sa source audio (LiveMixer, FileSource) et son TranscriptionStage (file bornée,
+# politique de surcharge, résultats dans l'ordre). Toutes les transcriptions passent par un
+# seul InferenceWorker : un modèle chargé par taille pour tout le processus, et les chunks
+# en attente des différentes sessions décodés ensemble (Transcriber.transcribe_batch), pris
+# à tour de rôle pour qu'une salle chargée n'affame pas les autres.
+STREAM_STEP = 1.5   # pas (s) des sources en mode streaming
+
+class _Request:
+    __slots__ = ('key', 'tr', 'kind', 'args', 'result', 'error', 'done')
+    def __init__(self, key, tr, kind, args):
+        self.key = key; self.tr = tr; self.kind = kind; self.args = args
+        self.result = None; self.error = None; self.done = threading.Event()
+
+class InferenceWorker:
+    """Thread d'inférence unique, partagé par toutes les sessions.
+
+    `call` est bloquant (appelé par les workers des TranscriptionStage) ; les demandes
+    attendent dans une file par session. À chaque lot, le worker prend une demande par
+    session à tour de rôle, jusqu'à `batch_size` : les demandes 'segments' qui visent le même
+    Transcriber sont décodées en un seul passage, les demandes 'words' (streaming, prompt
+    propre à la session) une par une.
+    """
+    def __init__(self, batch_size=8):
+        self.batch_size = max(1, int(batch_size))
+        self.batches = 0; self.requests = 0
+        self._queues = OrderedDict()   # clé de session -> deque de _Request (ordre = tour de rôle)
+        self._closing = False
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True, name='inference'); self._thread.start()
+
+    def call(self, key, tr, kind, *args):
+        req = _Request(key, tr, kind, args)
+        with self._cond:
+            if self._closing: raise RuntimeError("Moteur de transcription arrêté.")
+            self._queues.setdefault(key, deque()).append(req); self._cond.notify()
+        req.done.wait()
+        if req.error is not None: raise req.error
+        return req.result
+
+    def forget(self, key):
+        with self._cond:
+            q = self._queues.get(key)
+            if q is not None and not q: del self._queues[key]
+
+    def depth(self):
+        with self._cond:
+            return sum(len(q) for q in self._queues.values())
+
+    def _take(self):
+        batch = []
+        while len(batch) < self.batch_size:
+            ready = [k for k, q in self._queues.items() if q]
+            if not ready: break
+            for key in ready[:self.batch_size - len(batch)]:
+                batch.append(self._queues[key].popleft())
+                self._queues.move_to_end(key)   # la session servie repasse en fin de tour
+        return batch
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closing and not any(self._queues.values()):
+                    self._cond.wait()
+                batch = self._take()
+                if not batch: return
+            self._execute(batch)
+
+    def _execute(self, batch):
+        groups = OrderedDict()   # Transcriber -> demandes 'segments' décodables ensemble
+        for req in batch:
+            if req.kind == 'segments':
+                audio, samplerate, offset = req.args
+                if samplerate != wt.SAMPLE_RATE:
+                    req.error = ValueError(f'Audio attendu à {wt.SAMPLE_RATE} Hz (reçu {samplerate} Hz).'); continue
+                groups.setdefault(id(req.tr), []).append(req)
+            else:
+                try: req.result = req.tr.transcribe_words(*req.args)
+                except Exception as e: req.error = e
+        for reqs in groups.values():
+            try:
+                out = reqs[0].tr.transcribe_batch([(r.args[0], r.args[2]) for r in reqs], self.batch_size)
+                for r, segs in zip(reqs, out): r.result = segs
+            except Exception as e:
+                for r in reqs: r.error = e
+        self.batches += 1; self.requests += len(batch)
+        if telemetry.enabled:
+            telemetry.observe('engine.batch', len(batch)); telemetry.gauge('engine.depth', self.depth())
+        for req in batch: req.done.set()
+
+    def close(self, timeout=10.0):
+        """Termine les demandes en attente puis arrête le thread."""
+        with self._cond:
+            self._closing = True; self._cond.notify_all()
+        self._thread.join(timeout)
+
+class SharedTranscriber:
+    """Transcriber vu d'une session : mêmes méthodes, exécutées par l'InferenceWorker."""
+    def __init__(self, worker: InferenceWorker, key, transcriber):
+        self.worker = worker; self.key = key; self.transcriber = transcriber; self.size = transcriber.size
+
+    def transcribe_segments(self, audio, samplerate=wt.SAMPLE_RATE, offset=0.0):
+        return self.worker.call(self.key, self.transcriber, 'segments', audio, samplerate, offset)
+
+    def transcribe_words(self, audio, prompt=None):
+        return self.worker.call(self.key, self.transcriber, 'words', audio, prompt)
+
+class FileSource:
+    """Source rejouée : fichier audio (tout format lu par faster-whisper) ou signal 16 kHz en
+    mémoire, découpé en chunks de `chunk_seconds`. Même interface que LiveMixer pour le moteur.
+
+    `speed` = 1.0 rejoue en temps réel, 0 aussi vite que possible (tests, mesures).
+    """
+    def __init__(self, audio, chunk_seconds=15, speed=0.0, on_chunk: Optional[Callable[[AudioChunk], None]]=None):
+        self.audio = audio; self.samplerate = wt.SAMPLE_RATE
+        self.chunk_seconds = chunk_seconds; self.speed = speed; self.on_chunk = on_chunk
+        self.chunks = 0
+        self.finished = threading.Event()   # dernier chunk livré (ou arrêt)
+        self._stop = threading.Event(); self._thread = None
+
+    def _load(self):
+        if isinstance(self.audio, (str, Path)):
+            from faster_whisper import decode_audio
+            return decode_audio(str(self.audio), sampling_rate=self.samplerate)
+        return np.asarray(self.audio, dtype=np.float32).reshape(-1)
+
+    def start(self):
+        self._stop.clear(); self.finished.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True); self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread: self._thread.join(timeout=2)
+
+    def wait(self, timeout=None):
+        return self.finished.wait(timeout)
+
+    def source_at(self, t0, t1):
+        return None   # signal déjà mixé : source inconnue
+
+    def stats(self):
+        return {'chunks': self.chunks}
+
+    def _run(self):
+        try:
+            x = self._load(); sr = self.samplerate
+            size = max(1, int(sr * self.chunk_seconds)); t0 = time.monotonic()
+            for seq, k in enumerate(range(0, x.shape[0], size)):
+                audio = x[k:k + size]
+                if self.speed and self._stop.wait(max(0.0, t0 + (k + audio.shape[0]) / sr / self.speed - time.monotonic())): break
+                if self._stop.is_set(): break
+                chunk = AudioChunk(audio.copy(), sr, offset=k / sr, seq=seq); self.chunks += 1
+                try:
+                    if self.on_chunk: self.on_chunk(chunk)
+                except Exception as e:
+                    log_exc(e)
+        except Exception as e:
+            log_exc(e)
+        finally:
+            self.finished.set()
+
+class Session:
+    """Une salle : source -> TranscriptionStage -> InferenceWorker -> segments (+ journal) -> sink.
+
+    `sink(session, segments, partial)` est appelé depuis le thread du pipeline à chaque texte
+    confirmé ; `partial` est l'hypothèse en cours en streaming, None sinon. Les segments sont
+    déjà rangés dans `session.segments` (avec leur source) et dans le journal s'il y en a un.
+    En streaming (`stream=True`) la source doit livrer des pas courts (STREAM_STEP).
+    """
+    def __init__(self, engine, key, source, size='small', sink=None, stream=False, workers=1, max_pending=4,
+                 policy=pipeline.POLICY_MERGE, adapt=False, journal=None, on_status=None):
+        self.engine = engine; self.key = key; self.source = source; self.sink = sink
+        self.journal = journal; self.on_status = on_status
+        self.segments = SegmentStore(); self.chunks = 0
+        self.transcriber = engine.transcriber(key, size)
+        # bascule medium <-> small pilotée par le RTF (le temps d'attente du worker partagé compte)
+        self.governor = autotune.RtfGovernor.from_tuning(size, engine.tuning) if adapt else None
+        self.streamer = None
+        if stream:
+            # fenêtre glissante : un seul worker (état séquentiel), les pas en retard sont fusionnés
+            self.streamer = wt.StreamingTranscriber(self.transcriber)
+            self.stage = pipeline.TranscriptionStage(self.streamer.feed, on_result=self._on_update, workers=1,
+                                                     max_pending=max_pending, policy=pipeline.POLICY_MERGE)
+        else:
+            self.stage = pipeline.TranscriptionStage(self._transcribe, on_result=self._on_segments, workers=workers,
+                                                     max_pending=max_pending, policy=policy, fallback=self._fallback)
+        source.on_chunk = self.stage.submit
+
+    def _transcribe(self, chunk: AudioChunk, tr=None):
+        gov = self.governor
+        if tr is None and gov is not None and gov.size != self.transcriber.size:
+            self.transcriber = self.engine.transcriber(self.key, gov.size)
+        tr = tr or self.transcriber; t = time.perf_counter()
+        segs = tr.transcribe_segments(chunk.audio, chunk.samplerate, offset=chunk.offset)
+        if gov is not None and tr is self.transcriber and chunk.duration:
+            new = gov.update((time.perf_counter() - t) / chunk.duration)
+            if new != tr.size and self.on_status: self.on_status(self, 'RTF {:.2f} : bascule sur {}'.format(gov.ema, new))
+        return segs
+
+    def _fallback(self):
+        # modèle léger si on tourne en medium et que small est installé
+        if self.transcriber.size == 'small' or not self.engine.available('small'): return self._transcribe
+        light = self.engine.transcriber(self.key, 'small')
+        return lambda c: self._transcribe(c, light)
+
+    def _store(self, segs):
+        for sg in segs: sg.source = self.source.source_at(sg.start, sg.end)
+        text = self.segments.extend(segs)
+        if text:
+            if self.journal: self.journal.append(segs)
+            self.chunks += 1
+        return text
+
+    def _on_segments(self, chunk, segs):
+        if self._store(segs or []) and self.sink: self.sink(self, segs, None)
+
+    def _on_update(self, chunk, upd):
+        self._store(upd.segments)
+        if self.sink: self.sink(self, upd.segments, upd.partial)
+
+    def start(self):
+        self.source.start(); return self
+
+    def stop(self):
+        """Arrête la source et termine les chunks en attente ; la session quitte le moteur."""
+        try:
+            self.source.stop(); self.stage.close()
+            if self.streamer: self._on_update(None, self.streamer.flush())
+        except Exception as e:
+            log_exc(e)
+        self.engine._detach(self)
+
+    def stats(self):
+        st = self.stage.stats(); st['chunks'] = self.chunks; st['words'] = self.segments.word_count
+        st['source'] = self.source.stats()
+        return st
+
+    def save(self, date, thematique, projet, title, audio_path=''):
+        """Range la session en base (réunion + segments) ; le journal n'a plus lieu d'être."""
+        mid = db.add_meeting(date, thematique, projet, title, '', self.segments.text, audio_path)
+        db.add_segments(mid, self.segments.segments)
+        if self.journal: self.journal.close(); self.journal = None
+        return mid
+
+class Engine:
+    """Sessions de capture/transcription sans interface, sur un InferenceWorker commun.
+
+    `settings(taille)` donne les arguments du Transcriber (compute_type, cpu_threads,
+    num_workers) ; par défaut autotune.engine_settings (tous les cœurs, 1 worker). Un Transcriber par taille,
+    partagé par toutes les sessions : la mémoire ne croît pas avec le nombre de salles.
+    """
+    def __init__(self, models_dir=None, settings: Optional[Callable[[str], dict]]=None, batch_size=8, tuning=None):
+        self.models_dir = Path(models_dir or utils.MODELS_DIR)
+        self.tuning = tuning
+        self.settings = settings or self._tuned
+        self.worker = InferenceWorker(batch_size)
+        self.sessions = {}
+        self._models = {}
+        self._lock = threading.Lock()
+
+    def _tuned(self, size):
+        return autotune.engine_settings(size, self.tuning)
+
+    def available(self, size):
+        return is_installed(wt.model_path(self.models_dir, size))
+
+    def model(self, size) -> wt.Transcriber:
+        with self._lock:
+            tr = self._models.get(size)
+        if tr is None:
+            # chargé hors verrou (plusieurs secondes) ; le registre évite un double chargement
+            tr = wt.Transcriber(self.models_dir, **{**self.settings(size), 'size': size})
+            with self._lock:
+                tr = self._models.setdefault(size, tr)
+        return tr
+
+    def transcriber(self, key, size) -> SharedTranscriber:
+        return SharedTranscriber(self.worker, key, self.model(size))
+
+    def open(self, key, source, **kw) -> Session:
+        """Crée la session `key` sur `source` (LiveMixer, FileSource) et démarre la capture.
+
+        Arguments de Session : size, sink, stream, workers, max_pending, policy, adapt, journal, on_status.
+        """
+        with self._lock:
+            if key in self.sessions: raise ValueError(f'Session déjà ouverte : {key}')
+            self.sessions[key] = None   # réservée pendant le chargement du modèle
+        try:
+            ses = Session(self, key, source, **kw)
+        except Exception:
+            with self._lock: self.sessions.pop(key, None)
+            raise
+        with self._lock: self.sessions[key] = ses
+        return ses.start()
+
+    def _detach(self, ses):
+        with self._lock:
+            if self.sessions.get(ses.key) is ses: del self.sessions[ses.key]
+        self.worker.forget(ses.key)
+
+    def stats(self):
+        with self._lock: sessions = {k: s for k, s in self.sessions.items() if s is not None}
+        return {'depth': self.worker.depth(), 'batches': self.worker.batches, 'requests': self.worker.requests,
+                'models': sorted(self._models), 'sessions': {k: s.stats() for k, s in sessions.items()}}
+
+    def close(self):
+        with self._lock: sessions = [s for s in self.sessions.values() if s is not None]
+        for s in sessions: s.stop()
+        self.worker.close()
@@ -1,15 +1,90 @@
 from pathlib import Path
-import pandas as pd
+import csv
+from . import db, telemetry
+
+# Export en flux : chaque feuille est lue par lots depuis SQLite et écrite au fil de l'eau
+# (openpyxl write-only, csv, pyarrow ParquetWriter) ; la mémoire reste plate quelle que
+# soit la taille de l'archive.
+CR_COLS = ['ID','Date','Thématique','Projet','Titre','Participants','CR']
+TODO_COLS = ['ID','MeetingID','Thématique','Projet','Action','Acteur','Échéance','Statut']
+GLOBAL_COLS = ['Date','Thématique','Projet','Action','Acteur','Échéance','Statut','MeetingID']
+FORMATS = {'.xlsx': 'xlsx', '.csv': 'csv', '.parquet': 'parquet'}
+_INT_COLS = {'ID','MeetingID'}
+
+def _sheets(filters, batch):
+    # (nom, colonnes, lots de lignes) ; ToDo_Global = jointure SQL actions x réunions
+    return [('CR', CR_COLS, db.iter_meetings(filters, batch)),
+            ('ToDo', TODO_COLS, db.iter_todos(filters, batch)),
+            ('ToDo_Global', GLOBAL_COLS, db.iter_todos_global(filters, batch))]
+
+def _sheet_path(path, name):
+    # csv/parquet : un fichier par feuille (<nom>_CR.csv, …)
+    return path.with_name(f'{path.stem}_{name}{path.suffix}')
+
+def _write_xlsx(path, sheets, tick):
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    for name, cols, batches in sheets:
+        ws = wb.create_sheet(name); ws.append(cols)
+        for rows in batches:
+            for r in rows: ws.append(r)
+            tick(len(rows))
+    wb.save(path)
+    return [path]
+
+def _write_csv(path, sheets, tick):
+    out = []
+    for name, cols, batches in sheets:
+        p = _sheet_path(path, name); out.append(p)
+        with open(p, 'w', newline='', encoding='utf-8-sig') as f:   # BOM : accents lisibles dans Excel
+            w = csv.writer(f, delimiter=';'); w.writerow(cols)
+            for rows in batches:
+                w.writerows(rows); tick(len(rows))
+    return out
+
+def _write_parquet(path, sheets, tick):
+    try:
+        import pyarrow as pa, pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("L'export Parquet nécessite pyarrow (pip install pyarrow).")
+    out = []
+    for name, cols, batches in sheets:
+        p = _sheet_path(path, name); out.append(p)
+        schema = pa.schema([(c, pa.int64() if c in _INT_COLS else pa.string()) for c in cols])
+        with pq.ParquetWriter(p, schema) as w:
+            for rows in batches:
+                arrays = [pa.array(list(col), type=f.type) for col, f in zip(zip(*rows), schema)]
+                w.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema)); tick(len(rows))
+    return out
+
+_WRITERS = {'xlsx': _write_xlsx, 'csv': _write_csv, 'parquet': _write_parquet}
+
+def export(path: Path, filters=None, progress=None, batch=500):
+    """Exporte CR, ToDo et ToDo_Global vers `path` (format déduit de l'extension).
+
+    `filters` : thematique, projet (sous-chaînes), date_from, date_to (ISO, inclus).
+    `progress(done, total)` est appelé après chaque lot (depuis le thread appelant).
+    Retourne la liste des fichiers écrits.
+    """
+    path = Path(path); fmt = FORMATS.get(path.suffix.lower())
+    if fmt is None:
+        raise ValueError(f'Format non supporté: {path.suffix}')
+    n_cr, n_todo = db.count_export(filters)
+    total = n_cr + 2*n_todo; done = 0
+    def tick(n):
+        nonlocal done
+        done += n
+        if progress: progress(done, total)
+    with telemetry.timed('export.' + fmt):
+        out = _WRITERS[fmt](path, _sheets(filters, batch), tick)
+    telemetry.count('export.rows', done)
+    return out
+
 def export_excel(path: Path, meetings_rows, todos_rows):
-    cr_cols = ['ID','Date','Thématique','Projet','Titre','Participants','CR']
-    cr_df = pd.DataFrame(meetings_rows, columns=cr_cols)
-    todo_cols = ['ID','MeetingID','Thématique','Projet','Action','Acteur','Échéance','Statut']
-    todo_df = pd.DataFrame(todos_rows, columns=todo_cols)
-    m_df = cr_df[['ID','Date','Thématique','Projet']].rename(columns={'ID':'MeetingID'})
-    glob_df = todo_df.merge(m_df, on='MeetingID', how='left')
-    cols = ['Date','Thématique','Projet','Action','Acteur','Échéance','Statut','MeetingID']
-    glob_df = glob_df[cols]
-    with pd.ExcelWriter(path, engine='openpyxl') as xw:
-        cr_df.to_excel(xw, sheet_name='CR', index=False)
-        todo_df.to_excel(xw, sheet_name='ToDo', index=False)
-        glob_df.to_excel(xw, sheet_name='ToDo_Global', index=False)
+    """Ancienne API : classeur CR / ToDo / ToDo_Global à partir de lignes déjà chargées
+    (colonnes CR_COLS et TODO_COLS). Pour exporter la base, préférer `export`."""
+    meetings = {r[0]: r[1:4] for r in meetings_rows}   # ID -> (Date, Thématique, Projet)
+    glob = [(*meetings.get(t[1], (None,)*3), *t[4:8], t[1]) for t in todos_rows]   # jointure gauche sur MeetingID
+    sheets = [('CR', CR_COLS, [list(meetings_rows)]), ('ToDo', TODO_COLS, [list(todos_rows)]),
+              ('ToDo_Global', GLOBAL_COLS, [glob])]
+    return _write_xlsx(Path(path), sheets, lambda n: None)
@@ -0,0 +1,130 @@
+import multiprocessing as mp, os, sys, threading
+from pathlib import Path
+from . import db, utils
+from .utils import MODELS_DIR, log_exc
+
+# Re-transcription en tâche de fond : un processus séparé, en priorité basse, reprend
+# l'audio archivé d'une réunion avec un autre modèle (medium en général). Le travail
+# avance par pas de STEP_S secondes, chacun validé en base avec sa position : un arrêt
+# (fermeture, pause, plantage) ne perd au plus qu'un pas. À la fin, meetings.content et
+# les segments de la réunion sont remplacés en une seule transaction (db.finish_job).
+# Pendant une session live, le processus est arrêté : il ne concurrence jamais la capture.
+SAMPLE_RATE = 16000
+STEP_S = 30.0         # fenêtre native de Whisper
+CUT_SEARCH_S = 4.0    # la coupure se place sur les 100 ms les plus calmes de la fin du pas
+
+def _lower_priority():
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            k = ctypes.windll.kernel32
+            k.SetPriorityClass(k.GetCurrentProcess(), 0x00000040)   # IDLE_PRIORITY_CLASS
+        else:
+            os.nice(19)
+    except Exception as e:
+        log_exc(e)
+
+class _Audio:
+    """Lecture par plage : archive FLAC indexée (live), sinon fichier décodé une fois (batch)."""
+    def __init__(self, path):
+        from . import audio_mix
+        self.path = Path(path); self._full = None
+        if audio_mix.index_path(self.path).is_file():
+            self.duration = audio_mix.archive_duration(self.path)
+            self.read = lambda t0, t1: audio_mix.read_range(self.path, t0, t1)
+        else:
+            from faster_whisper import decode_audio
+            self._full = decode_audio(str(self.path), sampling_rate=SAMPLE_RATE)
+            self.duration = self._full.shape[0] / SAMPLE_RATE
+            self.read = lambda t0, t1: self._full[int(t0*SAMPLE_RATE):int(t1*SAMPLE_RATE)]
+
+def _cut(x, last):
+    """Nombre d'échantillons à transcrire : tout si c'est le dernier pas, sinon jusqu'au creux."""
+    import numpy as np
+    if last: return x.shape[0]
+    frame = SAMPLE_RATE // 10; k = max(0, x.shape[0] - int(CUT_SEARCH_S*SAMPLE_RATE)) // frame * frame
+    tail = x[k:k + (x.shape[0] - k) // frame * frame].reshape(-1, frame)
+    if not tail.shape[0]: return x.shape[0]
+    return k + int(np.argmin((tail**2).mean(axis=1))) * frame + frame // 2
+
+def _run(job, stop):
+    jid, mid, size, done, path = job
+    try:
+        if not path or not Path(path).is_file():
+            raise RuntimeError("Pas d'audio archivé pour cette réunion.")
+        import numpy as np
+        from .whisper_transcribe import Transcriber
+        from . import autotune
+        st = autotune.settings_for(size)
+        tr = Transcriber(MODELS_DIR, size, compute_type=st['compute_type'], cpu_threads=st['cpu_threads'])
+        audio = _Audio(path)
+        if not db.start_job(jid, audio.duration): return
+        while done < audio.duration - 0.05:
+            if stop.is_set() or db.job_status(jid) != 'running': return   # arrêt / annulation
+            end = min(done + STEP_S, audio.duration)
+            x = np.asarray(audio.read(done, end), dtype=np.float32)
+            if not x.shape[0]: break
+            n = _cut(x, end >= audio.duration)
+            segs = tr.transcribe_segments(x[:n], SAMPLE_RATE, offset=done)
+            done = done + n / SAMPLE_RATE
+            if not db.add_job_step(jid, segs, done): return
+        db.finish_job(jid)
+    except Exception as e:
+        log_exc(e)
+        db.update_job(jid, status='error', error=str(e))
+
+def _worker(stop):
+    # point d'entrée du processus (spawn) : se termine quand la file est vide
+    utils.setup(); _lower_priority()
+    try:
+        db.init_db()
+        while not stop.is_set():
+            job = db.next_job()
+            if job is None: return
+            _run(job, stop)
+    finally:
+        db.close_all()
+
+class JobScheduler:
+    """Côté application : met les jobs en file et pilote le processus de re-transcription."""
+    def __init__(self):
+        self._ctx = mp.get_context('spawn')   # pas de fork d'un processus Tk multi-thread
+        self._proc = None; self._stop = None
+        self._lock = threading.Lock()
+        self.paused = False
+
+    @property
+    def running(self):
+        return self._proc is not None and self._proc.is_alive()
+
+    def submit(self, meeting_id, size='medium'):
+        jid = db.add_job(meeting_id, size); self.start(); return jid
+
+    def cancel(self, job_id):
+        db.cancel_job(job_id)   # le worker le voit avant le pas suivant
+
+    def start(self):
+        """Lance le processus s'il y a du travail (sans effet en pause ou s'il tourne déjà)."""
+        with self._lock:
+            if self.paused or self.running or not db.count_jobs(): return
+            self._stop = self._ctx.Event()
+            self._proc = self._ctx.Process(target=_worker, args=(self._stop,), name='chap1-jobs', daemon=True)
+            self._proc.start()
+
+    def pause(self, timeout=1.0):
+        """Session live : arrêt du processus (au pas suivant, sinon tué après `timeout` s).
+        Le pas en cours est perdu, le job reprendra à la dernière position validée."""
+        self.paused = True; self._halt(timeout)
+
+    def resume(self):
+        self.paused = False; self.start()
+
+    def close(self):
+        self._halt(2.0)
+
+    def _halt(self, timeout):
+        with self._lock:
+            p, self._proc = self._proc, None
+            if p is None: return
+            self._stop.set(); p.join(timeout)
+            if p.is_alive(): p.terminate(); p.join(1)
@@ -0,0 +1,94 @@
+import json, os, threading, time
+from dataclasses import dataclass, field
+from pathlib import Path
+from .utils import log_exc
+from .transcript import Segment
+
+# Journal de session live : une ligne JSON par segment transcrit, ajoutée à l'arrivée
+# (write + flush : survit à un plantage de l'appli) ; fsync groupé toutes les
+# `fsync_interval` s ou tous les `fsync_every` segments (survit à une coupure).
+# Une session terminée proprement supprime son journal ; un journal restant au
+# démarrage est donc une session interrompue, que l'on peut restaurer en CR.
+PREFIX = 'session_'
+
+@dataclass
+class PendingSession:
+    path: Path
+    meta: dict
+    segments: list = field(default_factory=list)   # [Segment]
+    @property
+    def text(self): return ' '.join(s.text for s in self.segments)
+
+class TranscriptJournal:
+    def __init__(self, directory: Path, meta: dict, fsync_interval=2.0, fsync_every=20):
+        directory=Path(directory); directory.mkdir(parents=True, exist_ok=True)
+        stamp=time.strftime('%Y%m%d_%H%M%S')
+        # plusieurs sessions (moteur multi-salles) peuvent démarrer dans la même seconde
+        for n in range(1, 1000):
+            self.path=directory / '{}{}{}.jsonl'.format(PREFIX, stamp, '_{}'.format(n) if n>1 else '')
+            try: self._f=open(self.path, 'x', encoding='utf-8'); break
+            except FileExistsError: continue
+        else: raise FileExistsError(self.path)
+        self.fsync_interval=fsync_interval; self.fsync_every=max(1, int(fsync_every))
+        self._lock=threading.Lock(); self._unsynced=0; self._closed=False
+        self._wake=threading.Event()
+        self._write({'type': 'start', 'started': time.time(), **meta}); self._sync()
+        self._thread=threading.Thread(target=self._sync_loop, daemon=True); self._thread.start()
+
+    def _write(self, rec):
+        self._f.write(json.dumps(rec, ensure_ascii=False) + '\n'); self._f.flush()
+
+    def _sync(self):
+        try: os.fsync(self._f.fileno())
+        except OSError as e: log_exc(e)
+
+    def append(self, segments):
+        """Ajoute des Segment (appelable depuis n'importe quel thread)."""
+        segments=[s for s in segments if s.text]
+        if not segments: return
+        with self._lock:
+            if self._closed: return
+            for s in segments:
+                self._write({'type': 'seg', 'start': s.start, 'end': s.end, 'source': s.source, 'text': s.text, 'confidence': s.confidence})
+            self._unsynced+=len(segments)
+            if self._unsynced>=self.fsync_every: self._wake.set()
+
+    def _sync_loop(self):
+        while True:
+            self._wake.wait(self.fsync_interval); self._wake.clear()
+            with self._lock:
+                if self._closed: return
+                if self._unsynced: self._sync(); self._unsynced=0
+
+    def close(self, keep=False):
+        """Fin de session : le journal est supprimé (le CR est en base) sauf si `keep`."""
+        with self._lock:
+            if self._closed: return
+            self._closed=True
+            self._sync(); self._f.close()
+        self._wake.set()
+        if not keep:
+            try: self.path.unlink()
+            except OSError as e: log_exc(e)
+
+def _read(path):
+    meta={}; segs=[]
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try: rec=json.loads(line)
+            except ValueError: continue   # dernière ligne tronquée par le plantage
+            if rec.get('type')=='start': meta={k:v for k,v in rec.items() if k!='type'}
+            elif rec.get('type')=='seg': segs.append(Segment(rec.get('start') or 0.0, rec.get('end') or 0.0, rec.get('text',''), rec.get('confidence'), rec.get('source')))
+    return PendingSession(Path(path), meta, segs)
+
+def pending(directory: Path):
+    """Sessions interrompues (journaux restants), de la plus ancienne à la plus récente."""
+    out=[]
+    for p in sorted(Path(directory).glob(PREFIX + '*.jsonl')):
+        try: out.append(_read(p))
+        except OSError as e: log_exc(e)
+    return out
+
+def discard(session: PendingSession):
+    try: session.path.unlink()
+    except OSError as e: log_exc(e)
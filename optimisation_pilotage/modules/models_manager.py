@@ -1,33 +1,163 @@
-import threading
+import hashlib, json, os, threading, time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Optional, Callable
-from huggingface_hub import list_repo_files, hf_hub_download
-from .utils import MODELS_DIR
+from .utils import MODELS_DIR, log_exc
 MODEL_REPOS={'small':'Systran/faster-whisper-small','medium':'Systran/faster-whisper-medium'}
+MANIFEST='.manifest.json'        # {fichier: {size, sha256}} écrit une fois tous les fichiers vérifiés
+REQUIRED=('model.bin','config.json')
+CHUNK=1<<20
+
+class RemoteFile:
+    __slots__=('name','size','sha256')
+    def __init__(self, name, size, sha256=None): self.name=name; self.size=int(size); self.sha256=sha256
+
+# --- sources -------------------------------------------------------------------
+# Une source liste les fichiers d'un modèle (taille, sha256 si connu) et ouvre un flux
+# binaire à partir d'un décalage (reprise). CHAP1_MODELS_SOURCE choisit la source :
+# vide = Hugging Face, URL = miroir compatible (même API), chemin = dossier local.
+class HubSource:
+    def __init__(self, endpoint=None, repos=MODEL_REPOS):
+        self.endpoint=endpoint; self.repos=repos; self._rev={}
+    def __str__(self): return self.endpoint or 'huggingface.co'
+    def files(self, size):
+        from huggingface_hub import HfApi
+        info=HfApi(endpoint=self.endpoint).model_info(self.repos[size], files_metadata=True)
+        self._rev[size]=info.sha   # révision figée : une reprise relit les mêmes octets
+        # sha256 connu pour les fichiers LFS (dont model.bin), taille seule pour les autres
+        return [RemoteFile(s.rfilename, s.size or 0, getattr(s.lfs, 'sha256', None) if s.lfs else None)
+                for s in info.siblings if not s.rfilename.startswith('.')]
+    def open(self, size, name, offset=0):
+        import io, urllib.error, urllib.request
+        from huggingface_hub import hf_hub_url
+        url=hf_hub_url(self.repos[size], name, revision=self._rev.get(size), endpoint=self.endpoint)
+        headers={}
+        try:
+            from huggingface_hub.utils import build_hf_headers
+            headers.update(build_hf_headers())
+        except Exception: pass
+        if offset: headers['Range']=f'bytes={offset}-'
+        try: resp=urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=60)
+        except urllib.error.HTTPError as e:
+            if offset and e.code==416: return io.BytesIO()   # plage au-delà de la fin : .part déjà complet
+            raise
+        if offset and resp.status!=206:   # pas de Range côté serveur : on repart de zéro
+            resp.close(); raise _NoResume()
+        return resp
+
+class LocalSource:
+    """Dossier contenant faster-whisper-<taille>/ (ou <taille>/) : install hors ligne, miroir, tests."""
+    def __init__(self, root): self.root=Path(root)
+    def __str__(self): return str(self.root)
+    def _dir(self, size):
+        for d in (self.root/f'faster-whisper-{size}', self.root/size):
+            if d.is_dir(): return d
+        raise FileNotFoundError(f'Modèle {size} absent de {self.root}')
+    def files(self, size):
+        d=self._dir(size); known=_read_manifest(d)
+        return [RemoteFile(p.relative_to(d).as_posix(), p.stat().st_size, known.get(p.relative_to(d).as_posix(), {}).get('sha256'))
+                for p in sorted(d.rglob('*')) if p.is_file() and p.name!=MANIFEST and not p.name.endswith('.part')]
+    def open(self, size, name, offset=0):
+        f=open(self._dir(size)/name, 'rb'); f.seek(offset); return f
+
+def source_from_env():
+    v=os.getenv('CHAP1_MODELS_SOURCE', '').strip()
+    if not v: return HubSource()
+    if v.startswith(('http://','https://')): return HubSource(endpoint=v.rstrip('/'))
+    return LocalSource(v)
+
+class _NoResume(Exception): pass
+
+# --- vérification --------------------------------------------------------------
+def _read_manifest(d):
+    try: return json.loads((Path(d)/MANIFEST).read_text(encoding='utf-8'))
+    except (OSError, ValueError): return {}
+
+def check_installed(path):
+    """(installé, vérifié) : avec manifeste, chaque fichier doit exister à la bonne taille ;
+    sans manifeste (installs antérieures), seuls les fichiers indispensables sont exigés."""
+    path=Path(path); man=_read_manifest(path)
+    if man:
+        return all((path/n).is_file() and (path/n).stat().st_size==m['size'] for n,m in man.items()), True
+    return all((path/n).is_file() and (path/n).stat().st_size>0 for n in REQUIRED), False
+
+def is_installed(path): return check_installed(path)[0]
+
+def _sha256(path, h=None):
+    h=h or hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK), b''): h.update(block)
+    return h
+
 class ModelStatus:
-    def __init__(self,name): self.name=name; self.present=False; self.progress=0; self.status_text='Non téléchargé'; self.path=None
+    def __init__(self,name): self.name=name; self.present=False; self.verified=False; self.progress=0; self.status_text='Non téléchargé'; self.path=None; self.bytes_done=0; self.bytes_total=0; self.busy=False
 class ModelsManager:
-    def __init__(self,on_change:Optional[Callable]=None):
+    def __init__(self,on_change:Optional[Callable]=None, source=None, workers=4):
         self.on_change=on_change; self.small=ModelStatus('small'); self.medium=ModelStatus('medium')
+        self.source=source or source_from_env(); self.workers=workers
+    def _notify(self): self.on_change and self.on_change()
     def refresh(self):
         for ms in (self.small,self.medium):
-            p=MODELS_DIR/f'faster-whisper-{ms.name}'; ms.path=p; ms.present=p.exists() and any(p.iterdir())
-            ms.progress=100 if ms.present else 0; ms.status_text='Installé' if ms.present else 'Non téléchargé'
-        if self.on_change: self.on_change()
+            if ms.busy: continue
+            p=MODELS_DIR/f'faster-whisper-{ms.name}'; ms.path=p; ms.present,ms.verified=check_installed(p)
+            ms.progress=100 if ms.present else 0
+            ms.status_text=('Installé' if ms.verified else 'Installé (non vérifié)') if ms.present else 'Non téléchargé'
+        self._notify()
     def download(self,size):
+        """Télécharge (ou complète / vérifie) le modèle en tâche de fond."""
         ms=self.small if size=='small' else self.medium
-        if ms.present: ms.progress=100; ms.status_text='Installé'; self.on_change and self.on_change(); return
-        def worker():
-            try:
-                repo=MODEL_REPOS[size]; dst=MODELS_DIR/f'faster-whisper-{size}'; dst.mkdir(parents=True, exist_ok=True)
-                ms.status_text='Récupération…'; ms.progress=1; self.on_change and self.on_change()
-                files=list_repo_files(repo, repo_type='model'); total=max(1,len(files)); done=0
-                for f in files:
-                    try: hf_hub_download(repo, f, repo_type='model', local_dir=str(dst), local_dir_use_symlinks=False)
-                    except Exception: pass
-                    done+=1; ms.progress=min(99,int(done*100/total)); ms.status_text=f'Téléchargement {ms.progress}%'; self.on_change and self.on_change()
-                ms.progress=100; ms.status_text='Installé'
-            except Exception as e:
-                ms.progress=0; ms.status_text=f'Erreur: {e}'
-            finally: self.refresh()
-        threading.Thread(target=worker, daemon=True).start()
+        if ms.busy or (ms.present and ms.verified): self._notify(); return
+        ms.busy=True
+        threading.Thread(target=self._install, args=(ms,), daemon=True).start()
+
+    def _install(self, ms):
+        dst=MODELS_DIR/f'faster-whisper-{ms.name}'; lock=threading.Lock(); last=[0.0]
+        def advance(n):
+            with lock:
+                ms.bytes_done+=n; now=time.monotonic()
+                if now-last[0]<0.2 and ms.bytes_done<ms.bytes_total: return
+                last[0]=now; ms.progress=min(99, int(ms.bytes_done*100/max(1,ms.bytes_total)))
+                ms.status_text='Téléchargement {}% ({:.0f} / {:.0f} Mo)'.format(ms.progress, ms.bytes_done/2**20, ms.bytes_total/2**20)
+            self._notify()
+        try:
+            ms.status_text=f'Récupération de la liste ({self.source})…'; ms.progress=0; self._notify()
+            files=self.source.files(ms.name)
+            ms.bytes_total=sum(f.size for f in files); ms.bytes_done=0
+            dst.mkdir(parents=True, exist_ok=True)
+            with ThreadPoolExecutor(self.workers) as ex:
+                errors=[e for e in ex.map(lambda f: self._fetch(ms.name, f, dst, advance), files) if e]
+            if errors: raise RuntimeError('; '.join(errors[:3]))
+            (dst/MANIFEST).write_text(json.dumps({f.name: {'size': f.size, 'sha256': f.sha256} for f in files}, indent=1), encoding='utf-8')
+            ms.progress=100; ms.status_text='Installé'
+        except Exception as e:
+            log_exc(e); ms.progress=0; ms.status_text=f'Erreur: {e}'
+            ms.busy=False; ms.present=False; self._notify(); return
+        ms.busy=False; self.refresh()
+
+    def _fetch(self, size, rf, dst, advance):
+        """Un fichier : reprise du .part, contrôle taille + sha256, puis renommage atomique."""
+        final=dst/rf.name; part=final.with_name(final.name+'.part')
+        final.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            if final.is_file() and final.stat().st_size==rf.size and (not rf.sha256 or _sha256(final).hexdigest()==rf.sha256):
+                advance(rf.size); return None
+            offset=part.stat().st_size if part.is_file() else 0
+            if offset>rf.size: part.unlink(); offset=0
+            h=_sha256(part) if offset and rf.sha256 else hashlib.sha256()
+            if offset<rf.size or not part.is_file():
+                try: src=self.source.open(size, rf.name, offset)
+                except _NoResume:
+                    offset=0; h=hashlib.sha256(); src=self.source.open(size, rf.name, 0)
+                advance(offset)
+                with src, open(part, 'ab' if offset else 'wb') as out:
+                    for block in iter(lambda: src.read(CHUNK), b''):
+                        out.write(block); rf.sha256 and h.update(block); advance(len(block))
+            else:
+                advance(offset)   # .part complet (arrêt avant le renommage) : vérification seule
+            got=part.stat().st_size
+            if got!=rf.size: return f'{rf.name}: {got} octets au lieu de {rf.size}'
+            if rf.sha256 and h.hexdigest()!=rf.sha256:
+                part.unlink(); return f'{rf.name}: empreinte sha256 invalide'
+            os.replace(part, final); return None
+        except Exception as e:
+            log_exc(e); return f'{rf.name}: {e}'
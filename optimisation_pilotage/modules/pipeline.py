@@ -0,0 +1,148 @@
+import threading, time, numpy as np
+from collections import deque
+from typing import Optional, Callable, Any
+from .audio_mix import AudioChunk
+from .utils import log_exc
+from . import telemetry
+
+# politiques en cas de surcharge (file pleine)
+POLICY_DROP = 'drop'            # on jette le chunk en attente le plus ancien
+POLICY_MERGE = 'merge'          # on fusionne avec le dernier chunk en attente s'il est contigu
+POLICY_DOWNGRADE = 'downgrade'  # on bascule sur un modèle plus léger
+POLICIES = (POLICY_DROP, POLICY_MERGE, POLICY_DOWNGRADE)
+
+class TranscriptionStage:
+    """Étage de transcription entre LiveMixer et Transcriber.
+
+    `submit` est appelé depuis le thread de capture et ne bloque jamais : les
+    chunks attendent dans une file bornée, traitée par `workers` threads.
+    Les résultats sont remis à `on_result(chunk, result)` dans l'ordre des
+    chunks, même avec plusieurs workers.
+    """
+    def __init__(self, handler: Callable[[AudioChunk], Any], on_result: Optional[Callable[[AudioChunk, Any], None]]=None,
+                 workers=1, max_pending=4, policy=POLICY_MERGE, fallback: Optional[Callable[[], Callable]]=None,
+                 max_merge_seconds=60):
+        if policy not in POLICIES:
+            raise ValueError(f'Politique inconnue: {policy}')
+        self.handler=handler
+        self.on_result=on_result
+        self.max_pending=max(1, int(max_pending))
+        self.policy=policy
+        self.fallback=fallback            # fabrique du handler léger (politique downgrade)
+        self.max_merge_seconds=max_merge_seconds
+        self.dropped=0; self.merged=0; self.processed=0
+        self.degraded=False
+        self._want_downgrade=False
+        self._pending=deque()
+        self._in_flight={}                # seq -> chunk en cours de transcription
+        self._done={}                     # seq -> (chunk, résultat) ou None si abandonné
+        self._next_seq=None
+        self._closing=False
+        self._cond=threading.Condition()
+        self._deliver_lock=threading.Lock()
+        self._threads=[threading.Thread(target=self._work, daemon=True) for _ in range(max(1, int(workers)))]
+        for t in self._threads: t.start()
+
+    # --- côté capture -----------------------------------------------------
+    def submit(self, chunk: AudioChunk):
+        with self._cond:
+            if self._closing:
+                return
+            if self._next_seq is None:
+                self._next_seq=chunk.seq
+            if len(self._pending) >= self.max_pending and not self._overload(chunk):
+                return
+            self._pending.append(chunk)
+            self._cond.notify()
+
+    def _overload(self, chunk):
+        """Applique la politique ; retourne False si le chunk a été absorbé."""
+        if self.policy == POLICY_MERGE:
+            last=self._pending[-1]
+            gap=chunk.offset - (last.offset + last.duration)   # < 0 : recouvrement (VAD)
+            if -chunk.duration < gap < 0.5 and last.duration + chunk.duration <= self.max_merge_seconds:
+                skip=int(round(max(0.0, -gap)*chunk.samplerate))
+                merged=AudioChunk(np.concatenate([last.audio, chunk.audio[skip:]]), last.samplerate, last.offset, last.seq)
+                merged.created=last.created
+                self._pending[-1]=merged
+                self._done[chunk.seq]=None
+                self.merged += 1
+                return False
+        elif self.policy == POLICY_DOWNGRADE and not self.degraded and self.fallback:
+            self._want_downgrade=True   # le modèle léger est chargé par un worker, pas ici
+        old=self._pending.popleft()
+        self._done[old.seq]=None
+        self.dropped += 1
+        return True
+
+    # --- côté workers -----------------------------------------------------
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._closing:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                chunk=self._pending.popleft()
+                self._in_flight[chunk.seq]=chunk
+                downgrade=self._want_downgrade; self._want_downgrade=False
+            if downgrade:
+                self._downgrade()
+            result=None
+            try:
+                result=self.handler(chunk)
+            except Exception as e:
+                log_exc(e)
+            with self._cond:
+                self._in_flight.pop(chunk.seq, None)
+                self._done[chunk.seq]=(chunk, result)
+                self.processed += 1
+            self._deliver()
+
+    def _downgrade(self):
+        try:
+            self.handler=self.fallback(); self.degraded=True
+        except Exception as e:
+            log_exc(e)
+
+    def _deliver(self):
+        # un seul thread livre à la fois, dans l'ordre des seq
+        with self._deliver_lock:
+            while True:
+                with self._cond:
+                    if self._next_seq not in self._done:
+                        return
+                    item=self._done.pop(self._next_seq); self._next_seq += 1
+                if item is not None and telemetry.enabled:
+                    telemetry.observe('chunk_to_text_ms', (time.monotonic() - item[0].created)*1e3)
+                    telemetry.gauge('stage.depth', self.depth()); telemetry.gauge('stage.dropped', self.dropped); telemetry.gauge('stage.merged', self.merged)
+                if item is not None and self.on_result:
+                    try:
+                        self.on_result(*item)
+                    except Exception as e:
+                        log_exc(e)
+
+    # --- supervision ------------------------------------------------------
+    def depth(self):
+        with self._cond:
+            return len(self._pending) + len(self._in_flight)
+
+    def lag(self):
+        """Retard (s) du plus ancien chunk pas encore transcrit."""
+        with self._cond:
+            waiting=list(self._in_flight.values()) + list(self._pending)
+        if not waiting:
+            return 0.0
+        return max(0.0, time.monotonic() - min(c.created for c in waiting))
+
+    def stats(self):
+        return {'depth': self.depth(), 'lag': self.lag(), 'dropped': self.dropped,
+                'merged': self.merged, 'processed': self.processed, 'degraded': self.degraded}
+
+    def close(self, timeout=10.0):
+        """Termine les chunks en attente (dans la limite de `timeout`) puis arrête les workers."""
+        with self._cond:
+            self._closing=True; self._cond.notify_all()
+        end=time.monotonic() + timeout
+        for t in self._threads:
+            t.join(timeout=max(0.0, end - time.monotonic()))
@@ -0,0 +1,125 @@
+import bisect, functools, json, logging, threading, time
+from contextlib import nullcontext
+from logging.handlers import RotatingFileHandler
+from .utils import LOGS_DIR, log_exc
+
+# Télémétrie du pipeline : histogrammes de latence, jauges (profondeurs de file) et
+# compteurs, écrits par fenêtre dans un JSONL tournant (logs/telemetry.jsonl).
+# Désactivée, chaque point d'instrumentation coûte un test de `enabled` : les appelants
+# chauds écrivent `if telemetry.enabled: ...`, les autres passent par les fonctions.
+enabled = False
+# bornes géométriques (~26 % de résolution) de 1e-3 à 1e5 : valables pour des ms comme pour un RTF
+_BOUNDS = [10 ** (k/10) for k in range(-30, 51)]
+_NULL = nullcontext()
+
+class Histogram:
+    __slots__=('counts','n','total','max')
+    def __init__(self):
+        self.counts=[0]*(len(_BOUNDS)+1); self.n=0; self.total=0.0; self.max=0.0
+    def add(self, v):
+        self.counts[bisect.bisect_left(_BOUNDS, v)] += 1
+        self.n += 1; self.total += v
+        if v > self.max: self.max=v
+    def quantile(self, q):
+        if not self.n: return 0.0
+        rank=q*self.n; acc=0
+        for i,c in enumerate(self.counts):
+            acc += c
+            if acc >= rank: return min(_BOUNDS[i] if i < len(_BOUNDS) else self.max, self.max)
+        return self.max
+    def summary(self):
+        return {'n': self.n, 'mean': self.total/self.n if self.n else 0.0,
+                'p50': self.quantile(0.5), 'p95': self.quantile(0.95), 'max': self.max}
+
+_lock = threading.Lock()
+_hist = {}; _window = {}    # cumul depuis l'activation / fenêtre en cours (vidée à chaque écriture)
+_gauges = {}; _counters = {}
+_writer = None
+
+def observe(name, value):
+    """Ajoute une mesure à l'histogramme `name` (ms pour les latences)."""
+    if not enabled: return
+    with _lock:
+        for d in (_hist, _window):
+            h=d.get(name)
+            if h is None: h=d[name]=Histogram()
+            h.add(value)
+
+def gauge(name, value):
+    """Valeur instantanée (dernière et maximum de la fenêtre)."""
+    if not enabled: return
+    with _lock:
+        last, peak = _gauges.get(name, (0, 0))
+        _gauges[name]=(value, max(peak, value))
+
+def count(name, n=1):
+    if not enabled: return
+    with _lock: _counters[name]=_counters.get(name, 0) + n
+
+class _Timer:
+    __slots__=('name','t')
+    def __init__(self, name): self.name=name
+    def __enter__(self): self.t=time.perf_counter(); return self
+    def __exit__(self, *exc): observe(self.name, (time.perf_counter() - self.t)*1e3)
+
+def timed(name):
+    """`with telemetry.timed('db.add_meeting'):` — durée en ms ; rien si désactivée."""
+    return _Timer(name) if enabled else _NULL
+
+def timed_fn(name):
+    """Décorateur : chronomètre chaque appel de la fonction."""
+    def deco(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled: return fn(*args, **kwargs)
+            t=time.perf_counter()
+            try: return fn(*args, **kwargs)
+            finally: observe(name, (time.perf_counter() - t)*1e3)
+        return wrapper
+    return deco
+
+def snapshot():
+    """État cumulé : {'hist': {nom: résumé}, 'gauges': {nom: (dernière, max)}, 'counters': {...}}."""
+    with _lock:
+        return {'hist': {k: h.summary() for k,h in _hist.items()},
+                'gauges': dict(_gauges), 'counters': dict(_counters)}
+
+def _flush(logger):
+    global _window
+    with _lock:
+        win, _window = _window, {}
+        rec={'t': time.time(), 'hist': {k: h.summary() for k,h in win.items()},
+             'gauges': {k: {'last': v[0], 'max': v[1]} for k,v in _gauges.items()}, 'counters': dict(_counters)}
+        for k,(last,_) in _gauges.items(): _gauges[k]=(last, last)   # max par fenêtre
+    if rec['hist'] or rec['gauges'] or rec['counters']:
+        logger.info(json.dumps(rec, ensure_ascii=False))
+
+class _Writer(threading.Thread):
+    def __init__(self, path, interval, max_bytes, backups):
+        super().__init__(daemon=True)
+        self.interval=interval; self.stop_evt=threading.Event()
+        self.logger=logging.getLogger('chap1.telemetry'); self.logger.propagate=False; self.logger.setLevel(logging.INFO)
+        self.handler=RotatingFileHandler(path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8')
+        self.handler.setFormatter(logging.Formatter('%(message)s')); self.logger.addHandler(self.handler)
+    def run(self):
+        while not self.stop_evt.wait(self.interval):
+            try: _flush(self.logger)
+            except Exception as e: log_exc(e)
+        try: _flush(self.logger)
+        except Exception as e: log_exc(e)
+        self.logger.removeHandler(self.handler); self.handler.close()
+
+def enable(path=None, interval=5.0, max_bytes=5*2**20, backups=3):
+    """Active la collecte ; une ligne JSON par fenêtre de `interval` s dans `path`."""
+    global enabled, _writer
+    if enabled: return
+    path=path or LOGS_DIR / 'telemetry.jsonl'; path.parent.mkdir(parents=True, exist_ok=True)
+    with _lock: _hist.clear(); _window.clear(); _gauges.clear(); _counters.clear()
+    _writer=_Writer(path, interval, max_bytes, backups); _writer.start()
+    enabled=True
+
+def disable():
+    global enabled, _writer
+    enabled=False
+    if _writer is not None:
+        _writer.stop_evt.set(); _writer.join(timeout=2); _writer=None
@@ -0,0 +1,53 @@
+import math, threading
+from typing import Optional
+
+class Segment:
+    """Segment transcrit : bornes (s, position dans la session), source, texte, confiance.
+
+    `confidence` = exp(avg_logprob) de faster-whisper (probabilité moyenne par jeton, 0..1).
+    `source` = 'mic', 'system' ou None (source dominante sur l'intervalle, d'après le mixer).
+    """
+    __slots__=('start','end','text','confidence','source')
+    def __init__(self, start: float, end: float, text: str, confidence: Optional[float]=None, source: Optional[str]=None):
+        self.start=start; self.end=end; self.text=text; self.confidence=confidence; self.source=source
+
+    @classmethod
+    def from_whisper(cls, seg, offset=0.0):
+        lp=getattr(seg, 'avg_logprob', None)
+        return cls(offset + seg.start, offset + seg.end, seg.text.strip(), math.exp(lp) if lp is not None else None)
+
+    def __repr__(self):
+        return f'Segment({self.start:.2f}-{self.end:.2f}, {self.source}, {self.text!r})'
+
+class SegmentStore:
+    """Transcription d'une session, segment par segment.
+
+    Les ajouts sont en O(taille du segment) : compteur de mots incrémental, pas de
+    concaténation ; le texte complet n'est assemblé (puis mis en cache) que s'il est lu.
+    Ajouts depuis un thread de transcription, lectures depuis l'UI.
+    """
+    def __init__(self):
+        self.segments=[]; self.word_count=0
+        self._lock=threading.Lock(); self._text=None
+
+    def __len__(self): return len(self.segments)
+
+    def extend(self, segments):
+        """Ajoute des segments ; retourne leur texte (pour l'affichage / le journal)."""
+        segments=[s for s in segments if s.text]
+        if not segments: return ''
+        with self._lock:
+            self.segments.extend(segments); self._text=None
+            self.word_count+=sum(len(s.text.split()) for s in segments)
+        return ' '.join(s.text for s in segments)
+
+    @property
+    def text(self):
+        with self._lock:
+            if self._text is None: self._text=' '.join(s.text for s in self.segments)
+            return self._text
+
+    def between(self, t0, t1):
+        """Segments qui recouvrent [t0, t1] (s)."""
+        with self._lock: segs=list(self.segments)
+        return [s for s in segs if s.end > t0 and s.start < t1]
@@ -2,15 +2,21 @@ from pathlib import Path
 import os, datetime, logging
 APP_NAME = "CHAP1"
 BASE_DIR = Path(os.getenv("LOCALAPPDATA", Path.home())) / APP_NAME
-DATA_DIR = BASE_DIR / "data"; EXPORTS_DIR = BASE_DIR / "exports"; LOGS_DIR = BASE_DIR / "logs"; AUTOSAVE_DIR = BASE_DIR / "autosave"; MODELS_DIR = BASE_DIR / "models"
-for p in (DATA_DIR, EXPORTS_DIR, LOGS_DIR, AUTOSAVE_DIR, MODELS_DIR): p.mkdir(parents=True, exist_ok=True)
+DATA_DIR = BASE_DIR / "data"; EXPORTS_DIR = BASE_DIR / "exports"; LOGS_DIR = BASE_DIR / "logs"; AUTOSAVE_DIR = BASE_DIR / "autosave"; MODELS_DIR = BASE_DIR / "models"; AUDIO_DIR = BASE_DIR / "audio"
 DB_PATH = DATA_DIR / "chap1.db"
 def today_str(): return datetime.date.today().isoformat()
 def safe_filename(s: str) -> str:
     for ch in '<>:"/\\|?*': s = s.replace(ch, "_")
     return "_".join(part for part in s.split() if part).strip("_")
-# logging setup
 LOG_FILE = LOGS_DIR / "app.log"
-logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", encoding="utf-8")
+_setup_done = False
+def setup():
+    """Dossiers de l'application + journal app.log. Appelé par les points d'entrée (app,
+    batch, processus de jobs) : importer un module n'a plus d'effet de bord."""
+    global _setup_done
+    if _setup_done: return
+    for p in (DATA_DIR, EXPORTS_DIR, LOGS_DIR, AUTOSAVE_DIR, MODELS_DIR, AUDIO_DIR): p.mkdir(parents=True, exist_ok=True)
+    logging.basicConfig(filename=LOG_FILE, level=logging.INFO, format="%(asctime)s %(levelname)s %(message)s", encoding="utf-8")
+    _setup_done = True
 def log_exc(e: Exception):
     logging.exception(e)
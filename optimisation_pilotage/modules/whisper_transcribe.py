@@ -1,14 +1,217 @@
+import bisect, threading, time
+from collections import OrderedDict
 from pathlib import Path
 from faster_whisper import WhisperModel
+import numpy as np
 import soundfile as sf
+from .utils import log_exc
+from .models_manager import is_installed
+from . import telemetry
+from .transcript import Segment
+
+SAMPLE_RATE = 16000  # fréquence attendue par Whisper
+MAX_CLIP_S = 30      # fenêtre de l'encodeur : un extrait plus long serait tronqué
+
+def model_path(models_dir: Path, size: str) -> Path:
+    return Path(models_dir) / f'faster-whisper-{size}'
+
+class ModelRegistry:
+    """Cache des WhisperModel chargés, partagé par tout le processus.
+
+    Clé : (taille, compute_type, cpu_threads, num_workers). Éviction LRU dès que
+    le nombre de modèles ou la mémoire estimée (taille de model.bin) dépasse
+    la limite ; le modèle qu'on vient de demander n'est jamais évincé.
+    """
+    def __init__(self, max_models=2, max_bytes=3*1024**3):
+        self.max_models=max_models
+        self.max_bytes=max_bytes
+        self._models=OrderedDict()   # clé -> (modèle, octets estimés)
+        self._loading={}             # clé -> Event (chargement en cours)
+        self._lock=threading.Lock()
+
+    @staticmethod
+    def _estimate_bytes(mp: Path) -> int:
+        try:
+            return (mp / 'model.bin').stat().st_size
+        except OSError:
+            return 0
+
+    def get(self, models_dir: Path, size: str, compute_type='int8', cpu_threads=0, num_workers=1) -> WhisperModel:
+        key=(size, compute_type, int(cpu_threads), max(1, int(num_workers)))
+        while True:
+            with self._lock:
+                if key in self._models:
+                    self._models.move_to_end(key)
+                    return self._models[key][0]
+                evt=self._loading.get(key)
+                if evt is None:
+                    evt=self._loading[key]=threading.Event(); break
+            evt.wait()   # un autre thread charge déjà ce modèle
+            with self._lock:
+                if key not in self._models and key not in self._loading:
+                    raise RuntimeError(f'Chargement du modèle {size} impossible.')
+        try:
+            mp=model_path(models_dir, size)
+            if not is_installed(mp):
+                raise RuntimeError(f'Modèle {size} introuvable ou incomplet. Téléchargez-le dans Paramètres.')
+            # int8 = léger CPU; tu peux passer en int8_float32 si souci de qualité
+            # num_workers > 1 : plusieurs transcriptions concurrentes sur le même modèle
+            model=WhisperModel(str(mp), device='cpu', compute_type=compute_type,
+                               cpu_threads=key[2], num_workers=key[3])
+            with self._lock:
+                self._models[key]=(model, self._estimate_bytes(mp))
+                self._evict(keep=key)
+            return model
+        finally:
+            with self._lock:
+                self._loading.pop(key).set()
+
+    def _evict(self, keep):
+        def total(): return sum(b for _, b in self._models.values())
+        while len(self._models) > 1 and (len(self._models) > self.max_models or total() > self.max_bytes):
+            victim=next(k for k in self._models if k != keep)
+            del self._models[victim]
+
+    def warmup(self, models_dir: Path, size: str, compute_type='int8', cpu_threads=0, num_workers=1) -> threading.Thread:
+        """Charge le modèle et fait une inférence à blanc, dans un thread de fond."""
+        def run():
+            try:
+                model=self.get(models_dir, size, compute_type, cpu_threads, num_workers)
+                segments, _ = model.transcribe(np.zeros(SAMPLE_RATE, dtype=np.float32), beam_size=1,
+                                               vad_filter=False, language='fr')
+                list(segments)
+            except Exception as e:
+                log_exc(e)
+        t=threading.Thread(target=run, daemon=True); t.start(); return t
+
+    def loaded(self):
+        with self._lock:
+            return list(self._models)
+
+    def clear(self):
+        with self._lock:
+            self._models.clear()
+
+registry = ModelRegistry()
 
 class Transcriber:
-    def __init__(self, models_dir: Path, size: str='small'):
-        mp = models_dir / f'faster-whisper-{size}'
-        if not mp.exists() or not any(mp.iterdir()):
-            raise RuntimeError(f'Modèle {size} introuvable. Téléchargez-le dans Paramètres.')
-        # int8 = léger CPU; tu peux passer en int8_float32 si souci de qualité
-        self.model = WhisperModel(str(mp), device='cpu', compute_type='int8')
+    def __init__(self, models_dir: Path, size: str='small', num_workers: int=1, compute_type: str='int8',
+                 cpu_threads: int=0, models: ModelRegistry=None):
+        self.size = size
+        self.model = (models or registry).get(models_dir, size, compute_type, cpu_threads, num_workers)
+        self._batched = None   # BatchedInferencePipeline, créé au premier transcribe_batch
+
+    def _segments(self, audio, offset=0.0):
+        # fixer la langue à 'fr' évite une détection sur silence
+        segments, info = self.model.transcribe(
+            audio,
+            beam_size=1,
+            vad_filter=True,
+            language='fr'
+        )
+        return [Segment.from_whisper(seg, offset) for seg in segments if getattr(seg, 'text', '').strip()]
+
+    def _transcribe(self, audio) -> str:
+        return " ".join(seg.text for seg in self._segments(audio))
+
+    def transcribe_words(self, audio: np.ndarray, prompt: str=None):
+        """Mots horodatés [(début s, fin s, mot, probabilité)] d'un signal 16 kHz en mémoire."""
+        segments, info = self.model.transcribe(
+            np.asarray(audio, dtype=np.float32).reshape(-1),
+            beam_size=1,
+            vad_filter=True,
+            language='fr',
+            word_timestamps=True,
+            initial_prompt=prompt or None,
+            condition_on_previous_text=False
+        )
+        return [(w.start, w.end, w.word, w.probability) for seg in segments for w in (seg.words or []) if w.word.strip()]
+
+    def transcribe_array(self, audio: np.ndarray, samplerate: int=SAMPLE_RATE) -> str:
+        """Transcrit un signal mono float32 en mémoire (pas d'aller-retour disque)."""
+        return " ".join(seg.text for seg in self.transcribe_segments(audio, samplerate))
+
+    def transcribe_segments(self, audio: np.ndarray, samplerate: int=SAMPLE_RATE, offset: float=0.0):
+        """Comme transcribe_array, mais retourne les Segment (bornes décalées de `offset` s)."""
+        if samplerate != SAMPLE_RATE:
+            raise ValueError(f'Audio attendu à {SAMPLE_RATE} Hz (reçu {samplerate} Hz).')
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        # ignore proprement les morceaux vides
+        if audio.shape[0] == 0:
+            return []
+        if not telemetry.enabled:
+            return self._segments(audio, offset)
+        t = time.perf_counter()
+        segs = self._segments(audio, offset)
+        dt = time.perf_counter() - t
+        telemetry.observe('transcribe_ms', dt*1e3); telemetry.observe('rtf', dt*SAMPLE_RATE/audio.shape[0])
+        return segs
+
+    def transcribe_batch(self, items, batch_size=8):
+        """Transcrit plusieurs signaux 16 kHz [(audio, offset)] en un passage batché du modèle.
+
+        Les zones de parole de chaque signal (VAD) sont mises bout à bout et décodées ensemble
+        (encodeur et décodeur par lots de `batch_size` extraits de 30 s au plus) ; retourne une
+        liste de Segment par entrée, bornes décalées de son `offset`.
+        """
+        items = [(np.asarray(a, dtype=np.float32).reshape(-1), off) for a, off in items]
+        try:
+            from faster_whisper import BatchedInferencePipeline   # faster-whisper >= 1.1
+            from faster_whisper.vad import VadOptions, get_speech_timestamps
+        except ImportError:
+            BatchedInferencePipeline = None
+        if len(items) == 1 or BatchedInferencePipeline is None:
+            return [self.transcribe_segments(a, offset=off) for a, off in items]
+        vad = VadOptions(min_silence_duration_ms=160, max_speech_duration_s=MAX_CLIP_S)
+        parts, clips, owners = [], [], []   # owners[k] = (entrée, décalage concaténé -> session)
+        pos = 0
+        for i, (audio, off) in enumerate(items):
+            spans = []
+            for ts in get_speech_timestamps(audio, vad) if audio.shape[0] else ():
+                # zones voisines regroupées tant que l'extrait tient dans la fenêtre
+                if spans and ts['end'] - spans[-1][0] <= MAX_CLIP_S * SAMPLE_RATE: spans[-1][1] = ts['end']
+                else: spans.append([ts['start'], ts['end']])
+            for a, b in spans:
+                parts.append(audio[a:b]); clips.append({'start': pos / SAMPLE_RATE, 'end': (pos + b - a) / SAMPLE_RATE})
+                owners.append((i, off + (a - pos) / SAMPLE_RATE)); pos += b - a
+        out = [[] for _ in items]
+        if not parts:
+            return out
+        if self._batched is None:
+            self._batched = BatchedInferencePipeline(self.model)
+        t = time.perf_counter()
+        segments, info = self._batched.transcribe(np.concatenate(parts), language='fr', beam_size=1,
+                                                  clip_timestamps=clips, batch_size=batch_size,
+                                                  without_timestamps=False)
+        # seg.seek = début de son extrait en trames (100/s) : l'extrait d'origine, même si le
+        # modèle horodate au-delà de sa fin ; bornes ramenées dans l'extrait
+        fps = self.model.frames_per_second
+        by_seek = {int(c['start'] * fps): k for k, c in enumerate(clips)}
+        starts = [c['start'] for c in clips]
+        for seg in segments:
+            if not getattr(seg, 'text', '').strip(): continue
+            k = by_seek.get(seg.seek)
+            if k is None: k = max(0, bisect.bisect_right(starts, seg.start + 1e-3) - 1)
+            i, shift = owners[k]; sg = Segment.from_whisper(seg, shift)
+            lo, hi = clips[k]['start'] + shift, clips[k]['end'] + shift
+            sg.start = min(max(sg.start, lo), hi); sg.end = min(max(sg.end, sg.start), hi)
+            out[i].append(sg)
+        if telemetry.enabled:
+            dt = time.perf_counter() - t
+            telemetry.observe('transcribe_ms', dt*1e3); telemetry.observe('rtf', dt*SAMPLE_RATE/pos)
+            telemetry.observe('batch_size', len(items))
+        return out
+
+    def transcribe_file(self, path: Path):
+        """Transcrit un fichier audio (tout format lu par faster-whisper) ; retourne ([Segment], durée s)."""
+        segments, info = self.model.transcribe(
+            str(path),
+            beam_size=1,
+            vad_filter=True,
+            language='fr'
+        )
+        segs = [Segment.from_whisper(seg) for seg in segments if getattr(seg, 'text', '').strip()]
+        return segs, float(getattr(info, 'duration', 0.0) or 0.0)
 
     def transcribe_wav(self, wav_path: Path) -> str:
         # ignore proprement les fichiers vides
@@ -18,12 +221,93 @@ class Transcriber:
                 return ""
         except Exception:
             pass
+        return self._transcribe(str(wav_path))
 
-        # fixer la langue à 'fr' évite une détection sur silence
-        segments, info = self.model.transcribe(
-            str(wav_path),
-            beam_size=1,
-            vad_filter=True,
-            language='fr'
-        )
-        return " ".join(seg.text.strip() for seg in segments if getattr(seg, 'text', '').strip())
+
+def _norm(word: str) -> str:
+    return ''.join(ch for ch in word.lower() if ch.isalnum())
+
+class StreamUpdate:
+    """Résultat d'un pas de streaming : texte confirmé (définitif) + hypothèse partielle.
+
+    `segments` : les Segment correspondant au texte confirmé (confiance = moyenne des
+    probabilités des mots).
+    """
+    def __init__(self, confirmed: str='', partial: str='', segments=()):
+        self.confirmed=confirmed; self.partial=partial; self.segments=list(segments)
+
+class StreamingTranscriber:
+    """Transcription en fenêtre glissante avec hypothèses partielles.
+
+    À chaque pas (`feed`), la fenêtre d'audio non confirmé est redécodée avec,
+    en prompt, la fin du texte déjà confirmé. Un mot est confirmé quand deux
+    décodages successifs s'accordent sur lui (préfixe commun) ; les mots dont
+    l'horodatage retombe dans la partie déjà confirmée sont ignorés, ce qui
+    évite les doublons sur le recouvrement. La fenêtre est ensuite raccourcie
+    jusqu'à la fin du dernier mot confirmé.
+    """
+    def __init__(self, transcriber: Transcriber, max_window=25.0, prompt_chars=200):
+        self.t=transcriber
+        self.max_window=max_window
+        self.prompt_chars=prompt_chars
+        self._buf=np.zeros(0, dtype=np.float32)
+        self._buf_start=None     # position de session (s) de _buf[0]
+        self._committed_end=0.0  # fin (s) du dernier mot confirmé
+        self._prev=[]            # hypothèse précédente non confirmée
+        self._prompt=''
+
+    def _append(self, chunk):
+        audio=np.asarray(chunk.audio, dtype=np.float32)
+        if self._buf_start is None:
+            self._buf_start=chunk.offset
+        end=self._buf_start + self._buf.shape[0]/SAMPLE_RATE
+        skip=int(round((end - chunk.offset)*SAMPLE_RATE))   # > 0 : recouvrement
+        if skip < 0:
+            # trou (silence non transmis) : on le comble pour garder des horodatages justes
+            audio=np.concatenate([np.zeros(-skip, dtype=np.float32), audio])
+        elif skip:
+            audio=audio[skip:]
+        self._buf=np.concatenate([self._buf, audio])
+
+    def _trim(self, t):
+        k=int((t - self._buf_start)*SAMPLE_RATE)
+        if k > 0:
+            self._buf=self._buf[k:]; self._buf_start += k/SAMPLE_RATE
+
+    def _commit(self, words):
+        if not words:
+            return None
+        text=''.join(w[2] for w in words).strip()
+        self._committed_end=words[-1][1]
+        self._prompt=(self._prompt + ' ' + text)[-self.prompt_chars:]
+        return Segment(words[0][0], words[-1][1], text, sum(w[3] for w in words)/len(words))
+
+    def feed(self, chunk) -> StreamUpdate:
+        self._append(chunk)
+        if self._buf.shape[0] == 0:
+            return StreamUpdate()
+        off=self._buf_start
+        hyp=[(off + a, off + b, w, p) for a, b, w, p in self.t.transcribe_words(self._buf, prompt=self._prompt)]
+        hyp=[h for h in hyp if h[1] > self._committed_end + 0.05]
+        n=0
+        while n < min(len(hyp), len(self._prev)) and _norm(hyp[n][2]) == _norm(self._prev[n][2]):
+            n += 1
+        segs=[self._commit(hyp[:n])]
+        self._prev=hyp[n:]
+        if self._buf.shape[0]/SAMPLE_RATE > self.max_window:
+            # fenêtre pleine sans accord : on valide l'hypothèse courante
+            segs.append(self._commit(self._prev)); self._prev=[]
+            self._trim(max(self._committed_end, self._buf_start + self._buf.shape[0]/SAMPLE_RATE - 1.0))
+        elif n:
+            self._trim(self._committed_end)
+        return self._update(segs, ''.join(w[2] for w in self._prev).strip())
+
+    @staticmethod
+    def _update(segs, partial=''):
+        segs=[s for s in segs if s is not None and s.text]
+        return StreamUpdate(' '.join(s.text for s in segs), partial, segs)
+
+    def flush(self) -> StreamUpdate:
+        """Fin de session : l'hypothèse en cours devient définitive."""
+        seg=self._commit(self._prev); self._prev=[]
+        return self._update([seg])
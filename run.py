@@ -1,4 +1,6 @@
+import multiprocessing
 from optimisation_pilotage.app import main
 
 if __name__=='__main__':
+    multiprocessing.freeze_support()   # exécutable empaqueté : processus de re-transcription (spawn)
     main()
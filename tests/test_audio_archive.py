@@ -0,0 +1,37 @@
+"""Archive de session : les blocs jetés (file pleine) deviennent du silence à leur place."""
+import threading
+import numpy as np
+from benchmarks.fake_sd import ensure_sounddevice
+
+ensure_sounddevice()
+from optimisation_pilotage.modules import audio_mix   # noqa: E402
+
+SR = 16000; N = 1600   # blocs de 0,1 s
+
+
+class GatedSoundFile(audio_mix.sf.SoundFile):
+    """Bloque la première écriture tant que le test n'a pas rempli la file."""
+    gate = None
+    def write(self, data):
+        if GatedSoundFile.gate: GatedSoundFile.gate.wait(5); GatedSoundFile.gate = None
+        return super().write(data)
+
+
+def test_overflow_keeps_offsets(tmp_path, monkeypatch):
+    GatedSoundFile.gate = threading.Event()
+    monkeypatch.setattr(audio_mix.sf, 'SoundFile', GatedSoundFile)
+    arch = audio_mix.SessionArchive(tmp_path / 's.flac', SR, index_step_s=0.2, max_pending=2)
+    blocks = [np.full(N, 0.05 * (i + 1), np.float32) for i in range(12)]
+    arch.write(blocks[0])
+    while not arch._q.empty(): pass   # le thread d'écriture tient le bloc 0 et reste bloqué
+    for b in blocks[1:8]: arch.write(b)   # 1 et 2 entrent, 3..7 sont jetés
+    GatedSoundFile.gate.set()
+    for b in blocks[8:]:
+        while arch._q.full(): pass
+        arch.write(b)
+    path = arch.close()
+    assert arch.dropped_samples == 5 * N and arch.samples == 12 * N
+    for i, b in enumerate(blocks):
+        got = audio_mix.read_range(path, i * N / SR, (i + 1) * N / SR)[:N]
+        want = np.zeros(N, np.float32) if 3 <= i <= 7 else b
+        assert len(got) == N and np.allclose(got, want, atol=1e-3), i
@@ -0,0 +1,63 @@
+"""Reprise des téléchargements de modèles (.part partiel ou complet), sur une source locale."""
+import hashlib, io, urllib.error
+import pytest
+from optimisation_pilotage.modules import models_manager as mm
+
+DATA = bytes(range(256)) * 4096   # 1 Mo
+
+
+class CountingSource(mm.LocalSource):
+    def __init__(self, root):
+        super().__init__(root); self.opened = []
+    def open(self, size, name, offset=0):
+        self.opened.append((name, offset)); return super().open(size, name, offset)
+
+
+@pytest.fixture
+def setup(tmp_path):
+    src_dir = tmp_path / 'src' / 'faster-whisper-small'; src_dir.mkdir(parents=True)
+    (src_dir / 'model.bin').write_bytes(DATA)
+    dst = tmp_path / 'dst'; dst.mkdir()
+    rf = mm.RemoteFile('model.bin', len(DATA), hashlib.sha256(DATA).hexdigest())
+    return CountingSource(tmp_path / 'src'), rf, dst
+
+
+def _fetch(src, rf, dst):
+    done = []
+    err = mm.ModelsManager(source=src)._fetch('small', rf, dst, done.append)
+    return err, sum(done)
+
+
+def test_resume_from_partial_part(setup):
+    src, rf, dst = setup
+    (dst / 'model.bin.part').write_bytes(DATA[:300_000])
+    err, done = _fetch(src, rf, dst)
+    assert err is None and done == len(DATA)
+    assert src.opened == [('model.bin', 300_000)]
+    assert (dst / 'model.bin').read_bytes() == DATA and not (dst / 'model.bin.part').exists()
+
+
+def test_complete_part_is_verified_without_request(setup):
+    src, rf, dst = setup
+    (dst / 'model.bin.part').write_bytes(DATA)   # arrêt entre le dernier octet et le renommage
+    err, done = _fetch(src, rf, dst)
+    assert err is None and done == len(DATA) and src.opened == []
+    assert (dst / 'model.bin').read_bytes() == DATA
+
+
+def test_complete_part_with_bad_hash_is_dropped(setup):
+    src, rf, dst = setup
+    (dst / 'model.bin.part').write_bytes(b'x' * len(DATA))
+    err, _ = _fetch(src, rf, dst)
+    assert 'sha256' in err and not (dst / 'model.bin.part').exists() and not (dst / 'model.bin').exists()
+    assert _fetch(src, rf, dst)[0] is None   # le nouvel essai repart de zéro
+    assert (dst / 'model.bin').read_bytes() == DATA
+
+
+def test_hub_range_not_satisfiable_means_complete(monkeypatch):
+    def urlopen(req, timeout=None):
+        raise urllib.error.HTTPError(req.full_url, 416, 'Range Not Satisfiable', {}, io.BytesIO())
+    monkeypatch.setattr('urllib.request.urlopen', urlopen)
+    assert mm.HubSource().open('small', 'model.bin', offset=10).read() == b''
+    with pytest.raises(urllib.error.HTTPError):
+        mm.HubSource().open('small', 'model.bin', offset=0)
@@ -0,0 +1,29 @@
+"""Découpage VAD : un bruit bref isolé ne doit pas entraîner le silence qui le suit."""
+import numpy as np
+from benchmarks.fake_sd import ensure_sounddevice
+
+ensure_sounddevice()
+from optimisation_pilotage.modules import audio_mix   # noqa: E402
+
+SR = 16000
+
+
+def _chunks(x, block=160):
+    seg = audio_mix.VadSegmenter(SR); ring = audio_mix.RingBuffer(30*SR); out = []
+    for i in range(0, len(x), block):
+        ring.write(x[i:i + block]); out += seg.process(ring)
+    return seg, out
+
+
+def test_click_then_long_silence_is_not_sent():
+    rng = np.random.default_rng(0)
+    floor = lambda s: 1e-4*rng.standard_normal(int(s*SR)).astype(np.float32)
+    click = np.zeros(int(0.03*SR), np.float32); click[::2] = 0.5
+    speech = 0.2*np.sin(2*np.pi*220*np.arange(5*SR)/SR).astype(np.float32)
+    x = np.concatenate([floor(1.0), click, floor(10.0), speech, floor(2.0)])
+    seg, chunks = _chunks(x)
+    t_speech = 11.03
+    assert chunks and seg.silent_skipped >= 1
+    audio, pos = chunks[0]
+    assert t_speech - 1.0 <= pos/SR <= t_speech, pos/SR   # amorce seulement
+    assert len(audio)/SR < 8.0